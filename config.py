@@ -7,23 +7,50 @@ from pathlib import Path
 # Diretório base do projeto
 BASE_DIR = Path(__file__).parent
 
+def _url_banco():
+    """DATABASE_URL, aceitando também o prefixo postgres:// (não reconhecido pelo SQLAlchemy)"""
+    url = os.environ.get('DATABASE_URL')
+    if url and url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
 class Config:
     """Configuração base"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f'sqlite:///{BASE_DIR}/src/database/app.db'
+    SQLALCHEMY_DATABASE_URI = _url_banco() or f'sqlite:///{BASE_DIR}/src/database/app.db'
     
     # Configurações da API
     API_TITLE = 'GPROG API'
     API_VERSION = 'v1.0.0'
     API_DESCRIPTION = 'Sistema de Programação Musical para Rádios'
     
+    # Aplicar migrações pendentes ao criar a aplicação (em produção, use scripts/migrar_banco.py)
+    MIGRAR_AUTOMATICAMENTE = True
+    
+    # SQLite: pragmas de cada conexão (além de PRAGMAS_PADRAO em src/services/perfil_sqlite.py)
+    # e intervalo em segundos da manutenção periódica (ANALYZE, optimize, vacuum; 0 desliga)
+    SQLITE_PRAGMAS = {}
+    SQLITE_MANUTENCAO_INTERVALO = 3600
+    
     # Configurações de paginação
     DEFAULT_PAGE_SIZE = 20
     MAX_PAGE_SIZE = 100
     
-    # Configurações de CORS
-    CORS_ORIGINS = ['http://localhost:3000', 'http://localhost:5000']
+    # Compressão das respostas (bytes mínimos e níveis de gzip/brotli)
+    COMPRESSAO_MINIMO = 1024
+    COMPRESSAO_NIVEL_GZIP = 6
+    COMPRESSAO_NIVEL_BROTLI = 4
+    
+    # Instrumentação das requisições e /metrics (Prometheus): comandos SQL acima de
+    # METRICAS_CONSULTA_LENTA segundos vão para o log com os parâmetros (0 desliga)
+    METRICAS_ATIVAS = True
+    METRICAS_CONSULTA_LENTA = 0.2
+    METRICAS_SERVER_TIMING = True
+    METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')
+    
+    # Configurações de CORS: todas as origens, ou só as de CORS_ORIGINS (separadas por vírgula)
+    CORS_ORIGINS = [origem.strip() for origem in os.environ.get('CORS_ORIGINS', '').split(',') if origem.strip()] or '*'
 
 class DevelopmentConfig(Config):
     """Configuração para desenvolvimento"""
@@ -35,12 +62,28 @@ class ProductionConfig(Config):
     DEBUG = False
     TESTING = False
     SECRET_KEY = os.environ.get('SECRET_KEY')
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    SQLALCHEMY_DATABASE_URI = _url_banco()
+    MIGRAR_AUTOMATICAMENTE = False
+    
+    # Chaves estrangeiras verificadas pelo SQLite (bancos gravados sem elas podem ter
+    # referências órfãs: confira com PRAGMA foreign_key_check antes de ativar)
+    SQLITE_PRAGMAS = {'foreign_keys': 'ON'}
+    
+    # Conexões mantidas por worker (uma por thread atendendo requisições); no
+    # PostgreSQL cada conexão é testada antes do uso e renovada a cada 30 min
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 8)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 8)),
+        'pool_timeout': 30,
+        'pool_pre_ping': (_url_banco() or '').startswith('postgresql'),
+        'pool_recycle': 1800
+    }
 
 class TestingConfig(Config):
     """Configuração para testes"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLITE_MANUTENCAO_INTERVALO = 0
     WTF_CSRF_ENABLED = False
 
 # Dicionário de configurações
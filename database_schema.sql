@@ -35,6 +35,7 @@ CREATE TABLE musicas (
     data_aniversario_interprete2 DATE,
     data_aniversario_interprete3 DATE,
     duracao_padrao TIME DEFAULT '00:03:30', -- duração padrão para quando não especificada
+    arquivo_audio VARCHAR(500), -- caminho do arquivo (exportação para automação)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -144,24 +145,99 @@ CREATE TABLE nomes_musicas (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Aniversários dos intérpretes por mês/dia (derivada das datas em musicas)
+CREATE TABLE aniversarios_interpretes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    musica_id INTEGER NOT NULL REFERENCES musicas(id) ON DELETE CASCADE,
+    posicao INTEGER NOT NULL, -- 1, 2 ou 3 (interprete1, interprete2, interprete3)
+    interprete VARCHAR(255),
+    data_aniversario DATE NOT NULL,
+    mes_dia INTEGER NOT NULL -- MMDD, ex.: 1225
+);
+
 -- Tabela de Programação Gerada (histórico das programações)
 CREATE TABLE programacao_gerada (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     data_programacao DATE NOT NULL,
     grade_id INTEGER REFERENCES grades_programacao(id),
-    conteudo_json TEXT, -- JSON com a programação completa do dia
+    emissora_id INTEGER REFERENCES emissoras(id),
+    conteudo_json TEXT, -- JSON com a estrutura dos blocos do dia
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Tabela de Itens da Programação Gerada (um registro por item executado)
+CREATE TABLE programacao_itens (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    programacao_id INTEGER NOT NULL REFERENCES programacao_gerada(id) ON DELETE CASCADE,
+    bloco INTEGER NOT NULL, -- índice do bloco no dia
+    ordem INTEGER NOT NULL, -- ordem dentro do bloco
+    hora INTEGER NOT NULL, -- segundos desde 00:00
+    tipo VARCHAR(20) NOT NULL, -- musica, comercial, vinheta, trilha
+    musica_id INTEGER REFERENCES musicas(id) ON DELETE SET NULL,
+    categoria_id INTEGER REFERENCES categorias(id) ON DELETE SET NULL,
+    referencia_id INTEGER, -- id em vinhetas/trilhas/comerciais, conforme o tipo
+    duracao INTEGER NOT NULL, -- segundos
+    posicao INTEGER -- posição na sequência de categorias da grade
+);
+
+-- Versão de cada tabela (ETag das listagens), incrementada a cada alteração
+CREATE TABLE versoes_tabelas (
+    tabela VARCHAR(100) PRIMARY KEY,
+    versao INTEGER NOT NULL DEFAULT 0,
+    atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Migrações aplicadas ao banco (uma linha por versão do esquema)
+CREATE TABLE versao_esquema (
+    versao INTEGER PRIMARY KEY,
+    descricao VARCHAR(255),
+    aplicada_em DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Índices para melhor performance
-CREATE INDEX idx_musicas_categoria ON musicas(categoria_id);
 CREATE INDEX idx_musicas_estilo ON musicas(estilo_id);
 CREATE INDEX idx_musicas_velocidade ON musicas(velocidade);
 CREATE INDEX idx_musicas_ano ON musicas(ano_lancamento);
+CREATE INDEX idx_musicas_categoria_velocidade ON musicas(categoria_id, velocidade);
+CREATE INDEX idx_musicas_nome ON musicas(nome_musica);
+CREATE INDEX idx_musicas_interprete1 ON musicas(interprete1);
+CREATE INDEX idx_aniversarios_mes_dia ON aniversarios_interpretes(mes_dia, musica_id);
+CREATE INDEX idx_aniversarios_musica ON aniversarios_interpretes(musica_id);
 CREATE INDEX idx_grade_sequencia_grade ON grade_sequencia_categorias(grade_id);
 CREATE INDEX idx_horarios_grade ON horarios_intervalos(grade_id);
 CREATE INDEX idx_horarios_hora ON horarios_intervalos(hora);
 CREATE INDEX idx_programacao_data ON programacao_gerada(data_programacao);
+CREATE INDEX idx_programacao_emissora_data ON programacao_gerada(emissora_id, data_programacao);
+CREATE INDEX idx_programacao_itens_hora ON programacao_itens(programacao_id, hora);
+CREATE INDEX idx_programacao_itens_musica ON programacao_itens(musica_id);
+CREATE INDEX idx_locutor_emissora_emissora ON locutor_emissora(emissora_id);
+CREATE INDEX idx_banco_locucoes_emissora_velocidade ON banco_locucoes(emissora_id, velocidade);
+CREATE INDEX idx_banco_locucoes_locutor ON banco_locucoes(locutor_id);
+CREATE INDEX idx_banco_locucoes_created ON banco_locucoes(created_at);
+
+-- Busca textual no catálogo (SQLite FTS5, sem distinção de acentos)
+CREATE VIRTUAL TABLE musicas_busca USING fts5(
+    interprete1, interprete2, interprete3, nome_musica, complemento,
+    content='musicas', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER musicas_busca_ai AFTER INSERT ON musicas BEGIN
+    INSERT INTO musicas_busca(rowid, interprete1, interprete2, interprete3, nome_musica, complemento)
+    VALUES (new.id, new.interprete1, new.interprete2, new.interprete3, new.nome_musica, new.complemento);
+END;
+
+CREATE TRIGGER musicas_busca_ad AFTER DELETE ON musicas BEGIN
+    INSERT INTO musicas_busca(musicas_busca, rowid, interprete1, interprete2, interprete3, nome_musica, complemento)
+    VALUES ('delete', old.id, old.interprete1, old.interprete2, old.interprete3, old.nome_musica, old.complemento);
+END;
+
+CREATE TRIGGER musicas_busca_au AFTER UPDATE OF interprete1, interprete2, interprete3, nome_musica, complemento ON musicas BEGIN
+    INSERT INTO musicas_busca(musicas_busca, rowid, interprete1, interprete2, interprete3, nome_musica, complemento)
+    VALUES ('delete', old.id, old.interprete1, old.interprete2, old.interprete3, old.nome_musica, old.complemento);
+    INSERT INTO musicas_busca(rowid, interprete1, interprete2, interprete3, nome_musica, complemento)
+    VALUES (new.id, new.interprete1, new.interprete2, new.interprete3, new.nome_musica, new.complemento);
+END;
 
 -- Inserção de dados iniciais
 INSERT INTO estilos (nome) VALUES 
@@ -2,99 +2,125 @@
 """
 Script para inicializar o banco de dados com dados de exemplo
 Sistema de Programação Musical
+
+Também carrega fixtures (CSV/JSON) ou um catálogo sintético em volume de
+produção, em inserts em lote dentro de uma transação.
+
+Exemplos:
+    python init_data.py
+    python init_data.py --fixtures fixtures/            # estilos.csv, musicas.csv, ...
+    python init_data.py --sintetico --musicas 200000
 """
 
+import argparse
 import os
 import sys
 sys.path.insert(0, os.path.dirname(__file__))
 
-from src.models.programacao import *
-from src.main import app
+from src.main import create_app
+from src.services.carga_inicial import TAMANHO_LOTE, carregar, ler_fixtures
+from src.services.dados_sinteticos import fontes_sinteticas
+from src.services.esquema import migrar_esquema
+
+# Dados de exemplo carregados sem --fixtures nem --sintetico
+ESTILOS = [
+    'Pop', 'Rock', 'MPB', 'Sertanejo', 'Funk', 'Eletrônica',
+    'Jazz', 'Blues', 'Reggae', 'Hip Hop', 'R&B', 'Country',
+    'Folk', 'Classical', 'Gospel', 'Forró', 'Axé', 'Pagode',
+    'Samba', 'Bossa Nova'
+]
+
+CATEGORIAS = [
+    {'codigo': '01', 'nome': 'Internacional Lenta FB', 'descricao': 'Músicas internacionais lentas para Facebook'},
+    {'codigo': '02', 'nome': 'Nacional Pop', 'descricao': 'Músicas nacionais pop'},
+    {'codigo': '03', 'nome': 'Rock Clássico', 'descricao': 'Rock clássico nacional e internacional'},
+    {'codigo': '04', 'nome': 'MPB Contemporânea', 'descricao': 'MPB contemporânea'},
+    {'codigo': '05', 'nome': 'Sertanejo Atual', 'descricao': 'Sertanejo atual e universitário'}
+]
+
+LOCUTORES = [
+    {'codigo': 'Locutor 1', 'nome': 'João'},
+    {'codigo': 'Locutor 2', 'nome': 'Maria'},
+    {'codigo': 'Locutor 3', 'nome': 'Zé'},
+    {'codigo': 'Locutor 4', 'nome': 'Ana'},
+    {'codigo': 'Locutor 5', 'nome': 'Carlos'}
+]
+
+EMISSORAS = [
+    {'codigo': 'Radio 1', 'nome': 'Educadora', 'frequencia': 'FM 104.9'},
+    {'codigo': 'Radio 2', 'nome': 'Nativa', 'frequencia': 'FM 95.3'},
+    {'codigo': 'Radio 3', 'nome': 'Band', 'frequencia': 'FM 96.1'},
+    {'codigo': 'Radio 4', 'nome': 'Jovem Pan', 'frequencia': 'FM 100.9'},
+    {'codigo': 'Radio 5', 'nome': 'Mix', 'frequencia': 'FM 106.3'}
+]
 
-def init_database():
-    """Inicializar banco de dados com dados de exemplo"""
+
+def dados_exemplo():
+    return {
+        'estilos': [{'nome': nome} for nome in ESTILOS],
+        'categorias': CATEGORIAS,
+        'locutores': LOCUTORES,
+        'emissoras': EMISSORAS
+    }
+
+
+def init_database(fontes=None, tamanho_lote=TAMANHO_LOTE, adiar_indices=True, validar=True):
+    """Inicializar banco de dados (dados de exemplo, sem `fontes`)
+
+    Cada tabela só é carregada se ainda estiver vazia, então rodar de novo
+    não duplica nada e completa as tabelas que faltam.
+    """
+    app = create_app(verificar=False)
     with app.app_context():
-        # Criar todas as tabelas
-        db.create_all()
-        
-        # Verificar se já existem dados
-        if Estilo.query.first():
-            print("Banco de dados já inicializado.")
-            return
+        # Criar ou atualizar o esquema
+        migrar_esquema()
         
         print("Inicializando banco de dados...")
+        resultado = carregar(
+            fontes or dados_exemplo(), tamanho_lote=tamanho_lote, adiar_indices=adiar_indices, validar=validar
+        )
         
-        # Inserir estilos
-        estilos = [
-            'Pop', 'Rock', 'MPB', 'Sertanejo', 'Funk', 'Eletrônica',
-            'Jazz', 'Blues', 'Reggae', 'Hip Hop', 'R&B', 'Country',
-            'Folk', 'Classical', 'Gospel', 'Forró', 'Axé', 'Pagode',
-            'Samba', 'Bossa Nova'
-        ]
-        
-        for estilo_nome in estilos:
-            estilo = Estilo(nome=estilo_nome)
-            db.session.add(estilo)
-        
-        # Inserir categorias de exemplo
-        categorias = [
-            {'codigo': '01', 'nome': 'Internacional Lenta FB', 'descricao': 'Músicas internacionais lentas para Facebook'},
-            {'codigo': '02', 'nome': 'Nacional Pop', 'descricao': 'Músicas nacionais pop'},
-            {'codigo': '03', 'nome': 'Rock Clássico', 'descricao': 'Rock clássico nacional e internacional'},
-            {'codigo': '04', 'nome': 'MPB Contemporânea', 'descricao': 'MPB contemporânea'},
-            {'codigo': '05', 'nome': 'Sertanejo Atual', 'descricao': 'Sertanejo atual e universitário'}
-        ]
-        
-        for cat_data in categorias:
-            categoria = Categoria(
-                codigo=cat_data['codigo'],
-                nome=cat_data['nome'],
-                descricao=cat_data['descricao']
-            )
-            db.session.add(categoria)
-        
-        # Inserir locutores de exemplo
-        locutores = [
-            {'codigo': 'Locutor 1', 'nome': 'João'},
-            {'codigo': 'Locutor 2', 'nome': 'Maria'},
-            {'codigo': 'Locutor 3', 'nome': 'Zé'},
-            {'codigo': 'Locutor 4', 'nome': 'Ana'},
-            {'codigo': 'Locutor 5', 'nome': 'Carlos'}
-        ]
-        
-        for loc_data in locutores:
-            locutor = Locutor(
-                codigo=loc_data['codigo'],
-                nome=loc_data['nome']
-            )
-            db.session.add(locutor)
-        
-        # Inserir emissoras de exemplo
-        emissoras = [
-            {'codigo': 'Radio 1', 'nome': 'Educadora', 'frequencia': 'FM 104.9'},
-            {'codigo': 'Radio 2', 'nome': 'Nativa', 'frequencia': 'FM 95.3'},
-            {'codigo': 'Radio 3', 'nome': 'Band', 'frequencia': 'FM 96.1'},
-            {'codigo': 'Radio 4', 'nome': 'Jovem Pan', 'frequencia': 'FM 100.9'},
-            {'codigo': 'Radio 5', 'nome': 'Mix', 'frequencia': 'FM 106.3'}
-        ]
-        
-        for em_data in emissoras:
-            emissora = Emissora(
-                codigo=em_data['codigo'],
-                nome=em_data['nome'],
-                frequencia=em_data['frequencia']
-            )
-            db.session.add(emissora)
-        
-        # Commit das inserções
-        db.session.commit()
-        
+        for tabela, total in resultado.items():
+            if total is None:
+                print(f"- {tabela}: já tinha dados")
+            else:
+                print(f"- {tabela}: {total} registros inseridos")
         print("Banco de dados inicializado com sucesso!")
-        print(f"- {len(estilos)} estilos inseridos")
-        print(f"- {len(categorias)} categorias inseridas")
-        print(f"- {len(locutores)} locutores inseridos")
-        print(f"- {len(emissoras)} emissoras inseridas")
 
-if __name__ == '__main__':
-    init_database()
+def main():
+    parser = argparse.ArgumentParser(description='Inicializar o banco de dados')
+    origem = parser.add_mutually_exclusive_group()
+    origem.add_argument('--fixtures', help='Arquivo JSON {tabela: [linhas]} ou diretório com <tabela>.csv/.jsonl/.json')
+    origem.add_argument('--sintetico', action='store_true', help='Gerar um catálogo sintético em volume de produção')
+    parser.add_argument('--musicas', type=int, default=200000, help='Músicas sintéticas (padrão: 200000)')
+    parser.add_argument('--emissoras', type=int, default=50, help='Emissoras sintéticas (padrão: 50)')
+    parser.add_argument('--locutores', type=int, default=200, help='Locutores sintéticos (padrão: 200)')
+    parser.add_argument('--locucoes', type=int, default=5000, help='Locuções sintéticas (padrão: 5000)')
+    parser.add_argument('--semente', type=int, default=42, help='Semente dos dados sintéticos (padrão: 42)')
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help=f'Linhas por insert (padrão: {TAMANHO_LOTE})')
+    parser.add_argument('--sem-adiar-indices', action='store_true',
+                        help='Manter os índices durante a carga (mais lento em tabelas grandes)')
+    args = parser.parse_args()
 
+    fontes = None
+    if args.fixtures:
+        try:
+            fontes = ler_fixtures(args.fixtures)
+        except ValueError as e:
+            parser.error(str(e))
+    elif args.sintetico:
+        fontes = fontes_sinteticas(
+            musicas=args.musicas, emissoras=args.emissoras, locutores=args.locutores,
+            locucoes=args.locucoes, semente=args.semente
+        )
+
+    try:
+        init_database(
+            fontes, tamanho_lote=args.lote, adiar_indices=not args.sem_adiar_indices, validar=not args.sintetico
+        )
+    except ValueError as e:
+        print(f"Erro na carga (nada foi gravado): {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Script para auditar os planos de consulta das rotas da API
+Sistema de Programação Musical
+
+Popula um banco SQLite com dados sintéticos em volume de produção, chama as
+rotas de cada blueprint pelo cliente de teste do Flask, captura o SQL
+emitido e roda EXPLAIN QUERY PLAN em cada comando. Relata varreduras
+completas de tabelas grandes, B-trees temporárias (ORDER BY/GROUP BY sem
+índice), índices automáticos e buscas por índice que ainda precisam ler a
+tabela.
+
+Exemplos:
+    python scripts/auditar_consultas.py
+    python scripts/auditar_consultas.py --musicas 50000 --todas
+    python scripts/auditar_consultas.py --banco /tmp/auditoria.db --estrito
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def montar_requisicoes():
+    """(método, caminho, corpo) de cada rota auditada, com ids reais do banco"""
+    from sqlalchemy import func
+    from src.models.programacao import (
+        db, Categoria, Estilo, Musica, Emissora, LocutorEmissora, BancoLocucao, ProgramacaoGerada
+    )
+
+    categoria_id = db.session.scalar(db.select(Categoria.id).limit(1))
+    estilo_id = db.session.scalar(db.select(Estilo.id).limit(1))
+    emissora_id = db.session.scalar(db.select(Emissora.id).limit(1))
+    locutor_id = db.session.scalar(db.select(LocutorEmissora.locutor_id).limit(1))
+    relacionamento_id = db.session.scalar(db.select(LocutorEmissora.id).limit(1))
+    locucao_id = db.session.scalar(db.select(BancoLocucao.id).limit(1))
+    musica = db.session.get(Musica, db.session.scalar(db.select(func.max(Musica.id))))
+    programacao = db.session.scalars(db.select(ProgramacaoGerada).limit(1)).first()
+    ids = ','.join(str(i) for i in range(1, 51))
+    hoje = date.today()
+
+    requisicoes = [
+        ('GET', '/api/categorias', None),
+        ('GET', f'/api/categorias/{categoria_id}', None),
+        ('GET', '/api/estilos', None),
+        ('GET', f'/api/estilos/{estilo_id}', None),
+        ('GET', '/api/musicas', None),
+        ('GET', f'/api/musicas?categoria_id={categoria_id}', None),
+        ('GET', f'/api/musicas?categoria_id={categoria_id}&velocidade=2', None),
+        ('GET', f'/api/musicas?estilo_id={estilo_id}&ano=1998', None),
+        ('GET', '/api/musicas?q=saudade', None),
+        ('GET', f'/api/musicas?ids={ids}', None),
+        ('GET', '/api/musicas?cursor=&ordenar=nome_musica&per_page=200', None),
+        ('GET', '/api/musicas?cursor=&ordenar=interprete1&ordem=desc&per_page=200', None),
+        ('GET', f'/api/musicas/{musica.id}', None),
+        ('GET', '/api/musicas/autocomplete/interpretes?q=amor', None),
+        ('GET', '/api/musicas/autocomplete/nomes?q=noite', None),
+        ('GET', f'/api/musicas/aniversarios?data={hoje.isoformat()}', None),
+        ('GET', f'/api/musicas/aniversarios?data_inicio={(hoje - timedelta(days=3)).isoformat()}'
+                f'&data_fim={(hoje + timedelta(days=3)).isoformat()}&categoria_id={categoria_id}', None),
+        ('POST', '/api/musicas', {
+            'interprete1': musica.interprete1, 'nome_musica': 'Auditoria', 'ano_lancamento': 2020,
+            'categoria_id': categoria_id, 'complemento': 'auditoria'
+        }),
+        ('PUT', f'/api/musicas/{musica.id}', {'velocidade': 3}),
+        ('PATCH', f'/api/musicas?categoria_id={categoria_id}&ano=1998', {'valores': {'velocidade': 1}}),
+        ('DELETE', f'/api/musicas/{musica.id}', None),
+        ('GET', '/api/locutores', None),
+        ('GET', f'/api/locutores/{locutor_id}', None),
+        ('GET', '/api/emissoras', None),
+        ('GET', f'/api/emissoras/{emissora_id}', None),
+        ('GET', '/api/locutor-emissora', None),
+        ('GET', f'/api/locutor-emissora?emissora_id={emissora_id}', None),
+        ('GET', f'/api/locutor-emissora?locutor_id={locutor_id}', None),
+        ('GET', f'/api/locutor-emissora/{relacionamento_id}', None),
+        ('GET', f'/api/locutores/{locutor_id}/emissoras', None),
+        ('GET', f'/api/emissoras/{emissora_id}/locutores', None),
+        ('GET', '/api/banco-locucoes', None),
+        ('GET', f'/api/banco-locucoes?emissora_id={emissora_id}', None),
+        ('GET', f'/api/banco-locucoes?emissora_id={emissora_id}&velocidade=3', None),
+        ('GET', f'/api/banco-locucoes?locutor_id={locutor_id}&ativa=true', None),
+        ('GET', '/api/banco-locucoes?interprete=Silva', None),
+        ('GET', f'/api/banco-locucoes/{locucao_id}', None),
+        ('GET', '/api/banco-locucoes/emissoras', None),
+        ('GET', f'/api/banco-locucoes/emissoras/{emissora_id}/locutores', None),
+        ('GET', '/api/banco-locucoes/interpretes/search?q=amor', None),
+        ('GET', '/api/programacao', None),
+        ('GET', f'/api/programacao?emissora_id={emissora_id}', None),
+        ('GET', f'/api/programacao?data={(hoje - timedelta(days=1)).isoformat()}', None),
+        ('GET', f'/api/programacao/exportar?formato=csv&data_inicio={(hoje - timedelta(days=2)).isoformat()}'
+                f'&emissora_ids={emissora_id}', None),
+        ('POST', '/api/programacao/gerar', {'data': hoje.isoformat(), 'emissora_id': emissora_id, 'substituir': True}),
+        ('POST', '/api/programacao/gerar', {
+            'data': hoje.isoformat(), 'emissora_id': emissora_id, 'substituir': True, 'priorizar_aniversarios': True
+        }),
+    ]
+    if programacao is not None:
+        requisicoes += [
+            ('GET', f'/api/programacao/{programacao.id}', None),
+            ('GET', f'/api/programacao/{programacao.id}/itens?hora=10:00', None),
+            ('GET', f'/api/programacao/{programacao.id}/exportar?formato=m3u', None),
+        ]
+        item_musica = db.session.scalar(db.text(
+            'SELECT musica_id FROM programacao_itens WHERE musica_id IS NOT NULL LIMIT 1'
+        ))
+        if item_musica:
+            requisicoes.append(('GET', f'/api/programacao/musicas/{item_musica}', None))
+    return requisicoes
+
+
+def imprimir(relatorio, todas):
+    total_alertas = 0
+    for blueprint, consultas in relatorio.items():
+        alertas = sum(len(consulta['alertas']) for consulta in consultas)
+        total_alertas += alertas
+        print(f'\n== {blueprint}: {len(consultas)} consultas, {alertas} alertas')
+        for consulta in consultas:
+            if not consulta['alertas'] and not todas:
+                continue
+            sql = ' '.join(consulta['sql'].split())
+            print(f"\n  [{consulta['endpoint']}] x{consulta['execucoes']}")
+            print(f'  {sql[:300]}{"..." if len(sql) > 300 else ""}')
+            for detalhe in consulta['plano']:
+                print(f'      | {detalhe}')
+            for tipo, descricao in consulta['alertas']:
+                print(f'      ! {tipo}: {descricao}')
+    return total_alertas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Auditar os planos de consulta das rotas da API (SQLite)')
+    parser.add_argument('--banco', help='Arquivo SQLite a usar (criado e populado se não existir; padrão: temporário)')
+    parser.add_argument('--musicas', type=int, default=200000, help='Músicas sintéticas (padrão: 200000)')
+    parser.add_argument('--emissoras', type=int, default=50, help='Emissoras sintéticas (padrão: 50)')
+    parser.add_argument('--locucoes', type=int, default=5000, help='Locuções sintéticas (padrão: 5000)')
+    parser.add_argument('--dias', type=int, default=2, help='Dias de programação gerados por emissora (padrão: 2)')
+    parser.add_argument('--limite', type=int, default=1000,
+                        help='Tabelas com menos linhas podem ser varridas sem alerta (padrão: 1000)')
+    parser.add_argument('--todas', action='store_true', help='Mostrar também as consultas sem alertas')
+    parser.add_argument('--estrito', action='store_true', help='Terminar com código 1 se houver alertas')
+    args = parser.parse_args()
+
+    temporario = None
+    caminho = args.banco
+    if not caminho:
+        temporario = tempfile.TemporaryDirectory(prefix='gprog-auditoria-')
+        caminho = os.path.join(temporario.name, 'auditoria.db')
+
+    # config.py lê DATABASE_URL na importação
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(caminho)}'
+    from src.main import create_app
+    from src.models.programacao import db, Musica
+    from src.services.auditoria import CapturaConsultas, auditar
+    from src.services.dados_sinteticos import gerar_dados_sinteticos
+
+    app = create_app('development')
+    app.config['SQLITE_MANUTENCAO_INTERVALO'] = 0
+    with app.app_context():
+        if db.session.query(Musica.id).first() is None:
+            print(f'Gerando dados sintéticos em {caminho}...')
+            quantidades = gerar_dados_sinteticos(
+                musicas=args.musicas, emissoras=args.emissoras, locucoes=args.locucoes, dias=args.dias
+            )
+            print('- ' + ', '.join(f'{nome}: {quantidade}' for nome, quantidade in quantidades.items()))
+        # Estatísticas atualizadas, como após a manutenção periódica
+        with db.engine.connect() as conexao:
+            conexao.exec_driver_sql('ANALYZE')
+            conexao.commit()
+        requisicoes = montar_requisicoes()
+        engine = db.engine
+
+    cliente = app.test_client()
+    with CapturaConsultas(engine) as captura:
+        for metodo, caminho_rota, corpo in requisicoes:
+            resposta = cliente.open(caminho_rota, method=metodo, json=corpo)
+            if resposta.status_code >= 400:
+                print(f'- Aviso: {metodo} {caminho_rota} retornou {resposta.status_code}')
+
+    with app.app_context():
+        with db.engine.connect() as conexao:
+            relatorio = auditar(conexao, captura.consultas, limite=args.limite)
+
+    total_alertas = imprimir(relatorio, args.todas)
+    print(f'\n{sum(len(c) for c in relatorio.values())} consultas distintas, {total_alertas} alertas')
+
+    if temporario is not None:
+        temporario.cleanup()
+    if args.estrito and total_alertas:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Script de benchmark das rotas da API
+Sistema de Programação Musical
+
+Popula um banco SQLite com dados sintéticos (mesma semente, mesmos dados),
+roda cargas roteirizadas de cada blueprint pelo cliente de teste do Flask
+(paginação do catálogo, rajadas de autocompletar, busca de locuções,
+consultas e exportação da programação, escritas em lote, geração) e
+relata latência (p50/p95/p99) e vazão de cada carga. Os resultados podem
+ser gravados como base e comparados nas execuções seguintes.
+
+Exemplos:
+    python scripts/benchmark.py --banco /tmp/benchmark.db --salvar benchmark_base.json
+    python scripts/benchmark.py --banco /tmp/benchmark.db --base benchmark_base.json
+    python scripts/benchmark.py --musicas 50000 --cargas catalogo,autocompletar --iteracoes 20
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def imprimir(resultados, erros):
+    print(f"\n{'carga':<15}{'req':>7}{'erros':>7}{'média':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'req/s':>10}")
+    for nome, resumo in resultados.items():
+        print(
+            f"{nome:<15}{resumo['requisicoes']:>7}{resumo['erros']:>7}{resumo['media_ms']:>10.2f}"
+            f"{resumo['p50_ms']:>10.2f}{resumo['p95_ms']:>10.2f}{resumo['p99_ms']:>10.2f}{resumo['vazao']:>10.1f}"
+        )
+    print('(latências em ms)')
+    for nome, erro in erros.items():
+        print(f'- Aviso: {nome}: {erro}')
+
+
+def main():
+    from cargas_benchmark import CARGAS, MINIMO_MS, TOLERANCIA
+
+    parser = argparse.ArgumentParser(description='Benchmark das rotas da API com dados sintéticos')
+    parser.add_argument('--banco', help='Arquivo SQLite a usar (criado e populado se não existir; padrão: temporário)')
+    parser.add_argument('--musicas', type=int, default=200000, help='Músicas sintéticas (padrão: 200000)')
+    parser.add_argument('--emissoras', type=int, default=50, help='Emissoras sintéticas (padrão: 50)')
+    parser.add_argument('--locucoes', type=int, default=5000, help='Locuções sintéticas (padrão: 5000)')
+    parser.add_argument('--dias', type=int, default=2, help='Dias de programação gerados por emissora (padrão: 2)')
+    parser.add_argument('--cargas', default=','.join(CARGAS),
+                        help=f'Cargas a executar, separadas por vírgula (padrão: {",".join(CARGAS)})')
+    parser.add_argument('--iteracoes', type=int, default=30, help='Passadas medidas de cada carga (padrão: 30)')
+    parser.add_argument('--aquecimento', type=int, default=3, help='Passadas não medidas antes (padrão: 3)')
+    parser.add_argument('--semente', type=int, default=42, help='Semente dos dados e dos roteiros (padrão: 42)')
+    parser.add_argument('--base', help='Arquivo JSON com os resultados de referência para comparar')
+    parser.add_argument('--salvar', help='Gravar os resultados em um arquivo JSON (para usar como base)')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help=f'Piora aceita em relação à base, em fração (padrão: {TOLERANCIA})')
+    parser.add_argument('--minimo-ms', type=float, default=MINIMO_MS,
+                        help=f'Piora mínima em ms para apontar uma regressão, abaixo dela é ruído (padrão: {MINIMO_MS})')
+    args = parser.parse_args()
+
+    cargas = [nome.strip() for nome in args.cargas.split(',') if nome.strip()]
+    desconhecidas = [nome for nome in cargas if nome not in CARGAS]
+    if desconhecidas:
+        parser.error(f'Cargas desconhecidas: {", ".join(desconhecidas)} (use {", ".join(CARGAS)})')
+
+    temporario = None
+    caminho = args.banco
+    if not caminho:
+        temporario = tempfile.TemporaryDirectory(prefix='gprog-benchmark-')
+        caminho = os.path.join(temporario.name, 'benchmark.db')
+
+    # config.py lê DATABASE_URL na importação
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(caminho)}'
+    from src.main import create_app
+    from src.models.programacao import db, Musica
+    from cargas_benchmark import comparar, executar_carga, montar_contexto
+    from src.services.dados_sinteticos import gerar_dados_sinteticos
+
+    app = create_app('development')
+    app.config['SQLITE_MANUTENCAO_INTERVALO'] = 0
+    with app.app_context():
+        if db.session.query(Musica.id).first() is None:
+            print(f'Gerando dados sintéticos em {caminho}...')
+            quantidades = gerar_dados_sinteticos(
+                musicas=args.musicas, emissoras=args.emissoras, locucoes=args.locucoes,
+                dias=args.dias, semente=args.semente
+            )
+            print('- ' + ', '.join(f'{nome}: {quantidade}' for nome, quantidade in quantidades.items()))
+            with db.engine.connect() as conexao:
+                conexao.exec_driver_sql('ANALYZE')
+                conexao.commit()
+        contexto = montar_contexto()
+        musicas = db.session.query(Musica.id).count()
+
+    cliente = app.test_client()
+    resultados = {}
+    erros = {}
+    for nome in cargas:
+        print(f'Executando {nome}...')
+        resultados[nome], erro = executar_carga(
+            cliente, CARGAS[nome], contexto, args.iteracoes, args.aquecimento, args.semente
+        )
+        if erro:
+            erros[nome] = erro
+    imprimir(resultados, erros)
+
+    parametros = {
+        'musicas': musicas, 'iteracoes': args.iteracoes, 'semente': args.semente,
+        'python': platform.python_version(), 'maquina': platform.node()
+    }
+    regressoes = []
+    if args.base:
+        with open(args.base, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+        diferentes = [
+            chave for chave in ('musicas', 'iteracoes', 'semente', 'maquina')
+            if base.get('parametros', {}).get(chave) != parametros[chave]
+        ]
+        if diferentes:
+            print(f'\n- Aviso: a base foi medida com outros parâmetros ({", ".join(diferentes)})')
+        regressoes = comparar(resultados, base.get('cargas', {}), args.tolerancia, args.minimo_ms)
+        if regressoes:
+            print(f'\n{len(regressoes)} regressões em relação a {args.base}:')
+            for carga, metrica, anterior, atual, variacao in regressoes:
+                print(f'  {carga} {metrica}: {anterior} -> {atual} ({variacao:+.0%})')
+        else:
+            print(f'\nSem regressões em relação a {args.base} (tolerância {args.tolerancia:.0%}, mínimo {args.minimo_ms} ms)')
+
+    if args.salvar:
+        with open(args.salvar, 'w', encoding='utf-8') as arquivo:
+            json.dump({
+                'gerado_em': datetime.now().isoformat(timespec='seconds'),
+                'parametros': parametros,
+                'cargas': resultados
+            }, arquivo, ensure_ascii=False, indent=2)
+        print(f'Resultados gravados em {args.salvar}')
+
+    if temporario is not None:
+        temporario.cleanup()
+    if regressoes:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
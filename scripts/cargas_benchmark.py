@@ -0,0 +1,250 @@
+"""
+Cargas do benchmark das rotas da API (scripts/benchmark.py): roteiros,
+percentis de latência e comparação com uma base
+Sistema de Programação Musical
+"""
+import random
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from urllib.parse import quote
+
+from sqlalchemy import func
+
+from src.models.programacao import (
+    db, Categoria, Estilo, Musica, Emissora, LocutorEmissora, BancoLocucao, ProgramacaoGerada
+)
+from src.services.dados_sinteticos import PALAVRAS, SOBRENOMES
+
+PERCENTIS = (50, 95, 99)
+
+# Variação aceita em relação à base antes de apontar uma regressão (20%)
+TOLERANCIA = 0.2
+
+# Piora mínima, em ms, para apontar uma regressão: abaixo disso a diferença
+# está dentro do ruído de medição (rotas que respondem em 1-2 ms variam 20% à toa)
+MINIMO_MS = 2.0
+
+# Páginas lidas em cada passada pelo catálogo e músicas por página
+PAGINAS_CATALOGO = 10
+TAMANHO_PAGINA = 100
+
+# Músicas alteradas por PATCH e por lote de /api/batch na carga de escrita
+MUSICAS_POR_LOTE = 100
+REQUISICOES_POR_BATCH = 10
+
+
+def montar_contexto():
+    """Ids reais do banco usados pelos roteiros das cargas"""
+    contexto = {
+        'categorias': list(db.session.scalars(db.select(Categoria.id))),
+        'estilos': list(db.session.scalars(db.select(Estilo.id))),
+        'emissoras': list(db.session.scalars(db.select(Emissora.id))),
+        'vinculos': [tuple(linha) for linha in db.session.execute(
+            db.select(LocutorEmissora.locutor_id, LocutorEmissora.emissora_id)
+        )],
+        'locucoes': db.session.scalar(db.select(func.max(BancoLocucao.id))) or 0,
+        'musicas': db.session.scalar(db.select(func.max(Musica.id))) or 0,
+        'programacoes': list(db.session.scalars(db.select(ProgramacaoGerada.id).limit(1000)))
+    }
+    if not contexto['categorias'] or not contexto['emissoras'] or not contexto['musicas']:
+        raise ValueError('O banco não tem categorias, emissoras e músicas suficientes para o benchmark')
+    return contexto
+
+
+def _musica_aleatoria(rng, contexto):
+    return rng.randint(1, contexto['musicas'])
+
+
+def _catalogo(rng, contexto):
+    """Paginação por cursor do catálogo, com e sem filtros, e consulta de aniversários"""
+    filtro = rng.choice([
+        '',
+        f'&categoria_id={rng.choice(contexto["categorias"])}',
+        f'&categoria_id={rng.choice(contexto["categorias"])}&velocidade={rng.randint(1, 3)}',
+        '&ordenar=nome_musica',
+        '&ordenar=interprete1&ordem=desc'
+    ])
+    cursor = ''
+    for _ in range(PAGINAS_CATALOGO):
+        resposta = yield ('GET', f'/api/musicas?per_page={TAMANHO_PAGINA}&cursor={quote(cursor)}{filtro}', None)
+        cursor = (resposta.get_json(silent=True) or {}).get('next_cursor')
+        if not cursor:
+            break
+    yield ('GET', '/api/musicas?ids=' + ','.join(
+        str(_musica_aleatoria(rng, contexto)) for _ in range(50)
+    ), None)
+    yield ('GET', f'/api/musicas?q={quote(rng.choice(PALAVRAS))}&per_page=20', None)
+    inicio = date(2025, 1, 1) + timedelta(days=rng.randrange(365))
+    yield ('GET', f'/api/musicas/aniversarios?data_inicio={inicio}&data_fim={inicio + timedelta(days=6)}', None)
+
+
+def _autocompletar(rng, contexto):
+    """Rajada de teclas: um pedido a cada letra digitada do intérprete e do nome"""
+    interprete = f'{rng.choice(PALAVRAS).title()} {rng.choice(SOBRENOMES)}'
+    for tamanho in range(2, len(interprete) + 1):
+        yield ('GET', f'/api/musicas/autocomplete/interpretes?q={quote(interprete[:tamanho])}', None)
+    nome = rng.choice(PALAVRAS)
+    for tamanho in range(2, len(nome) + 1):
+        yield ('GET', f'/api/musicas/autocomplete/nomes?q={quote(nome[:tamanho])}', None)
+
+
+def _locucoes(rng, contexto):
+    """Busca de locuções como na montagem de um break"""
+    locutor_id, emissora_id = rng.choice(contexto['vinculos'])
+    yield ('GET', f'/api/banco-locucoes?emissora_id={emissora_id}&velocidade={rng.randint(1, 5)}', None)
+    yield ('GET', f'/api/banco-locucoes?locutor_id={locutor_id}&ativa=true', None)
+    yield ('GET', f'/api/banco-locucoes/emissoras/{emissora_id}/locutores', None)
+    yield ('GET', f'/api/banco-locucoes/interpretes/search?q={quote(rng.choice(PALAVRAS)[:3])}', None)
+    if contexto['locucoes']:
+        yield ('GET', f'/api/banco-locucoes/{rng.randint(1, contexto["locucoes"])}', None)
+
+
+def _cadastros(rng, contexto):
+    """Listagens e detalhes de categorias, estilos, emissoras e locutores"""
+    locutor_id, emissora_id = rng.choice(contexto['vinculos'])
+    yield ('GET', '/api/categorias', None)
+    yield ('GET', '/api/estilos', None)
+    yield ('GET', '/api/emissoras', None)
+    yield ('GET', f'/api/emissoras/{emissora_id}', None)
+    yield ('GET', f'/api/emissoras/{emissora_id}/locutores', None)
+    yield ('GET', f'/api/locutores/{locutor_id}/emissoras', None)
+    yield ('GET', f'/api/locutor-emissora?emissora_id={emissora_id}', None)
+
+
+def _programacao(rng, contexto):
+    """Consulta e exportação das programações geradas"""
+    yield ('GET', f'/api/programacao?emissora_id={rng.choice(contexto["emissoras"])}', None)
+    if contexto['programacoes']:
+        programacao_id = rng.choice(contexto['programacoes'])
+        yield ('GET', f'/api/programacao/{programacao_id}/itens?hora={rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}', None)
+        yield ('GET', f'/api/programacao/{programacao_id}/exportar?formato={rng.choice(["m3u", "csv", "xml"])}', None)
+    yield ('GET', f'/api/programacao/musicas/{_musica_aleatoria(rng, contexto)}', None)
+
+
+def _escrita(rng, contexto):
+    """Criação, alteração e exclusão de músicas, uma a uma e em lote"""
+    resposta = yield ('POST', '/api/musicas', {
+        'interprete1': f'{rng.choice(PALAVRAS).title()} {rng.choice(SOBRENOMES)}',
+        'nome_musica': f'Benchmark {rng.random():.6f}',
+        'ano_lancamento': rng.randint(1960, 2025),
+        'categoria_id': rng.choice(contexto['categorias']),
+        'velocidade': rng.randint(1, 3)
+    })
+    musica_id = (resposta.get_json(silent=True) or {}).get('id')
+    if musica_id:
+        yield ('PUT', f'/api/musicas/{musica_id}', {'velocidade': rng.randint(1, 3)})
+
+    yield ('PATCH', '/api/musicas', {
+        'ids': [_musica_aleatoria(rng, contexto) for _ in range(MUSICAS_POR_LOTE)],
+        'valores': {'velocidade': rng.randint(1, 3)}
+    })
+    yield ('POST', '/api/batch', {'transacao': True, 'requisicoes': [
+        {'metodo': 'PUT', 'caminho': f'/api/musicas/{_musica_aleatoria(rng, contexto)}',
+         'corpo': {'estilo_id': rng.choice(contexto['estilos'])}}
+        for _ in range(REQUISICOES_POR_BATCH)
+    ]})
+
+    if musica_id:
+        yield ('DELETE', f'/api/musicas/{musica_id}', None)
+
+
+def _geracao(rng, contexto):
+    """Geração da programação de um dia de uma emissora (substituindo a existente)"""
+    dia = date.today() + timedelta(days=rng.randint(1, 30))
+    yield ('POST', '/api/programacao/gerar', {
+        'data': dia.isoformat(), 'emissora_id': rng.choice(contexto['emissoras']), 'substituir': True
+    })
+
+
+# Nome -> roteiro; cada roteiro é um gerador de (método, caminho, corpo) que
+# recebe a resposta da requisição anterior (para seguir cursores e ids criados)
+CARGAS = OrderedDict([
+    ('catalogo', _catalogo),
+    ('autocompletar', _autocompletar),
+    ('locucoes', _locucoes),
+    ('cadastros', _cadastros),
+    ('programacao', _programacao),
+    ('escrita', _escrita),
+    ('geracao', _geracao),
+])
+
+
+def percentil(valores, p):
+    """Percentil `p` (0-100) de uma lista ordenada, com interpolação linear"""
+    if not valores:
+        return 0.0
+    posicao = (len(valores) - 1) * p / 100
+    abaixo = int(posicao)
+    acima = min(abaixo + 1, len(valores) - 1)
+    return valores[abaixo] + (valores[acima] - valores[abaixo]) * (posicao - abaixo)
+
+
+def resumir(tempos, erros):
+    """Latências em ms (média e percentis) e vazão em requisições por segundo"""
+    tempos = sorted(tempos)
+    total = sum(tempos)
+    resumo = OrderedDict(requisicoes=len(tempos), erros=erros)
+    resumo['media_ms'] = round(total / len(tempos) * 1000, 3) if tempos else 0.0
+    for p in PERCENTIS:
+        resumo[f'p{p}_ms'] = round(percentil(tempos, p) * 1000, 3)
+    resumo['vazao'] = round(len(tempos) / total, 1) if total else 0.0
+    return resumo
+
+
+def executar_carga(cliente, roteiro, contexto, iteracoes, aquecimento=0, semente=42):
+    """Rodar `aquecimento` + `iteracoes` passadas do roteiro pelo cliente de teste
+
+    Só as passadas depois do aquecimento são medidas. O tempo de cada
+    requisição inclui a leitura do corpo inteiro (exportações em streaming).
+    Retorna (resumo, primeiro erro ou None).
+    """
+    rng = random.Random(semente)
+    tempos = []
+    erros = 0
+    primeiro_erro = None
+    for passada in range(aquecimento + iteracoes):
+        medir = passada >= aquecimento
+        passos = roteiro(rng, contexto)
+        resposta = None
+        while True:
+            try:
+                metodo, caminho, corpo = passos.send(resposta)
+            except StopIteration:
+                break
+            inicio = time.perf_counter()
+            resposta = cliente.open(caminho, method=metodo, json=corpo)
+            resposta.get_data()
+            resposta.close()
+            duracao = time.perf_counter() - inicio
+            if medir:
+                tempos.append(duracao)
+                if resposta.status_code >= 400:
+                    erros += 1
+                    if primeiro_erro is None:
+                        primeiro_erro = f'{metodo} {caminho} -> {resposta.status_code}: {resposta.get_data(as_text=True)[:200]}'
+    return resumir(tempos, erros), primeiro_erro
+
+
+def comparar(resultados, base, tolerancia=TOLERANCIA, minimo_ms=MINIMO_MS):
+    """Regressões em relação à base: [(carga, métrica, valor da base, valor atual, variação)]
+
+    Latências acima de (1 + tolerancia) vezes a base e vazão abaixo de
+    (1 - tolerancia) vezes a base são regressões, desde que a piora passe de
+    `minimo_ms` (na vazão, a diferença do tempo médio por requisição). Cargas
+    ausentes em um dos lados são ignoradas.
+    """
+    regressoes = []
+    for nome, atual in resultados.items():
+        anterior = base.get(nome)
+        if not anterior:
+            continue
+        for metrica in [f'p{p}_ms' for p in PERCENTIS]:
+            if (anterior.get(metrica) and atual[metrica] > anterior[metrica] * (1 + tolerancia)
+                    and atual[metrica] - anterior[metrica] >= minimo_ms):
+                regressoes.append((nome, metrica, anterior[metrica], atual[metrica],
+                                   atual[metrica] / anterior[metrica] - 1))
+        if (anterior.get('vazao') and atual['vazao'] < anterior['vazao'] * (1 - tolerancia)
+                and (not atual['vazao'] or 1000 / atual['vazao'] - 1000 / anterior['vazao'] >= minimo_ms)):
+            regressoes.append((nome, 'vazao', anterior['vazao'], atual['vazao'], atual['vazao'] / anterior['vazao'] - 1))
+    return regressoes
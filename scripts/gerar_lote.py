@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Script para gerar em lote a programação de várias emissoras e dias
+Sistema de Programação Musical
+
+Exemplo:
+    python scripts/gerar_lote.py --inicio 2025-01-06 --dias 7 --processos 8
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import create_app
+from src.services.lote import gerar_lote
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gerar programação em lote (emissoras x dias)')
+    parser.add_argument('--inicio', help='Data inicial (YYYY-MM-DD, padrão: amanhã)')
+    parser.add_argument('--dias', type=int, default=7, help='Quantidade de dias (padrão: 7)')
+    parser.add_argument('--emissoras', help='IDs das emissoras separados por vírgula (padrão: todas as ativas)')
+    parser.add_argument('--processos', type=int, help='Processos do pool (padrão: número de núcleos)')
+    parser.add_argument('--substituir', action='store_true', help='Substituir programações já geradas')
+    parser.add_argument('--separacao-musica', type=int, help='Minutos entre execuções da mesma música')
+    parser.add_argument('--separacao-interprete', type=int, help='Minutos entre execuções do mesmo intérprete')
+    parser.add_argument('--priorizar-aniversarios', action='store_true',
+                        help='Tocar antes as músicas de intérpretes que fazem aniversário no dia')
+    args = parser.parse_args()
+
+    if args.inicio:
+        data_inicio = datetime.strptime(args.inicio, '%Y-%m-%d').date()
+    else:
+        data_inicio = date.today() + timedelta(days=1)
+    emissora_ids = [int(i) for i in args.emissoras.split(',')] if args.emissoras else None
+
+    opcoes = {}
+    if args.separacao_musica is not None:
+        opcoes['separacao_musica'] = args.separacao_musica
+    if args.separacao_interprete is not None:
+        opcoes['separacao_interprete'] = args.separacao_interprete
+
+    app = create_app()
+    with app.app_context():
+        resultado = gerar_lote(
+            data_inicio,
+            dias=args.dias,
+            emissora_ids=emissora_ids,
+            processos=args.processos,
+            substituir=args.substituir,
+            priorizar_aniversarios=args.priorizar_aniversarios,
+            **opcoes
+        )
+
+    print(f"- {resultado['geradas']} programações geradas ({resultado['processos']} processos)")
+    if resultado['ignoradas']:
+        print(f"- {len(resultado['ignoradas'])} já existentes ignoradas (use --substituir)")
+    if resultado['sem_grade']:
+        print(f"- Datas sem grade ativa: {', '.join(resultado['sem_grade'])}")
+
+
+if __name__ == '__main__':
+    main()
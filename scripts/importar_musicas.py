@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Script para importar o catálogo de músicas em lote (CSV ou JSON Lines)
+Sistema de Programação Musical
+
+Exemplo:
+    python scripts/importar_musicas.py catalogo.csv
+    python scripts/importar_musicas.py catalogo.jsonl --lote 5000
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import create_app
+from src.services.importacao import LEITORES, TAMANHO_LOTE, importar_arquivo
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Importar músicas em lote')
+    parser.add_argument('arquivo', help='Arquivo CSV (com cabeçalho) ou JSON Lines')
+    parser.add_argument('--formato', choices=sorted(LEITORES), help='Formato do arquivo (padrão: pela extensão)')
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help=f'Linhas por lote (padrão: {TAMANHO_LOTE})')
+    args = parser.parse_args()
+
+    formato = args.formato
+    if not formato:
+        extensao = os.path.splitext(args.arquivo)[1].lower()
+        formato = 'csv' if extensao == '.csv' else 'jsonl' if extensao in ('.jsonl', '.ndjson') else None
+    if not formato:
+        parser.error('Não foi possível identificar o formato pela extensão (use --formato)')
+
+    app = create_app()
+    with app.app_context(), open(args.arquivo, encoding='utf-8-sig', newline='') as arquivo:
+        resultado = importar_arquivo(arquivo, formato, tamanho_lote=args.lote)
+
+    print(f"- {resultado['importadas']} de {resultado['total']} músicas importadas")
+    if resultado['total_erros']:
+        print(f"- {resultado['total_erros']} linhas com erro:")
+        for erro in resultado['erros']:
+            print(f"  linha {erro['linha']}: {erro['erro']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Script para criar ou atualizar o esquema do banco de dados
+Sistema de Programação Musical
+
+Roda as migrações pendentes uma única vez, antes de iniciar os workers.
+
+Exemplo:
+    FLASK_CONFIG=production DATABASE_URL=sqlite:////srv/gprog/app.db python scripts/migrar_banco.py
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import create_app
+from src.services.esquema import VERSAO_ESQUEMA, migrar_esquema, versao_banco
+from src.services.perfil_sqlite import compactar_banco
+from src.models.programacao import db
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aplicar as migrações pendentes do banco de dados')
+    parser.add_argument('--config', help='Configuração de config.py (padrão: FLASK_CONFIG ou development)')
+    parser.add_argument('--vacuum', action='store_true',
+                        help='VACUUM completo do SQLite (ativa o vacuum incremental em bancos antigos; bloqueia o banco)')
+    args = parser.parse_args()
+
+    app = create_app(args.config, verificar=False)
+    with app.app_context():
+        aplicadas = migrar_esquema()
+        with db.engine.connect() as conexao:
+            versao = versao_banco(conexao)
+        compactado = args.vacuum and compactar_banco(db.engine)
+
+    if aplicadas:
+        print(f"- Migrações aplicadas: {', '.join(str(v) for v in aplicadas)}")
+    else:
+        print('- Nenhuma migração pendente')
+    print(f'- Banco na versão {versao} do esquema (aplicação: {VERSAO_ESQUEMA})')
+    if compactado:
+        print('- Banco compactado (VACUUM)')
+
+
+if __name__ == '__main__':
+    main()
@@ -5,8 +5,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from flask import Flask, send_from_directory
 from flask_cors import CORS
-from src.models.user import db
-from src.models.programacao import *
+from sqlalchemy.engine import make_url
+from config import config
+from src.models.programacao import db
 from src.routes.user import user_bp
 from src.routes.categorias import categorias_bp
 from src.routes.estilos import estilos_bp
@@ -15,45 +16,76 @@ from src.routes.locutores import locutores_bp
 from src.routes.emissoras import emissoras_bp
 from src.routes.locutor_emissora import locutor_emissora_bp
 from src.routes.banco_locucoes import banco_locucoes_bp
+from src.routes.programacao import programacao_bp
+from src.routes.batch import batch_bp
+from src.services.esquema import verificar_esquema
+from src.services.perfil_sqlite import configurar_sqlite, iniciar_manutencao
+from src.services.metricas import configurar_metricas
+from src.services.respostas import configurar_respostas
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-
-# Habilitar CORS para permitir requisições do frontend
-CORS(app)
-
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(categorias_bp, url_prefix='/api')
-app.register_blueprint(estilos_bp, url_prefix='/api')
-app.register_blueprint(musicas_bp, url_prefix='/api')
-app.register_blueprint(locutores_bp, url_prefix='/api')
-app.register_blueprint(emissoras_bp, url_prefix='/api')
-app.register_blueprint(locutor_emissora_bp, url_prefix='/api')
-app.register_blueprint(banco_locucoes_bp, url_prefix='/api')
-
-# uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-with app.app_context():
-    db.create_all()
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
+
+def create_app(config_name=None, verificar=True):
+    """Criar a aplicação com a configuração `config_name` de config.py
+
+    Sem nome, usa a variável de ambiente FLASK_CONFIG (padrão: development).
+    Com `verificar`, confere a versão do esquema do banco; as migrações só
+    rodam aqui quando a configuração tem MIGRAR_AUTOMATICAMENTE.
+    """
+    config_name = config_name or os.environ.get('FLASK_CONFIG', 'default')
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config.from_object(config[config_name])
+
+    # Habilitar CORS para permitir requisições do frontend
+    CORS(app, origins=app.config['CORS_ORIGINS'])
+
+    # Tempo, SQL e tamanho de cada requisição, publicados em /metrics (antes da
+    # compressão: os after_request rodam na ordem inversa e medem o corpo comprimido)
+    configurar_metricas(app)
+
+    # JSON com orjson (quando instalado) e compressão gzip/br negociada por resposta
+    configurar_respostas(app)
+
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(categorias_bp, url_prefix='/api')
+    app.register_blueprint(estilos_bp, url_prefix='/api')
+    app.register_blueprint(musicas_bp, url_prefix='/api')
+    app.register_blueprint(locutores_bp, url_prefix='/api')
+    app.register_blueprint(emissoras_bp, url_prefix='/api')
+    app.register_blueprint(locutor_emissora_bp, url_prefix='/api')
+    app.register_blueprint(banco_locucoes_bp, url_prefix='/api')
+    app.register_blueprint(programacao_bp, url_prefix='/api')
+    app.register_blueprint(batch_bp, url_prefix='/api')
+
+    # Diretório do arquivo SQLite (src/database não vem no repositório)
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+        os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+
+    db.init_app(app)
+    configurar_sqlite(app)
+    if verificar:
+        verificar_esquema(app, migrar=app.config['MIGRAR_AUTOMATICAMENTE'])
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        static_folder_path = app.static_folder
+        if static_folder_path is None:
+                return "Static folder not configured", 404
+
+        if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
+            return send_from_directory(static_folder_path, path)
         else:
-            return "index.html not found", 404
+            index_path = os.path.join(static_folder_path, 'index.html')
+            if os.path.exists(index_path):
+                return send_from_directory(static_folder_path, 'index.html')
+            else:
+                return "index.html not found", 404
+
+    return app
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app = create_app()
+    iniciar_manutencao(app)
+    app.run(host='0.0.0.0', port=5000, debug=app.config['DEBUG'])
@@ -4,6 +4,12 @@ import json
 
 db = SQLAlchemy()
 
+def _formatar_segundos(segundos):
+    horas, resto = divmod(int(segundos or 0), 3600)
+    minutos, segs = divmod(resto, 60)
+    return f'{horas:02d}:{minutos:02d}:{segs:02d}'
+
+
 class Categoria(db.Model):
     __tablename__ = 'categorias'
     
@@ -62,11 +68,23 @@ class Musica(db.Model):
     data_aniversario_interprete2 = db.Column(db.Date)
     data_aniversario_interprete3 = db.Column(db.Date)
     duracao_padrao = db.Column(db.Time, default=time(0, 3, 30))  # 3:30 padrão
+    arquivo_audio = db.Column(db.String(500))  # Caminho do arquivo de áudio (exportação para automação)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
+    # Filtros da listagem, catálogo do gerador (categoria_id IN ...) e ordenações do cursor
+    __table_args__ = (
+        db.Index('idx_musicas_estilo', 'estilo_id'),
+        db.Index('idx_musicas_velocidade', 'velocidade'),
+        db.Index('idx_musicas_ano', 'ano_lancamento'),
+        db.Index('idx_musicas_categoria_velocidade', 'categoria_id', 'velocidade'),
+        db.Index('idx_musicas_nome', 'nome_musica'),
+        db.Index('idx_musicas_interprete1', 'interprete1'),
+    )
+    
+    def to_dict(self, expand=None):
+        """Dicionário da música; `expand` limita os relacionamentos incluídos (None = todos)"""
+        dados = {
             'id': self.id,
             'interprete1': self.interprete1,
             'interprete2': self.interprete2,
@@ -74,19 +92,23 @@ class Musica(db.Model):
             'nome_musica': self.nome_musica,
             'tipo': self.tipo,
             'categoria_id': self.categoria_id,
-            'categoria': self.categoria.to_dict() if self.categoria else None,
             'velocidade': self.velocidade,
             'estilo_id': self.estilo_id,
-            'estilo': self.estilo.to_dict() if self.estilo else None,
             'ano_lancamento': self.ano_lancamento,
             'complemento': self.complemento,
             'data_aniversario_interprete1': self.data_aniversario_interprete1.isoformat() if self.data_aniversario_interprete1 else None,
             'data_aniversario_interprete2': self.data_aniversario_interprete2.isoformat() if self.data_aniversario_interprete2 else None,
             'data_aniversario_interprete3': self.data_aniversario_interprete3.isoformat() if self.data_aniversario_interprete3 else None,
             'duracao_padrao': self.duracao_padrao.strftime('%H:%M:%S') if self.duracao_padrao else None,
+            'arquivo_audio': self.arquivo_audio,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+        if expand is None or 'categoria' in expand:
+            dados['categoria'] = self.categoria.to_dict() if self.categoria else None
+        if expand is None or 'estilo' in expand:
+            dados['estilo'] = self.estilo.to_dict() if self.estilo else None
+        return dados
 
 class GradeProgramacao(db.Model):
     __tablename__ = 'grades_programacao'
@@ -144,6 +166,8 @@ class GradeSequenciaCategoria(db.Model):
     # Relacionamentos
     categoria = db.relationship('Categoria', backref='grade_sequencias')
     
+    __table_args__ = (db.Index('idx_grade_sequencia_grade', 'grade_id'),)
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -165,6 +189,11 @@ class HorarioIntervalo(db.Model):
     ordem = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('idx_horarios_grade', 'grade_id'),
+        db.Index('idx_horarios_hora', 'hora'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -308,28 +337,124 @@ class NomeMusica(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class AniversarioInterprete(db.Model):
+    """Aniversários dos intérpretes das músicas por mês/dia (mantido a partir de musicas)"""
+    __tablename__ = 'aniversarios_interpretes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    musica_id = db.Column(db.Integer, db.ForeignKey('musicas.id', ondelete='CASCADE'), nullable=False)
+    posicao = db.Column(db.Integer, nullable=False)  # 1, 2 ou 3 (interprete1, interprete2, interprete3)
+    interprete = db.Column(db.String(255))
+    data_aniversario = db.Column(db.Date, nullable=False)
+    mes_dia = db.Column(db.Integer, nullable=False)  # MMDD, ex.: 1225 para 25 de dezembro
+
+    # Busca por dia ou faixa de dias (já com a música) e limpeza por música
+    __table_args__ = (
+        db.Index('idx_aniversarios_mes_dia', 'mes_dia', 'musica_id'),
+        db.Index('idx_aniversarios_musica', 'musica_id'),
+    )
+
+    def to_dict(self):
+        return {
+            'musica_id': self.musica_id,
+            'posicao': self.posicao,
+            'interprete': self.interprete,
+            'data_aniversario': self.data_aniversario.isoformat() if self.data_aniversario else None
+        }
+
 class ProgramacaoGerada(db.Model):
     __tablename__ = 'programacao_gerada'
     
     id = db.Column(db.Integer, primary_key=True)
     data_programacao = db.Column(db.Date, nullable=False)
     grade_id = db.Column(db.Integer, db.ForeignKey('grades_programacao.id'))
-    conteudo_json = db.Column(db.Text)
+    emissora_id = db.Column(db.Integer, db.ForeignKey('emissoras.id'))
+    conteudo_json = db.Column(db.Text)  # Estrutura dos blocos; os itens ficam em programacao_itens
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relacionamentos
     grade = db.relationship('GradeProgramacao', backref='programacoes_geradas')
+    emissora = db.relationship('Emissora', backref='programacoes_geradas')
     
-    def to_dict(self):
-        return {
+    # Listagem por data e histórico recente de uma emissora
+    __table_args__ = (
+        db.Index('idx_programacao_data', 'data_programacao'),
+        db.Index('idx_programacao_emissora_data', 'emissora_id', 'data_programacao'),
+    )
+    
+    def conteudo(self):
+        """Montar o conteúdo completo (blocos e itens) a partir da tabela de itens"""
+        if not self.conteudo_json:
+            return None
+        conteudo = json.loads(self.conteudo_json)
+        blocos = conteudo.get('blocos', [])
+        if any('itens' in bloco for bloco in blocos):
+            return conteudo  # Formato antigo, com os itens dentro do JSON
+        
+        itens_por_bloco = {bloco['indice']: [] for bloco in blocos}
+        for bloco in blocos:
+            bloco['itens'] = itens_por_bloco[bloco['indice']]
+        
+        rows = db.session.query(
+            ProgramacaoItem, Musica.interprete1, Musica.interprete2, Musica.interprete3, Musica.nome_musica
+        ).outerjoin(Musica, Musica.id == ProgramacaoItem.musica_id).filter(
+            ProgramacaoItem.programacao_id == self.id
+        ).order_by(ProgramacaoItem.bloco, ProgramacaoItem.ordem)
+        for item, interprete1, interprete2, interprete3, nome_musica in rows:
+            dados = item.to_dict()
+            if item.musica_id:
+                dados['interprete'] = ' / '.join(nome for nome in (interprete1, interprete2, interprete3) if nome)
+                dados['nome_musica'] = nome_musica
+            itens_por_bloco.setdefault(item.bloco, []).append(dados)
+        return conteudo
+    
+    def to_dict(self, incluir_conteudo=True):
+        dados = {
             'id': self.id,
             'data_programacao': self.data_programacao.isoformat() if self.data_programacao else None,
             'grade_id': self.grade_id,
-            'grade': self.grade.to_dict() if self.grade else None,
-            'conteudo_json': json.loads(self.conteudo_json) if self.conteudo_json else None,
+            'grade': {'id': self.grade.id, 'nome': self.grade.nome} if self.grade else None,
+            'emissora_id': self.emissora_id,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+        if incluir_conteudo:
+            dados['conteudo_json'] = self.conteudo()
+        return dados
 
+class ProgramacaoItem(db.Model):
+    __tablename__ = 'programacao_itens'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    programacao_id = db.Column(db.Integer, db.ForeignKey('programacao_gerada.id', ondelete='CASCADE'), nullable=False)
+    bloco = db.Column(db.Integer, nullable=False)  # Índice do bloco no dia
+    ordem = db.Column(db.Integer, nullable=False)  # Ordem dentro do bloco
+    hora = db.Column(db.Integer, nullable=False)  # Segundos desde 00:00 (o último item pode passar de 24h)
+    tipo = db.Column(db.String(20), nullable=False)  # musica, comercial, vinheta, trilha
+    musica_id = db.Column(db.Integer, db.ForeignKey('musicas.id', ondelete='SET NULL'))
+    categoria_id = db.Column(db.Integer, db.ForeignKey('categorias.id', ondelete='SET NULL'))
+    referencia_id = db.Column(db.Integer)  # ID em vinhetas/trilhas/comerciais, conforme o tipo
+    duracao = db.Column(db.Integer, nullable=False)  # Segundos
+    posicao = db.Column(db.Integer)  # Posição na sequência de categorias da grade
+    
+    __table_args__ = (
+        db.Index('idx_programacao_itens_hora', 'programacao_id', 'hora'),
+        db.Index('idx_programacao_itens_musica', 'musica_id'),
+    )
+    
+    def to_dict(self):
+        dados = {
+            'hora': _formatar_segundos(self.hora),
+            'tipo': self.tipo,
+            'duracao': _formatar_segundos(self.duracao)
+        }
+        if self.musica_id:
+            dados['musica_id'] = self.musica_id
+            dados['categoria_id'] = self.categoria_id
+        if self.posicao is not None:
+            dados['posicao'] = self.posicao
+        if self.referencia_id:
+            dados['referencia_id'] = self.referencia_id
+        return dados
 
 
 class Locutor(db.Model):
@@ -400,16 +525,19 @@ class LocutorEmissora(db.Model):
     locutor = db.relationship('Locutor', backref='emissoras_associadas')
     emissora = db.relationship('Emissora', backref='locutores_associados')
     
-    # Índice único para evitar duplicatas
-    __table_args__ = (db.UniqueConstraint('locutor_id', 'emissora_id', name='unique_locutor_emissora'),)
+    # Índice único para evitar duplicatas (também atende as buscas por locutor);
+    # as buscas por emissora usam o seu próprio índice
+    __table_args__ = (
+        db.UniqueConstraint('locutor_id', 'emissora_id', name='unique_locutor_emissora'),
+        db.Index('idx_locutor_emissora_emissora', 'emissora_id'),
+    )
     
-    def to_dict(self):
-        return {
+    def to_dict(self, expand=None):
+        """Dicionário do relacionamento; `expand` limita os relacionamentos incluídos (None = todos)"""
+        dados = {
             'id': self.id,
             'locutor_id': self.locutor_id,
-            'locutor': self.locutor.to_dict() if self.locutor else None,
             'emissora_id': self.emissora_id,
-            'emissora': self.emissora.to_dict() if self.emissora else None,
             'ativo': self.ativo,
             'data_inicio': self.data_inicio.isoformat() if self.data_inicio else None,
             'data_fim': self.data_fim.isoformat() if self.data_fim else None,
@@ -417,6 +545,11 @@ class LocutorEmissora(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+        if expand is None or 'locutor' in expand:
+            dados['locutor'] = self.locutor.to_dict() if self.locutor else None
+        if expand is None or 'emissora' in expand:
+            dados['emissora'] = self.emissora.to_dict() if self.emissora else None
+        return dados
 
 
 class BancoLocucao(db.Model):
@@ -438,18 +571,21 @@ class BancoLocucao(db.Model):
     emissora = db.relationship('Emissora', backref='banco_locucoes')
     locutor = db.relationship('Locutor', backref='banco_locucoes')
     
-    # Validação para velocidade
+    # Validação para velocidade e índices dos filtros da listagem (emissora com
+    # ou sem velocidade, locutor) e da ordenação por data de criação
     __table_args__ = (
         db.CheckConstraint('velocidade >= 1 AND velocidade <= 5', name='check_velocidade_range'),
+        db.Index('idx_banco_locucoes_emissora_velocidade', 'emissora_id', 'velocidade'),
+        db.Index('idx_banco_locucoes_locutor', 'locutor_id'),
+        db.Index('idx_banco_locucoes_created', 'created_at'),
     )
     
-    def to_dict(self):
-        return {
+    def to_dict(self, expand=None):
+        """Dicionário da locução; `expand` limita os relacionamentos incluídos (None = todos)"""
+        dados = {
             'id': self.id,
             'emissora_id': self.emissora_id,
-            'emissora': self.emissora.to_dict() if self.emissora else None,
             'locutor_id': self.locutor_id,
-            'locutor': self.locutor.to_dict() if self.locutor else None,
             'interprete': self.interprete,
             'velocidade': self.velocidade,
             'texto_locucao': self.texto_locucao,
@@ -459,4 +595,39 @@ class BancoLocucao(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+        if expand is None or 'emissora' in expand:
+            dados['emissora'] = self.emissora.to_dict() if self.emissora else None
+        if expand is None or 'locutor' in expand:
+            dados['locutor'] = self.locutor.to_dict() if self.locutor else None
+        return dados
 
+
+
+class VersaoTabela(db.Model):
+    __tablename__ = 'versoes_tabelas'
+    
+    tabela = db.Column(db.String(100), primary_key=True)
+    versao = db.Column(db.Integer, nullable=False, default=0)  # Incrementada a cada alteração na tabela
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'tabela': self.tabela,
+            'versao': self.versao,
+            'atualizado_em': self.atualizado_em.isoformat() if self.atualizado_em else None
+        }
+
+
+class VersaoEsquema(db.Model):
+    __tablename__ = 'versao_esquema'
+    
+    versao = db.Column(db.Integer, primary_key=True)  # Uma linha por migração aplicada
+    descricao = db.Column(db.String(255))
+    aplicada_em = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'versao': self.versao,
+            'descricao': self.descricao,
+            'aplicada_em': self.aplicada_em.isoformat() if self.aplicada_em else None
+        }
@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
-from src.models.programacao import db, BancoLocucao, Emissora, Locutor, LocutorEmissora, Musica
-from sqlalchemy import distinct
+from src.models.programacao import db, BancoLocucao, LocutorEmissora
+from src.services.busca import padrao_contem
+from src.services.interpretes import INTERPRETES
+from src.services.referencias import REFERENCIAS
+from src.services.serializacao import Serializador
+from src.services.versoes import get_condicional
 
 banco_locucoes_bp = Blueprint('banco_locucoes', __name__)
 
@@ -14,7 +18,12 @@ def get_banco_locucoes():
         velocidade = request.args.get('velocidade', type=int)
         interprete = request.args.get('interprete')
         
-        query = BancoLocucao.query
+        try:
+            serializador = Serializador.da_requisicao(BancoLocucao, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = serializador.carregar(BancoLocucao.query)
         
         if ativa is not None:
             query = query.filter_by(ativa=ativa.lower() == 'true')
@@ -25,10 +34,10 @@ def get_banco_locucoes():
         if velocidade:
             query = query.filter_by(velocidade=velocidade)
         if interprete:
-            query = query.filter(BancoLocucao.interprete.ilike(f'%{interprete}%'))
+            query = query.filter(BancoLocucao.interprete.ilike(padrao_contem(interprete), escape='\\'))
         
         locucoes = query.order_by(BancoLocucao.created_at.desc()).all()
-        return jsonify([locucao.to_dict() for locucao in locucoes]), 200
+        return jsonify(serializador.lista(locucoes)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -54,13 +63,11 @@ def create_banco_locucao():
                 return jsonify({'error': f'Campo {field} é obrigatório'}), 400
         
         # Verificar se a emissora existe
-        emissora = Emissora.query.get(data['emissora_id'])
-        if not emissora:
+        if not REFERENCIAS['emissoras'].existe(data['emissora_id']):
             return jsonify({'error': 'Emissora não encontrada'}), 404
         
         # Verificar se o locutor existe
-        locutor = Locutor.query.get(data['locutor_id'])
-        if not locutor:
+        if not REFERENCIAS['locutores'].existe(data['locutor_id']):
             return jsonify({'error': 'Locutor não encontrado'}), 404
         
         # Verificar se o locutor está associado à emissora
@@ -105,14 +112,12 @@ def update_banco_locucao(locucao_id):
         
         # Verificar se a emissora existe (se fornecida)
         if data.get('emissora_id'):
-            emissora = Emissora.query.get(data['emissora_id'])
-            if not emissora:
+            if not REFERENCIAS['emissoras'].existe(data['emissora_id']):
                 return jsonify({'error': 'Emissora não encontrada'}), 404
         
         # Verificar se o locutor existe (se fornecido)
         if data.get('locutor_id'):
-            locutor = Locutor.query.get(data['locutor_id'])
-            if not locutor:
+            if not REFERENCIAS['locutores'].existe(data['locutor_id']):
                 return jsonify({'error': 'Locutor não encontrado'}), 404
         
         # Validar velocidade (se fornecida)
@@ -152,58 +157,49 @@ def delete_banco_locucao(locucao_id):
 
 # Rotas auxiliares para facilitar a criação de locuções
 @banco_locucoes_bp.route('/banco-locucoes/emissoras', methods=['GET'])
+@get_condicional('emissoras')
 def get_emissoras_para_locucao():
     """Listar emissoras disponíveis para locução"""
     try:
-        emissoras = Emissora.query.filter_by(ativa=True).order_by(Emissora.codigo).all()
-        return jsonify([emissora.to_dict() for emissora in emissoras]), 200
+        emissoras = [emissora for emissora in REFERENCIAS['emissoras'].listar() if emissora['ativa']]
+        return jsonify(sorted(emissoras, key=lambda emissora: emissora['codigo'])), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @banco_locucoes_bp.route('/banco-locucoes/emissoras/<int:emissora_id>/locutores', methods=['GET'])
+@get_condicional('locutor_emissora', 'locutores')
 def get_locutores_da_emissora_para_locucao(emissora_id):
     """Listar locutores disponíveis de uma emissora para locução"""
     try:
         # Buscar locutores ativos associados à emissora
-        relacionamentos = LocutorEmissora.query.filter_by(
+        locutor_ids = db.session.query(LocutorEmissora.locutor_id).filter_by(
             emissora_id=emissora_id,
             ativo=True
-        ).all()
+        )
         
+        # Dados dos locutores vêm do cache de referências, sem uma consulta por locutor
         locutores = []
-        for rel in relacionamentos:
-            if rel.locutor and rel.locutor.ativo:
-                locutores.append(rel.locutor.to_dict())
+        for (locutor_id,) in locutor_ids:
+            locutor = REFERENCIAS['locutores'].obter(locutor_id)
+            if locutor and locutor['ativo']:
+                locutores.append(locutor)
         
         return jsonify(locutores), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @banco_locucoes_bp.route('/banco-locucoes/interpretes', methods=['GET'])
+@get_condicional('musicas')
 def get_interpretes_para_locucao():
     """Listar intérpretes disponíveis para locução (em ordem alfabética)"""
     try:
-        # Buscar todos os intérpretes únicos do banco de músicas
-        interpretes_query = db.session.query(distinct(Musica.interprete1)).filter(
-            Musica.interprete1.isnot(None)
-        ).union(
-            db.session.query(distinct(Musica.interprete2)).filter(
-                Musica.interprete2.isnot(None)
-            )
-        ).union(
-            db.session.query(distinct(Musica.interprete3)).filter(
-                Musica.interprete3.isnot(None)
-            )
-        ).order_by(Musica.interprete1)
-        
-        interpretes = [row[0] for row in interpretes_query.all() if row[0]]
-        interpretes.sort()  # Ordenar alfabeticamente
-        
-        return jsonify(interpretes), 200
+        # Conjunto materializado dos intérpretes do catálogo, já ordenado
+        return jsonify(INTERPRETES.listar()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @banco_locucoes_bp.route('/banco-locucoes/interpretes/search', methods=['GET'])
+@get_condicional('musicas')
 def search_interpretes_para_locucao():
     """Buscar intérpretes por nome para locução"""
     try:
@@ -211,27 +207,13 @@ def search_interpretes_para_locucao():
         if len(query) < 2:
             return jsonify([]), 200
         
-        # Buscar intérpretes que contenham o termo de busca
-        interpretes_query = db.session.query(distinct(Musica.interprete1)).filter(
-            Musica.interprete1.ilike(f'%{query}%')
-        ).union(
-            db.session.query(distinct(Musica.interprete2)).filter(
-                Musica.interprete2.ilike(f'%{query}%')
-            )
-        ).union(
-            db.session.query(distinct(Musica.interprete3)).filter(
-                Musica.interprete3.ilike(f'%{query}%')
-            )
-        )
-        
-        interpretes = [row[0] for row in interpretes_query.all() if row[0]]
-        interpretes.sort()  # Ordenar alfabeticamente
-        
-        return jsonify(interpretes[:20]), 200  # Limitar a 20 resultados
+        # Busca por prefixo de qualquer palavra do nome, sem acentos
+        return jsonify(INTERPRETES.buscar(query, limite=20)), 200  # Limitar a 20 resultados
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @banco_locucoes_bp.route('/banco-locucoes/velocidades', methods=['GET'])
+@get_condicional()
 def get_velocidades_disponiveis():
     """Listar velocidades disponíveis (1-5)"""
     try:
@@ -0,0 +1,27 @@
+from flask import Blueprint, request, jsonify, current_app
+from src.services.requisicoes import executar_requisicoes, validar_requisicoes
+
+batch_bp = Blueprint('batch', __name__)
+
+@batch_bp.route('/batch', methods=['POST'])
+def executar_batch():
+    """Executar várias requisições da API em uma chamada, opcionalmente em uma transação"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        try:
+            requisicoes = validar_requisicoes(data.get('requisicoes'), request.path)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        transacao = bool(data.get('transacao', False))
+        respostas, confirmada = executar_requisicoes(
+            current_app._get_current_object(), requisicoes, transacao
+        )
+        
+        resultado = {'respostas': respostas}
+        if transacao:
+            resultado['confirmada'] = confirmada
+        return jsonify(resultado), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,14 +1,16 @@
 from flask import Blueprint, request, jsonify
-from src.models.programacao import db, Categoria
+from src.models.programacao import db, Categoria, ProgramacaoItem
+from src.services.referencias import REFERENCIAS
+from src.services.versoes import get_condicional
 
 categorias_bp = Blueprint('categorias', __name__)
 
 @categorias_bp.route('/categorias', methods=['GET'])
+@get_condicional('categorias')
 def get_categorias():
     """Listar todas as categorias"""
     try:
-        categorias = Categoria.query.all()
-        return jsonify([categoria.to_dict() for categoria in categorias]), 200
+        return jsonify(REFERENCIAS['categorias'].listar()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -82,6 +84,15 @@ def delete_categoria(categoria_id):
         if categoria.musicas:
             return jsonify({'error': 'Não é possível deletar categoria com músicas associadas'}), 400
         
+        # Verificar se há grades que usam a categoria
+        if categoria.grade_sequencias:
+            return jsonify({'error': 'Não é possível deletar categoria usada em grades de programação'}), 400
+        
+        # Itens de programações já geradas mantêm a música, sem a categoria
+        ProgramacaoItem.query.filter_by(categoria_id=categoria_id).update(
+            {'categoria_id': None}, synchronize_session=False
+        )
+        
         db.session.delete(categoria)
         db.session.commit()
         
@@ -1,9 +1,12 @@
 from flask import Blueprint, request, jsonify
-from src.models.programacao import db, Emissora
+from src.models.programacao import db, Emissora, ProgramacaoGerada, BancoLocucao
+from src.services.referencias import REFERENCIAS
+from src.services.versoes import get_condicional
 
 emissoras_bp = Blueprint('emissoras', __name__)
 
 @emissoras_bp.route('/emissoras', methods=['GET'])
+@get_condicional('emissoras')
 def get_emissoras():
     """Listar todas as emissoras"""
     try:
@@ -11,17 +14,17 @@ def get_emissoras():
         cidade = request.args.get('cidade')
         estado = request.args.get('estado')
         
-        query = Emissora.query
+        # Filtros aplicados sobre o cache de referências, sem consultar o banco
+        emissoras = REFERENCIAS['emissoras'].listar()
         
         if ativa is not None:
-            query = query.filter_by(ativa=ativa.lower() == 'true')
+            emissoras = [e for e in emissoras if e['ativa'] == (ativa.lower() == 'true')]
         if cidade:
-            query = query.filter(Emissora.cidade.ilike(f'%{cidade}%'))
+            emissoras = [e for e in emissoras if cidade.lower() in (e['cidade'] or '').lower()]
         if estado:
-            query = query.filter_by(estado=estado.upper())
+            emissoras = [e for e in emissoras if e['estado'] == estado.upper()]
         
-        emissoras = query.order_by(Emissora.codigo).all()
-        return jsonify([emissora.to_dict() for emissora in emissoras]), 200
+        return jsonify(sorted(emissoras, key=lambda emissora: emissora['codigo'])), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -103,6 +106,12 @@ def delete_emissora(emissora_id):
         if emissora.locutores_associados:
             return jsonify({'error': 'Não é possível deletar emissora com locutores associados'}), 400
         
+        # Verificar se há locuções ou programações da emissora
+        if BancoLocucao.query.filter_by(emissora_id=emissora_id).first():
+            return jsonify({'error': 'Não é possível deletar emissora com locuções cadastradas'}), 400
+        if ProgramacaoGerada.query.filter_by(emissora_id=emissora_id).first():
+            return jsonify({'error': 'Não é possível deletar emissora com programações geradas'}), 400
+        
         db.session.delete(emissora)
         db.session.commit()
         
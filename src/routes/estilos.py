@@ -1,14 +1,17 @@
 from flask import Blueprint, request, jsonify
 from src.models.programacao import db, Estilo
+from src.services.referencias import REFERENCIAS
+from src.services.versoes import get_condicional
 
 estilos_bp = Blueprint('estilos', __name__)
 
 @estilos_bp.route('/estilos', methods=['GET'])
+@get_condicional('estilos')
 def get_estilos():
     """Listar todos os estilos"""
     try:
-        estilos = Estilo.query.order_by(Estilo.nome).all()
-        return jsonify([estilo.to_dict() for estilo in estilos]), 200
+        estilos = REFERENCIAS['estilos'].listar()
+        return jsonify(sorted(estilos, key=lambda estilo: estilo['nome'])), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
 from src.models.programacao import db, LocutorEmissora, Locutor, Emissora
+from src.services.referencias import REFERENCIAS
+from src.services.serializacao import Serializador
 from datetime import datetime
 
 locutor_emissora_bp = Blueprint('locutor_emissora', __name__)
@@ -12,7 +14,12 @@ def get_relacionamentos():
         locutor_id = request.args.get('locutor_id', type=int)
         emissora_id = request.args.get('emissora_id', type=int)
         
-        query = LocutorEmissora.query
+        try:
+            serializador = Serializador.da_requisicao(LocutorEmissora, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = serializador.carregar(LocutorEmissora.query)
         
         if ativo is not None:
             query = query.filter_by(ativo=ativo.lower() == 'true')
@@ -22,7 +29,7 @@ def get_relacionamentos():
             query = query.filter_by(emissora_id=emissora_id)
         
         relacionamentos = query.all()
-        return jsonify([rel.to_dict() for rel in relacionamentos]), 200
+        return jsonify(serializador.lista(relacionamentos)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -46,13 +53,11 @@ def create_relacionamento():
             return jsonify({'error': 'Locutor e emissora são obrigatórios'}), 400
         
         # Verificar se o locutor existe
-        locutor = Locutor.query.get(data['locutor_id'])
-        if not locutor:
+        if not REFERENCIAS['locutores'].existe(data['locutor_id']):
             return jsonify({'error': 'Locutor não encontrado'}), 404
         
         # Verificar se a emissora existe
-        emissora = Emissora.query.get(data['emissora_id'])
-        if not emissora:
+        if not REFERENCIAS['emissoras'].existe(data['emissora_id']):
             return jsonify({'error': 'Emissora não encontrada'}), 404
         
         # Verificar se o relacionamento já existe
@@ -1,20 +1,22 @@
 from flask import Blueprint, request, jsonify
-from src.models.programacao import db, Locutor
+from src.models.programacao import db, Locutor, BancoLocucao
+from src.services.referencias import REFERENCIAS
+from src.services.versoes import get_condicional
 
 locutores_bp = Blueprint('locutores', __name__)
 
 @locutores_bp.route('/locutores', methods=['GET'])
+@get_condicional('locutores')
 def get_locutores():
     """Listar todos os locutores"""
     try:
         ativo = request.args.get('ativo')
-        query = Locutor.query
+        locutores = REFERENCIAS['locutores'].listar()
         
         if ativo is not None:
-            query = query.filter_by(ativo=ativo.lower() == 'true')
+            locutores = [locutor for locutor in locutores if locutor['ativo'] == (ativo.lower() == 'true')]
         
-        locutores = query.order_by(Locutor.codigo).all()
-        return jsonify([locutor.to_dict() for locutor in locutores]), 200
+        return jsonify(sorted(locutores, key=lambda locutor: locutor['codigo'])), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -90,6 +92,10 @@ def delete_locutor(locutor_id):
         if locutor.emissoras_associadas:
             return jsonify({'error': 'Não é possível deletar locutor com emissoras associadas'}), 400
         
+        # Verificar se há locuções gravadas pelo locutor
+        if BancoLocucao.query.filter_by(locutor_id=locutor_id).first():
+            return jsonify({'error': 'Não é possível deletar locutor com locuções cadastradas'}), 400
+        
         db.session.delete(locutor)
         db.session.commit()
         
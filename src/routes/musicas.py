@@ -1,9 +1,42 @@
 from flask import Blueprint, request, jsonify
-from src.models.programacao import db, Musica, Categoria, Estilo, Interprete, NomeMusica, ComplementoMusica
-from datetime import datetime
+from src.models.programacao import db, Musica, Interprete, NomeMusica, ComplementoMusica, ProgramacaoItem
+from src.services.alteracao_lote import atualizar_musicas, excluir_musicas, validar_valores
+from src.services.aniversarios import aniversarios_no_periodo, ler_periodo
+from src.services.autocompletar import INDICES, registrar_memorizacao
+from src.services.busca import filtrar_busca, termo_fts
+from src.services.importacao import LEITORES, importar_arquivo
+from src.services.referencias import REFERENCIAS
+from src.services.paginacao import codificar_cursor, decodificar_cursor, paginar_por_cursor, total_aproximado
+from src.services.serializacao import Serializador
+from src.services.respostas import formato_lista
+from datetime import date, datetime
+import io
 
 musicas_bp = Blueprint('musicas', __name__)
 
+# Colunas aceitas como ordenação na paginação por cursor (sempre desempatadas pelo id)
+ORDENACOES_CURSOR = {
+    'id': Musica.id,
+    'nome_musica': Musica.nome_musica,
+    'interprete1': Musica.interprete1
+}
+
+# Parâmetros que não mudam o conjunto filtrado (fora da chave do total em cache)
+PARAMETROS_PAGINA = {'page', 'per_page', 'cursor', 'total', 'ordenar', 'ordem', 'fields', 'expand', 'colunar'}
+
+# Máximo de ids em GET /musicas?ids=1,2,3
+MAX_IDS = 500
+
+# Máximo de ids no corpo das alterações em lote (PATCH/DELETE /musicas)
+MAX_IDS_LOTE = 10000
+
+# Filtros numéricos da listagem (também selecionam as músicas das alterações em lote)
+# e a coluna de Musica que cada um compara; o filtro textual é `q`
+FILTROS_INTEIROS = {'categoria_id': 'categoria_id', 'estilo_id': 'estilo_id', 'velocidade': 'velocidade', 'ano': 'ano_lancamento'}
+
+# Músicas retornadas por padrão em GET /musicas/aniversarios (máximo: MAX_IDS)
+LIMITE_ANIVERSARIOS = 100
+
 @musicas_bp.route('/musicas', methods=['GET'])
 def get_musicas():
     """Listar todas as músicas"""
@@ -11,27 +44,26 @@ def get_musicas():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 50, type=int)
         
-        # Filtros opcionais
-        categoria_id = request.args.get('categoria_id', type=int)
-        estilo_id = request.args.get('estilo_id', type=int)
-        velocidade = request.args.get('velocidade', type=int)
-        ano = request.args.get('ano', type=int)
+        try:
+            serializador = Serializador.da_requisicao(Musica, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = serializador.carregar(Musica.query)
         
-        query = Musica.query
+        if 'ids' in request.args:
+            return _listar_por_ids(query, serializador, request.args['ids'])
         
-        if categoria_id:
-            query = query.filter_by(categoria_id=categoria_id)
-        if estilo_id:
-            query = query.filter_by(estilo_id=estilo_id)
-        if velocidade:
-            query = query.filter_by(velocidade=velocidade)
-        if ano:
-            query = query.filter_by(ano_lancamento=ano)
+        # No modo cursor a ordem é a da paginação, não a relevância da busca
+        query = _filtrar(query, ordenar='cursor' not in request.args)
+        
+        if 'cursor' in request.args:
+            return _listar_por_cursor(query, serializador, per_page)
         
         musicas = query.paginate(page=page, per_page=per_page, error_out=False)
         
         return jsonify({
-            'musicas': [musica.to_dict() for musica in musicas.items],
+            'musicas': formato_lista(serializador.lista(musicas.items)),
             'total': musicas.total,
             'pages': musicas.pages,
             'current_page': page,
@@ -40,6 +72,109 @@ def get_musicas():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _ler_filtros(estrito=False):
+    """Filtros da query string que de fato restringem a listagem: {nome: valor}
+
+    Valores inválidos ou vazios (ano=abc, categoria_id=0, q sem palavras) são
+    ignorados na listagem; com `estrito` (seleção das alterações em lote)
+    levantam ValueError, para que um filtro mal escrito não selecione o
+    catálogo inteiro.
+    """
+    filtros = {}
+    for nome in FILTROS_INTEIROS:
+        if nome not in request.args:
+            continue
+        valor = request.args.get(nome, type=int)
+        if valor:
+            filtros[nome] = valor
+        elif estrito:
+            raise ValueError(f'{nome} deve ser um número inteiro diferente de zero')
+    if 'q' in request.args:
+        busca = request.args.get('q', '').strip()
+        if termo_fts(busca):
+            filtros['q'] = busca
+        elif estrito:
+            raise ValueError('q deve conter ao menos uma palavra')
+    return filtros
+
+def _filtrar(query, ordenar=True, filtros=None):
+    """Filtros opcionais da listagem (categoria_id, estilo_id, velocidade, ano e q)"""
+    if filtros is None:
+        filtros = _ler_filtros()
+    
+    for nome, coluna in FILTROS_INTEIROS.items():
+        if nome in filtros:
+            query = query.filter(getattr(Musica, coluna) == filtros[nome])
+    if 'q' in filtros:
+        # Busca textual em intérpretes, nome e complemento, por relevância
+        query = filtrar_busca(query, filtros['q'], ordenar=ordenar)
+    return query
+
+def _ler_ids(ids):
+    """Lista de ids sem repetição a partir de "1,2,3"; ValueError se inválida"""
+    try:
+        ids = list(dict.fromkeys(int(item) for item in ids.split(',') if item.strip()))
+    except ValueError:
+        raise ValueError('ids deve ser uma lista de números separados por vírgula')
+    if len(ids) > MAX_IDS:
+        raise ValueError(f'Máximo de {MAX_IDS} ids por consulta')
+    return ids
+
+def _listar_por_ids(query, serializador, ids):
+    """Várias músicas pelo id em uma consulta, na ordem pedida"""
+    try:
+        ids = _ler_ids(ids)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    por_id = {musica.id: musica for musica in query.filter(Musica.id.in_(ids))} if ids else {}
+    return jsonify({
+        'musicas': formato_lista(serializador.lista(por_id[item] for item in ids if item in por_id)),
+        'nao_encontradas': [item for item in ids if item not in por_id]
+    }), 200
+
+def _listar_por_cursor(query, serializador, per_page):
+    """Página por cursor (keyset): custo proporcional à página, sem OFFSET nem COUNT"""
+    cursor = request.args.get('cursor', '')
+    if cursor:
+        try:
+            ordenar, descendente, valor, ultimo_id = decodificar_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        apos = (valor, ultimo_id)
+    else:
+        ordenar = request.args.get('ordenar', 'id')
+        descendente = request.args.get('ordem', 'asc').lower() == 'desc'
+        apos = None
+    
+    if ordenar not in ORDENACOES_CURSOR:
+        return jsonify({'error': f'Ordenação inválida (use {", ".join(ORDENACOES_CURSOR)})'}), 400
+    if per_page < 1:
+        return jsonify({'error': 'per_page deve ser positivo'}), 400
+    
+    # Total opcional, calculado uma vez por filtro e reaproveitado entre as páginas
+    total = None
+    if request.args.get('total', 'false').lower() == 'true':
+        chave = tuple(sorted(
+            (nome, valor) for nome, valor in request.args.items() if nome not in PARAMETROS_PAGINA
+        ))
+        total = total_aproximado(('musicas',) + chave, query)
+    
+    musicas, ha_mais = paginar_por_cursor(
+        query, Musica, ORDENACOES_CURSOR[ordenar], descendente, apos, per_page
+    )
+    next_cursor = None
+    if ha_mais:
+        ultima = musicas[-1]
+        next_cursor = codificar_cursor(ordenar, descendente, getattr(ultima, ordenar), ultima.id)
+    
+    return jsonify({
+        'musicas': formato_lista(serializador.lista(musicas)),
+        'next_cursor': next_cursor,
+        'per_page': per_page,
+        'total': total
+    }), 200
+
 @musicas_bp.route('/musicas/<int:musica_id>', methods=['GET'])
 def get_musica(musica_id):
     """Obter uma música específica"""
@@ -62,14 +197,12 @@ def create_musica():
                 return jsonify({'error': f'Campo {field} é obrigatório'}), 400
         
         # Verificar se a categoria existe
-        categoria = Categoria.query.get(data['categoria_id'])
-        if not categoria:
+        if not REFERENCIAS['categorias'].existe(data['categoria_id']):
             return jsonify({'error': 'Categoria não encontrada'}), 404
         
         # Verificar se o estilo existe (se fornecido)
         if data.get('estilo_id'):
-            estilo = Estilo.query.get(data['estilo_id'])
-            if not estilo:
+            if not REFERENCIAS['estilos'].existe(data['estilo_id']):
                 return jsonify({'error': 'Estilo não encontrado'}), 404
         
         musica = Musica(
@@ -82,7 +215,8 @@ def create_musica():
             velocidade=data.get('velocidade'),
             estilo_id=data.get('estilo_id'),
             ano_lancamento=data['ano_lancamento'],
-            complemento=data.get('complemento')
+            complemento=data.get('complemento'),
+            arquivo_audio=data.get('arquivo_audio')
         )
         
         # Processar datas de aniversário se fornecidas
@@ -133,6 +267,35 @@ def create_musica():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@musicas_bp.route('/musicas/importar', methods=['POST'])
+def importar_musicas():
+    """Importar músicas em lote de um arquivo CSV ou JSON Lines"""
+    try:
+        # Arquivo enviado como multipart (campo "arquivo") ou no corpo da requisição
+        arquivo = request.files.get('arquivo')
+        nome = arquivo.filename if arquivo else ''
+        formato = request.args.get('formato')
+        if not formato:
+            if nome.lower().endswith('.csv') or request.mimetype == 'text/csv':
+                formato = 'csv'
+            elif nome.lower().endswith(('.jsonl', '.ndjson')) or request.mimetype == 'application/x-ndjson':
+                formato = 'jsonl'
+        if formato not in LEITORES:
+            return jsonify({'error': 'Formato inválido (use csv ou jsonl)'}), 400
+
+        stream = arquivo.stream if arquivo else request.stream
+        texto = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+        tamanho_lote = request.args.get('lote', 1000, type=int)
+        if tamanho_lote < 1:
+            return jsonify({'error': 'Tamanho do lote deve ser positivo'}), 400
+
+        resultado = importar_arquivo(texto, formato, tamanho_lote=tamanho_lote)
+        return jsonify(resultado), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @musicas_bp.route('/musicas/<int:musica_id>', methods=['PUT'])
 def update_musica(musica_id):
     """Atualizar uma música"""
@@ -142,14 +305,12 @@ def update_musica(musica_id):
         
         # Verificar se a categoria existe (se fornecida)
         if data.get('categoria_id'):
-            categoria = Categoria.query.get(data['categoria_id'])
-            if not categoria:
+            if not REFERENCIAS['categorias'].existe(data['categoria_id']):
                 return jsonify({'error': 'Categoria não encontrada'}), 404
         
         # Verificar se o estilo existe (se fornecido)
         if data.get('estilo_id'):
-            estilo = Estilo.query.get(data['estilo_id'])
-            if not estilo:
+            if not REFERENCIAS['estilos'].existe(data['estilo_id']):
                 return jsonify({'error': 'Estilo não encontrado'}), 404
         
         # Atualizar campos
@@ -163,6 +324,7 @@ def update_musica(musica_id):
         musica.estilo_id = data.get('estilo_id', musica.estilo_id)
         musica.ano_lancamento = data.get('ano_lancamento', musica.ano_lancamento)
         musica.complemento = data.get('complemento', musica.complemento)
+        musica.arquivo_audio = data.get('arquivo_audio', musica.arquivo_audio)
         
         # Atualizar datas de aniversário se fornecidas
         if data.get('data_aniversario_interprete1'):
@@ -202,6 +364,11 @@ def delete_musica(musica_id):
     try:
         musica = Musica.query.get_or_404(musica_id)
         
+        # Itens de programações já geradas ficam sem a referência (com as
+        # chaves estrangeiras ativas, a exclusão falharia)
+        ProgramacaoItem.query.filter_by(musica_id=musica_id).update(
+            {'musica_id': None}, synchronize_session=False
+        )
         db.session.delete(musica)
         db.session.commit()
         
@@ -210,6 +377,134 @@ def delete_musica(musica_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _selecao_lote(data):
+    """Músicas de uma alteração em lote: `ids` do corpo e/ou os filtros da listagem na query string"""
+    ids = data.get('ids')
+    filtros = _ler_filtros(estrito=True)
+    if ids is None and not filtros:
+        raise ValueError('Informe ids ou ao menos um filtro (categoria_id, estilo_id, velocidade, ano, q)')
+    
+    query = _filtrar(Musica.query, ordenar=False, filtros=filtros)
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(item, int) for item in ids):
+            raise ValueError('ids deve ser uma lista de números')
+        if len(ids) > MAX_IDS_LOTE:
+            raise ValueError(f'Máximo de {MAX_IDS_LOTE} ids por operação')
+        query = query.filter(Musica.id.in_(ids))
+    return query
+
+@musicas_bp.route('/musicas', methods=['PATCH'])
+def update_musicas_lote():
+    """Alterar várias músicas (por ids ou filtro) com um único UPDATE"""
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            query = _selecao_lote(data)
+            valores = validar_valores(data.get('valores'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
+        
+        atualizadas = atualizar_musicas(query, valores)
+        db.session.commit()
+        
+        return jsonify({'atualizadas': atualizadas}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@musicas_bp.route('/musicas', methods=['DELETE'])
+def delete_musicas_lote():
+    """Excluir várias músicas (por ids ou filtro) com um único DELETE"""
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            query = _selecao_lote(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        removidas, desvinculados = excluir_musicas(query)
+        db.session.commit()
+        
+        return jsonify({'removidas': removidas, 'itens_desvinculados': desvinculados}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def _ler_data(valor):
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError('Formato de data inválido (use YYYY-MM-DD)')
+
+@musicas_bp.route('/musicas/aniversarios', methods=['GET'])
+def get_aniversarios():
+    """Intérpretes que fazem aniversário na data (ou no período) e as suas músicas"""
+    try:
+        try:
+            if request.args.get('data'):
+                data_inicio = data_fim = _ler_data(request.args['data'])
+            else:
+                data_inicio = _ler_data(request.args['data_inicio']) if request.args.get('data_inicio') else date.today()
+                data_fim = _ler_data(request.args['data_fim']) if request.args.get('data_fim') else data_inicio
+            ler_periodo(data_inicio, data_fim)
+            serializador = Serializador.da_requisicao(Musica, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        limite = request.args.get('limite', LIMITE_ANIVERSARIOS, type=int)
+        if not 1 <= limite <= MAX_IDS:
+            return jsonify({'error': f'limite deve estar entre 1 e {MAX_IDS}'}), 400
+        
+        # Os filtros da listagem restringem as músicas consideradas
+        filtradas = None
+        filtros = _ler_filtros()
+        if filtros:
+            filtradas = _filtrar(Musica.query, ordenar=False, filtros=filtros)
+        aniversarios = aniversarios_no_periodo(data_inicio, data_fim, filtradas)
+        
+        interpretes = {}
+        por_musica = {}
+        for aniversario, dia in aniversarios:
+            chave = (dia, aniversario.interprete, aniversario.data_aniversario)
+            if chave not in interpretes:
+                interpretes[chave] = {
+                    'interprete': aniversario.interprete,
+                    'data': dia.isoformat(),
+                    'data_aniversario': aniversario.data_aniversario.isoformat(),
+                    'idade': dia.year - aniversario.data_aniversario.year,
+                    'total_musicas': 0
+                }
+            interpretes[chave]['total_musicas'] += 1
+            por_musica.setdefault(aniversario.musica_id, []).append({
+                'posicao': aniversario.posicao,
+                'interprete': aniversario.interprete,
+                'data': dia.isoformat(),
+                'data_aniversario': aniversario.data_aniversario.isoformat()
+            })
+        
+        ids = list(por_musica)[:limite]
+        carregadas = {}
+        if ids:
+            carregadas = {musica.id: musica for musica in serializador.carregar(Musica.query).filter(Musica.id.in_(ids))}
+        musicas = []
+        for musica_id in ids:
+            if musica_id in carregadas:
+                dados = serializador.serializar(carregadas[musica_id])
+                dados['aniversarios'] = por_musica[musica_id]
+                musicas.append(dados)
+        
+        return jsonify({
+            'data_inicio': data_inicio.isoformat(),
+            'data_fim': data_fim.isoformat(),
+            'interpretes': list(interpretes.values()),
+            'musicas': formato_lista(musicas),
+            'total_musicas': len(por_musica)
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Rotas para autocompletar
 @musicas_bp.route('/musicas/autocomplete/interpretes', methods=['GET'])
 def autocomplete_interpretes():
@@ -219,11 +514,8 @@ def autocomplete_interpretes():
         if len(query) < 2:
             return jsonify([]), 200
         
-        interpretes = Interprete.query.filter(
-            Interprete.nome.ilike(f'%{query}%')
-        ).order_by(Interprete.usado_count.desc()).limit(10).all()
-        
-        return jsonify([interprete.to_dict() for interprete in interpretes]), 200
+        # Índice em memória (carregado do banco na primeira busca)
+        return jsonify(INDICES['interpretes'].buscar(query)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -235,11 +527,8 @@ def autocomplete_nomes():
         if len(query) < 2:
             return jsonify([]), 200
         
-        nomes = NomeMusica.query.filter(
-            NomeMusica.nome.ilike(f'%{query}%')
-        ).order_by(NomeMusica.usado_count.desc()).limit(10).all()
-        
-        return jsonify([nome.to_dict() for nome in nomes]), 200
+        # Índice em memória (carregado do banco na primeira busca)
+        return jsonify(INDICES['nomes'].buscar(query)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -251,11 +540,8 @@ def autocomplete_complementos():
         if len(query) < 2:
             return jsonify([]), 200
         
-        complementos = ComplementoMusica.query.filter(
-            ComplementoMusica.complemento.ilike(f'%{query}%')
-        ).order_by(ComplementoMusica.usado_count.desc()).limit(10).all()
-        
-        return jsonify([complemento.to_dict() for complemento in complementos]), 200
+        # Índice em memória (carregado do banco na primeira busca)
+        return jsonify(INDICES['complementos'].buscar(query)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -268,6 +554,7 @@ def _memorizar_interprete(nome):
     else:
         interprete = Interprete(nome=nome)
         db.session.add(interprete)
+    registrar_memorizacao('interpretes', nome)
 
 def _memorizar_nome_musica(nome):
     """Memorizar nome da música para autocompletar futuras digitações"""
@@ -277,6 +564,7 @@ def _memorizar_nome_musica(nome):
     else:
         nome_musica = NomeMusica(nome=nome)
         db.session.add(nome_musica)
+    registrar_memorizacao('nomes', nome)
 
 def _memorizar_complemento(complemento):
     """Memorizar complemento para autocompletar futuras digitações"""
@@ -286,4 +574,5 @@ def _memorizar_complemento(complemento):
     else:
         comp = ComplementoMusica(complemento=complemento)
         db.session.add(comp)
+    registrar_memorizacao('complementos', complemento)
 
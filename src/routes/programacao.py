@@ -0,0 +1,364 @@
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from src.models.programacao import db, GradeProgramacao, ProgramacaoGerada, ProgramacaoItem
+from src.services.armazenamento import salvar_conteudo, remover_itens
+from src.services.exportacao import EXPORTADORES, FORMATOS, selecionar_programacoes
+from src.services.gerador import gerar_programacao_dia, selecionar_grade, grade_vale_para, formatar_hora
+from src.services.historico import ler_hora
+from src.services.lote import gerar_lote
+from src.services.referencias import REFERENCIAS
+from src.services.regeneracao import regenerar_programacao
+from src.services.respostas import formato_lista
+from datetime import datetime
+
+programacao_bp = Blueprint('programacao', __name__)
+
+# Separações do gerador (minutos) aceitas no corpo das rotas de geração
+CAMPOS_SEPARACAO = ('separacao_musica', 'separacao_interprete')
+
+def _ler_inteiro(data, campo, minimo=0, maximo=None):
+    """Campo inteiro opcional do corpo (None se ausente); ValueError se não for inteiro ou sair da faixa"""
+    valor = data.get(campo)
+    if valor is None:
+        return None
+    if isinstance(valor, bool) or not isinstance(valor, int):
+        raise ValueError(f'{campo} deve ser um número inteiro')
+    if maximo is not None and not minimo <= valor <= maximo:
+        raise ValueError(f'{campo} deve estar entre {minimo} e {maximo}')
+    if valor < minimo:
+        raise ValueError(f'{campo} deve ser maior ou igual a {minimo}')
+    return valor
+
+def _ler_separacoes(data):
+    """Separações informadas no corpo, já validadas (inteiros não negativos)"""
+    opcoes = {}
+    for campo in CAMPOS_SEPARACAO:
+        valor = _ler_inteiro(data, campo)
+        if valor is not None:
+            opcoes[campo] = valor
+    return opcoes
+
+@programacao_bp.route('/programacao', methods=['GET'])
+def get_programacoes():
+    """Listar programações geradas"""
+    try:
+        grade_id = request.args.get('grade_id', type=int)
+        emissora_id = request.args.get('emissora_id', type=int)
+        data = request.args.get('data')
+
+        query = ProgramacaoGerada.query
+
+        if grade_id:
+            query = query.filter_by(grade_id=grade_id)
+        if emissora_id:
+            query = query.filter_by(emissora_id=emissora_id)
+        if data:
+            try:
+                query = query.filter_by(data_programacao=datetime.strptime(data, '%Y-%m-%d').date())
+            except ValueError:
+                return jsonify({'error': 'Formato de data inválido (use YYYY-MM-DD)'}), 400
+
+        # O conteúdo completo só é montado quando solicitado
+        incluir_conteudo = request.args.get('conteudo', 'false').lower() == 'true'
+
+        programacoes = query.order_by(ProgramacaoGerada.data_programacao.desc()).all()
+        return jsonify(formato_lista([programacao.to_dict(incluir_conteudo=incluir_conteudo) for programacao in programacoes])), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@programacao_bp.route('/programacao/<int:programacao_id>', methods=['GET'])
+def get_programacao(programacao_id):
+    """Obter uma programação gerada específica"""
+    try:
+        programacao = ProgramacaoGerada.query.get_or_404(programacao_id)
+        return jsonify(programacao.to_dict()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@programacao_bp.route('/programacao/<int:programacao_id>/itens', methods=['GET'])
+def get_itens_programacao(programacao_id):
+    """Listar itens de uma programação (opcionalmente o que está no ar em um horário)"""
+    try:
+        ProgramacaoGerada.query.get_or_404(programacao_id)
+        hora = request.args.get('hora')
+        tipo = request.args.get('tipo')
+
+        query = ProgramacaoItem.query.filter_by(programacao_id=programacao_id)
+
+        if hora:
+            try:
+                segundos = ler_hora(hora if hora.count(':') == 2 else f'{hora}:00')
+            except ValueError:
+                return jsonify({'error': 'Formato de hora inválido (use HH:MM ou HH:MM:SS)'}), 400
+            # Item em execução no horário: começou antes e ainda não terminou
+            query = query.filter(
+                ProgramacaoItem.hora <= segundos,
+                ProgramacaoItem.hora + ProgramacaoItem.duracao > segundos
+            )
+        if tipo:
+            query = query.filter_by(tipo=tipo)
+
+        itens = query.order_by(ProgramacaoItem.hora, ProgramacaoItem.bloco, ProgramacaoItem.ordem).all()
+        return jsonify(formato_lista([item.to_dict() for item in itens])), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _resposta_exportacao(formato, programacoes, nome_arquivo):
+    """Resposta em streaming: o arquivo é escrito à medida que os lotes são lidos"""
+    return Response(
+        stream_with_context(EXPORTADORES[formato](programacoes)),
+        content_type=FORMATOS[formato],
+        headers={'Content-Disposition': f'attachment; filename={nome_arquivo}.{formato}'}
+    )
+
+@programacao_bp.route('/programacao/<int:programacao_id>/exportar', methods=['GET'])
+def exportar_programacao(programacao_id):
+    """Exportar uma programação para automação (formato=m3u, csv ou xml)"""
+    try:
+        formato = request.args.get('formato', 'm3u').lower()
+        if formato not in EXPORTADORES:
+            return jsonify({'error': 'Formato inválido (use m3u, csv ou xml)'}), 400
+
+        ProgramacaoGerada.query.get_or_404(programacao_id)
+        programacoes = selecionar_programacoes(ids=[programacao_id])
+        return _resposta_exportacao(formato, programacoes, f'programacao_{programacao_id}')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@programacao_bp.route('/programacao/exportar', methods=['GET'])
+def exportar_periodo():
+    """Exportar as programações de um período (várias emissoras) em um único arquivo"""
+    try:
+        formato = request.args.get('formato', 'm3u').lower()
+        if formato not in EXPORTADORES:
+            return jsonify({'error': 'Formato inválido (use m3u, csv ou xml)'}), 400
+
+        if not request.args.get('data_inicio'):
+            return jsonify({'error': 'Parâmetro data_inicio é obrigatório'}), 400
+
+        try:
+            data_inicio = datetime.strptime(request.args['data_inicio'], '%Y-%m-%d').date()
+            data_fim = datetime.strptime(request.args.get('data_fim', request.args['data_inicio']), '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Formato de data inválido (use YYYY-MM-DD)'}), 400
+
+        if data_fim < data_inicio:
+            return jsonify({'error': 'data_fim deve ser posterior a data_inicio'}), 400
+        if (data_fim - data_inicio).days >= 31:
+            return jsonify({'error': 'Período máximo de 31 dias'}), 400
+
+        emissora_ids = None
+        if request.args.get('emissora_ids'):
+            try:
+                emissora_ids = [int(i) for i in request.args['emissora_ids'].split(',')]
+            except ValueError:
+                return jsonify({'error': 'emissora_ids deve ser uma lista de IDs separados por vírgula'}), 400
+
+        programacoes = selecionar_programacoes(
+            data_inicio=data_inicio, data_fim=data_fim, emissora_ids=emissora_ids
+        )
+        return _resposta_exportacao(
+            formato, programacoes, f'programacao_{data_inicio.isoformat()}_{data_fim.isoformat()}'
+        )
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@programacao_bp.route('/programacao/musicas/<int:musica_id>', methods=['GET'])
+def get_programacoes_da_musica(musica_id):
+    """Listar os dias (e horários) em que uma música foi programada"""
+    try:
+        emissora_id = request.args.get('emissora_id', type=int)
+
+        query = db.session.query(
+            ProgramacaoGerada.id, ProgramacaoGerada.data_programacao,
+            ProgramacaoGerada.emissora_id, ProgramacaoItem.hora
+        ).join(ProgramacaoItem, ProgramacaoItem.programacao_id == ProgramacaoGerada.id).filter(
+            ProgramacaoItem.musica_id == musica_id
+        )
+
+        if emissora_id:
+            query = query.filter(ProgramacaoGerada.emissora_id == emissora_id)
+
+        rows = query.order_by(ProgramacaoGerada.data_programacao, ProgramacaoItem.hora).all()
+        return jsonify([{
+            'programacao_id': row.id,
+            'data_programacao': row.data_programacao.isoformat(),
+            'emissora_id': row.emissora_id,
+            'hora': formatar_hora(row.hora)
+        } for row in rows]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@programacao_bp.route('/programacao/gerar', methods=['POST'])
+def gerar_programacao():
+    """Gerar a programação de 24h de uma data a partir de uma grade"""
+    try:
+        data = request.get_json()
+
+        # Validar dados obrigatórios
+        if not data.get('data'):
+            return jsonify({'error': 'Campo data é obrigatório'}), 400
+
+        try:
+            dia = datetime.strptime(data['data'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Formato de data inválido (use YYYY-MM-DD)'}), 400
+
+        try:
+            opcoes = _ler_separacoes(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Verificar se a emissora existe (se fornecida)
+        emissora_id = data.get('emissora_id')
+        if emissora_id and not REFERENCIAS['emissoras'].existe(emissora_id):
+            return jsonify({'error': 'Emissora não encontrada'}), 404
+
+        # Usar a grade informada ou a primeira grade ativa válida para o dia
+        if data.get('grade_id'):
+            grade = GradeProgramacao.query.get(data['grade_id'])
+            if not grade:
+                return jsonify({'error': 'Grade não encontrada'}), 404
+            if not grade_vale_para(grade, dia):
+                return jsonify({'error': 'Grade não se aplica ao dia da semana informado'}), 400
+        else:
+            grade = selecionar_grade(dia)
+            if not grade:
+                return jsonify({'error': 'Nenhuma grade ativa para esta data'}), 404
+
+        # Verificar se a programação do dia já existe
+        existente = ProgramacaoGerada.query.filter_by(
+            data_programacao=dia,
+            grade_id=grade.id,
+            emissora_id=emissora_id
+        ).first()
+        if existente:
+            if not data.get('substituir'):
+                return jsonify({'error': 'Programação já gerada para esta data'}), 400
+            remover_itens([existente.id])
+            db.session.delete(existente)
+
+        for campo in ('semente', 'priorizar_aniversarios'):
+            if data.get(campo) is not None:
+                opcoes[campo] = data[campo]
+
+        try:
+            conteudo = gerar_programacao_dia(grade, dia, emissora_id=emissora_id, **opcoes)
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+
+        programacao = ProgramacaoGerada(
+            data_programacao=dia,
+            grade_id=grade.id,
+            emissora_id=emissora_id
+        )
+
+        salvar_conteudo(programacao, conteudo)
+        db.session.commit()
+
+        return jsonify(programacao.to_dict()), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@programacao_bp.route('/programacao/gerar-lote', methods=['POST'])
+def gerar_programacao_lote():
+    """Gerar a programação de várias emissoras e dias em paralelo"""
+    try:
+        data = request.get_json()
+
+        # Validar dados obrigatórios
+        if not data.get('data_inicio'):
+            return jsonify({'error': 'Campo data_inicio é obrigatório'}), 400
+
+        try:
+            data_inicio = datetime.strptime(data['data_inicio'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Formato de data inválido (use YYYY-MM-DD)'}), 400
+
+        # Os números seguem para os processos do pool: tipos errados param aqui, com 400
+        try:
+            dias = _ler_inteiro(data, 'dias', 1, 31)
+            processos = _ler_inteiro(data, 'processos', 1)
+            opcoes = _ler_separacoes(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if dias is None:
+            dias = 7
+
+        # Verificar se as emissoras existem (se fornecidas)
+        emissora_ids = data.get('emissora_ids')
+        if emissora_ids is not None and (
+            not isinstance(emissora_ids, list)
+            or not all(isinstance(item, int) and not isinstance(item, bool) for item in emissora_ids)
+        ):
+            return jsonify({'error': 'emissora_ids deve ser uma lista de números'}), 400
+        if emissora_ids:
+            if not all(REFERENCIAS['emissoras'].existe(emissora_id) for emissora_id in emissora_ids):
+                return jsonify({'error': 'Emissora não encontrada'}), 404
+
+        if data.get('priorizar_aniversarios') is not None:
+            opcoes['priorizar_aniversarios'] = data['priorizar_aniversarios']
+
+        resultado = gerar_lote(
+            data_inicio,
+            dias=dias,
+            emissora_ids=emissora_ids,
+            processos=processos,
+            substituir=data.get('substituir', False),
+            **opcoes
+        )
+
+        return jsonify(resultado), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@programacao_bp.route('/programacao/<int:programacao_id>/regenerar', methods=['POST'])
+def regenerar_programacao_gerada(programacao_id):
+    """Regenerar apenas os blocos afetados por mudanças na grade"""
+    try:
+        programacao = ProgramacaoGerada.query.get_or_404(programacao_id)
+        data = request.get_json(silent=True) or {}
+
+        if not programacao.grade:
+            return jsonify({'error': 'Programação sem grade associada'}), 400
+
+        try:
+            opcoes = _ler_separacoes(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if data.get('semente') is not None:
+            opcoes['semente'] = data['semente']
+
+        try:
+            conteudo, regenerados = regenerar_programacao(programacao, **opcoes)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if regenerados:
+            salvar_conteudo(programacao, conteudo)
+            db.session.commit()
+
+        return jsonify({
+            'blocos_regenerados': regenerados,
+            'programacao': programacao.to_dict()
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@programacao_bp.route('/programacao/<int:programacao_id>', methods=['DELETE'])
+def delete_programacao(programacao_id):
+    """Deletar uma programação gerada"""
+    try:
+        programacao = ProgramacaoGerada.query.get_or_404(programacao_id)
+
+        remover_itens([programacao.id])
+        db.session.delete(programacao)
+        db.session.commit()
+
+        return jsonify({'message': 'Programação deletada com sucesso'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,158 @@
+"""
+Alteração e exclusão de músicas em lote (um UPDATE/DELETE por operação)
+Sistema de Programação Musical
+"""
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import delete, func, update
+
+from src.models.programacao import db, Musica, ProgramacaoItem
+from src.services.aniversarios import CAMPOS_INDEXADOS, reindexar_ids, remover_do_indice
+from src.services.autocompletar import memorizar_em_lote
+from src.services.interpretes import CAMPOS_INTERPRETE, registrar_variacoes
+from src.services.referencias import REFERENCIAS
+from src.services.versoes import registrar_alteracao
+
+CAMPOS_TEXTO = ['interprete1', 'interprete2', 'interprete3', 'nome_musica', 'tipo', 'complemento', 'arquivo_audio']
+CAMPOS_INTEIROS = ['categoria_id', 'estilo_id', 'velocidade', 'ano_lancamento']
+CAMPOS_DATAS = ['data_aniversario_interprete1', 'data_aniversario_interprete2', 'data_aniversario_interprete3']
+CAMPOS_OBRIGATORIOS = ['interprete1', 'nome_musica', 'ano_lancamento', 'categoria_id']
+
+# Campo -> tipo de autocompletar memorizado (contagem de usos de cada valor)
+MEMORIZACOES = {
+    'interprete1': 'interpretes',
+    'interprete2': 'interpretes',
+    'interprete3': 'interpretes',
+    'nome_musica': 'nomes',
+    'complemento': 'complementos'
+}
+
+
+def validar_valores(data):
+    """Converter os campos a alterar; ValueError se inválidos, LookupError se a referência não existe"""
+    if not isinstance(data, dict) or not data:
+        raise ValueError('Informe os campos a alterar')
+    desconhecidos = set(data) - set(CAMPOS_TEXTO + CAMPOS_INTEIROS + CAMPOS_DATAS)
+    if desconhecidos:
+        raise ValueError(f'Campos não podem ser alterados em lote: {", ".join(sorted(desconhecidos))}')
+
+    valores = {}
+    for campo, valor in data.items():
+        if valor in (None, ''):
+            if campo in CAMPOS_OBRIGATORIOS:
+                raise ValueError(f'Campo {campo} é obrigatório')
+            valores[campo] = None
+        elif campo in CAMPOS_TEXTO:
+            valores[campo] = str(valor)
+        elif campo in CAMPOS_INTEIROS:
+            try:
+                valores[campo] = int(valor)
+            except (TypeError, ValueError):
+                raise ValueError(f'Campo {campo} deve ser um número inteiro')
+        else:
+            try:
+                valores[campo] = datetime.strptime(str(valor), '%Y-%m-%d').date()
+            except ValueError:
+                raise ValueError(f'Formato de data inválido para {campo} (use YYYY-MM-DD)')
+
+    if valores.get('categoria_id') and not REFERENCIAS['categorias'].existe(valores['categoria_id']):
+        raise LookupError('Categoria não encontrada')
+    if valores.get('estilo_id') and not REFERENCIAS['estilos'].existe(valores['estilo_id']):
+        raise LookupError('Estilo não encontrado')
+    return valores
+
+
+def _selecao(query):
+    """Ids das músicas filtradas, como subconsulta para o WHERE do comando em lote"""
+    return query.with_entities(Musica.id).order_by(None).scalar_subquery()
+
+
+def _valores_atuais(selecao, campos):
+    """Quantas músicas selecionadas têm cada valor nos campos informados"""
+    contagem = Counter()
+    for campo in campos:
+        coluna = getattr(Musica, campo)
+        for nome, quantidade in db.session.query(coluna, func.count()).filter(
+            Musica.id.in_(selecao), coluna.isnot(None), coluna != ''
+        ).group_by(coluna):
+            contagem[nome] += quantidade
+    return contagem
+
+
+def atualizar_musicas(query, valores):
+    """Aplicar `valores` a todas as músicas da query em um único UPDATE; retorna quantas mudaram
+
+    No autocompletar, cada música alterada soma um uso ao novo intérprete,
+    nome ou complemento e desconta um do valor que ele substituiu (repetir a
+    alteração não muda as contagens); a contagem de intérpretes do catálogo
+    também troca os antigos pelos novos. Se intérpretes ou
+    datas de aniversário mudam, o índice de aniversários das músicas
+    alteradas é refeito. Quem chama faz o commit.
+    """
+    selecao = _selecao(query)
+    total = db.session.query(func.count(Musica.id)).filter(Musica.id.in_(selecao)).scalar()
+    if not total:
+        return 0
+
+    # Valores substituídos, lidos antes do UPDATE
+    atuais = {campo: _valores_atuais(selecao, [campo]) for campo in MEMORIZACOES if campo in valores}
+    campos_interprete = [campo for campo in CAMPOS_INTERPRETE if campo in valores]
+    variacoes = Counter()
+    for campo in campos_interprete:
+        variacoes.subtract(atuais[campo])
+    # Os ids vêm antes do UPDATE: o filtro pode usar os próprios campos alterados
+    ids_indice = None
+    if any(campo in valores for campo in CAMPOS_INDEXADOS):
+        ids_indice = list(db.session.scalars(db.select(Musica.id).where(Musica.id.in_(selecao))))
+
+    resultado = db.session.execute(
+        update(Musica).where(Musica.id.in_(selecao)).values(**valores, updated_at=datetime.utcnow()),
+        execution_options={'synchronize_session': False}
+    )
+    if ids_indice:
+        reindexar_ids(db.session.connection(), ids_indice)
+
+    contagens = {}
+    for campo, anteriores in atuais.items():
+        saldo = contagens.setdefault(MEMORIZACOES[campo], Counter())
+        saldo.subtract(anteriores)
+        if valores[campo]:
+            saldo[valores[campo]] += resultado.rowcount
+    for tipo, contagem in contagens.items():
+        memorizar_em_lote(tipo, Counter({valor: n for valor, n in contagem.items() if n}))
+    for campo in campos_interprete:
+        if valores[campo]:
+            variacoes[valores[campo]] += resultado.rowcount
+
+    registrar_variacoes(Counter({nome: n for nome, n in variacoes.items() if n}))
+    registrar_alteracao('musicas')
+    return resultado.rowcount
+
+
+def excluir_musicas(query):
+    """Excluir todas as músicas da query em um único DELETE; retorna (removidas, itens desvinculados)
+
+    Os itens de programações já geradas perdem a referência antes (como na
+    exclusão de uma música), assim como o índice de aniversários, e os
+    intérpretes saem da contagem. Quem chama
+    faz o commit.
+    """
+    selecao = _selecao(query)
+    variacoes = Counter()
+    variacoes.subtract(_valores_atuais(selecao, CAMPOS_INTERPRETE))
+
+    desvinculados = db.session.execute(
+        update(ProgramacaoItem).where(ProgramacaoItem.musica_id.in_(selecao)).values(musica_id=None),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    remover_do_indice(db.session.connection(), selecao)
+    removidas = db.session.execute(
+        delete(Musica).where(Musica.id.in_(selecao)),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+
+    if removidas:
+        registrar_variacoes(variacoes)
+        registrar_alteracao('musicas')
+    return removidas, desvinculados
@@ -0,0 +1,163 @@
+"""
+Aniversários dos intérpretes por mês/dia (índice derivado das datas das músicas)
+Sistema de Programação Musical
+"""
+import calendar
+from datetime import timedelta
+
+from sqlalchemy import and_, delete, event, extract, insert, inspect, literal, or_, select
+
+from src.models.programacao import Musica, AniversarioInterprete
+
+# (posição, campo do intérprete, campo da data de aniversário)
+CAMPOS_ANIVERSARIO = (
+    (1, 'interprete1', 'data_aniversario_interprete1'),
+    (2, 'interprete2', 'data_aniversario_interprete2'),
+    (3, 'interprete3', 'data_aniversario_interprete3'),
+)
+
+# Campos da música que mudam as linhas do índice
+CAMPOS_INDEXADOS = tuple(campo for _, interprete, data in CAMPOS_ANIVERSARIO for campo in (interprete, data))
+
+# Ids por comando ao reindexar uma lista de músicas (limite de parâmetros do SQLite)
+TAMANHO_LOTE_IDS = 5000
+
+# Dias máximos de um período consultado
+MAX_DIAS = 366
+
+
+def mes_dia(valor):
+    """Data -> inteiro MMDD"""
+    return valor.month * 100 + valor.day
+
+
+def _mes_dia_sql(coluna):
+    return extract('month', coluna) * 100 + extract('day', coluna)
+
+
+def reindexar(conexao, condicao=None):
+    """Refazer as linhas do índice das músicas que atendem `condicao` (todas, sem condição)
+
+    Um DELETE e um INSERT ... SELECT por campo de data, sem carregar as
+    músicas: serve tanto para uma música quanto para o catálogo inteiro.
+    """
+    tabela = AniversarioInterprete.__table__
+    if condicao is None:
+        conexao.execute(delete(tabela))
+    else:
+        conexao.execute(delete(tabela).where(tabela.c.musica_id.in_(select(Musica.id).where(condicao))))
+
+    for posicao, campo_interprete, campo_data in CAMPOS_ANIVERSARIO:
+        coluna = getattr(Musica, campo_data)
+        linhas = select(
+            Musica.id, literal(posicao), getattr(Musica, campo_interprete), coluna, _mes_dia_sql(coluna)
+        ).where(coluna.isnot(None))
+        if condicao is not None:
+            linhas = linhas.where(condicao)
+        conexao.execute(insert(tabela).from_select(
+            ['musica_id', 'posicao', 'interprete', 'data_aniversario', 'mes_dia'], linhas
+        ))
+
+
+def reindexar_ids(conexao, ids):
+    """Refazer o índice de uma lista de músicas, em lotes de TAMANHO_LOTE_IDS"""
+    ids = list(ids)
+    for inicio in range(0, len(ids), TAMANHO_LOTE_IDS):
+        reindexar(conexao, Musica.id.in_(ids[inicio:inicio + TAMANHO_LOTE_IDS]))
+
+
+def tem_aniversario(musicas):
+    """Se alguma das músicas (dicts) informa data de aniversário"""
+    return any(musica.get(campo) for musica in musicas for _, _, campo in CAMPOS_ANIVERSARIO)
+
+
+def remover_do_indice(conexao, selecao):
+    """Apagar as linhas do índice das músicas selecionadas (antes de excluí-las)"""
+    tabela = AniversarioInterprete.__table__
+    conexao.execute(delete(tabela).where(tabela.c.musica_id.in_(selecao)))
+
+
+# Escritas pelo ORM (rotas de uma música); os caminhos em lote chamam reindexar
+@event.listens_for(Musica, 'after_insert')
+def _indexar_nova(mapper, conexao, musica):
+    if any(getattr(musica, campo) for _, _, campo in CAMPOS_ANIVERSARIO):
+        reindexar(conexao, Musica.id == musica.id)
+
+
+@event.listens_for(Musica, 'after_update')
+def _indexar_alterada(mapper, conexao, musica):
+    estado = inspect(musica)
+    if any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_INDEXADOS):
+        reindexar(conexao, Musica.id == musica.id)
+
+
+@event.listens_for(Musica, 'before_delete')
+def _remover_excluida(mapper, conexao, musica):
+    tabela = AniversarioInterprete.__table__
+    conexao.execute(delete(tabela).where(tabela.c.musica_id == musica.id))
+
+
+def ler_periodo(inicio, fim):
+    """Validar a faixa de datas; ValueError se invertida ou longa demais"""
+    if fim < inicio:
+        raise ValueError('data_fim deve ser igual ou posterior a data_inicio')
+    if (fim - inicio).days >= MAX_DIAS:
+        raise ValueError(f'O período deve ter no máximo {MAX_DIAS} dias')
+    return inicio, fim
+
+
+def dias_do_periodo(inicio, fim):
+    """{MMDD: data do período} de cada dia entre inicio e fim
+
+    Em anos não bissextos, quem nasceu em 29 de fevereiro comemora no dia 28.
+    """
+    dias = {}
+    dia = inicio
+    while dia <= fim:
+        dias[mes_dia(dia)] = dia
+        if dia.month == 2 and dia.day == 28 and not calendar.isleap(dia.year):
+            dias.setdefault(229, dia)
+        dia += timedelta(days=1)
+    return dias
+
+
+def faixas_mes_dia(inicio, fim):
+    """Faixas [(primeiro, último)] de MMDD que cobrem o período
+
+    Uma faixa no mesmo ano, duas quando o período atravessa a virada do ano
+    e o ano inteiro a partir de 365 dias.
+    """
+    if (fim - inicio).days >= 365:
+        return [(101, 1231)]
+    primeiro, ultimo = mes_dia(inicio), mes_dia(fim)
+    if ultimo == 228 and not calendar.isleap(fim.year):
+        ultimo = 229
+    if primeiro <= ultimo and inicio.year == fim.year:
+        return [(primeiro, ultimo)]
+    return [(primeiro, 1231), (101, ultimo)]
+
+
+def condicao_periodo(inicio, fim):
+    """Filtro de AniversarioInterprete.mes_dia para o período (faixas do índice)"""
+    coluna = AniversarioInterprete.mes_dia
+    return or_(*(
+        coluna == primeiro if primeiro == ultimo else and_(coluna >= primeiro, coluna <= ultimo)
+        for primeiro, ultimo in faixas_mes_dia(inicio, fim)
+    ))
+
+
+def aniversarios_no_periodo(inicio, fim, query=None):
+    """Linhas do índice com aniversário entre inicio e fim, com a data em que caem no período
+
+    Retorna [(AniversarioInterprete, data no período)] em ordem de data e
+    intérprete. `query` permite restringir as músicas (filtros da listagem).
+    """
+    dias = dias_do_periodo(inicio, fim)
+    consulta = AniversarioInterprete.query.filter(condicao_periodo(inicio, fim))
+    if query is not None:
+        consulta = consulta.filter(AniversarioInterprete.musica_id.in_(
+            query.with_entities(Musica.id).order_by(None).scalar_subquery()
+        ))
+    resultado = [(aniversario, dias[aniversario.mes_dia]) for aniversario in consulta]
+    resultado.sort(key=lambda item: (item[1], item[0].interprete or '', item[0].musica_id, item[0].posicao))
+    return resultado
@@ -0,0 +1,74 @@
+"""
+Gravação da programação gerada: estrutura dos blocos em programacao_gerada e
+itens em programacao_itens
+Sistema de Programação Musical
+"""
+import json
+
+from sqlalchemy import insert
+
+from src.models.programacao import db, ProgramacaoGerada, ProgramacaoItem
+from src.services.historico import ler_hora
+from src.services.postgres import copiar_linhas
+
+
+def separar_conteudo(conteudo):
+    """Separar o conteúdo gerado em cabeçalho (JSON sem itens) e linhas da tabela de itens"""
+    cabecalho = {chave: valor for chave, valor in conteudo.items() if chave != 'blocos'}
+    cabecalho['blocos'] = []
+    itens = []
+    for bloco in conteudo['blocos']:
+        cabecalho['blocos'].append({chave: valor for chave, valor in bloco.items() if chave != 'itens'})
+        for ordem, item in enumerate(bloco['itens']):
+            itens.append({
+                'bloco': bloco['indice'],
+                'ordem': ordem,
+                'hora': ler_hora(item['hora']),
+                'tipo': item['tipo'],
+                'musica_id': item.get('musica_id'),
+                'categoria_id': item.get('categoria_id'),
+                'referencia_id': item.get('referencia_id'),
+                'duracao': ler_hora(item['duracao']),
+                'posicao': item.get('posicao')
+            })
+    return json.dumps(cabecalho, ensure_ascii=False), itens
+
+
+def remover_itens(programacao_ids):
+    """Apagar os itens das programações informadas com um único DELETE"""
+    if programacao_ids:
+        ProgramacaoItem.query.filter(
+            ProgramacaoItem.programacao_id.in_(list(programacao_ids))
+        ).delete(synchronize_session=False)
+
+
+def salvar_conteudo(programacao, conteudo):
+    """Gravar (ou regravar) o conteúdo de uma programação"""
+    programacao.conteudo_json, itens = separar_conteudo(conteudo)
+    if programacao.id is None:
+        db.session.add(programacao)
+        db.session.flush()
+    else:
+        remover_itens([programacao.id])
+    copiar_linhas(ProgramacaoItem, [dict(item, programacao_id=programacao.id) for item in itens])
+
+
+def inserir_lote(linhas):
+    """Inserir várias programações e seus itens com dois INSERTs em lote
+
+    `linhas` é uma lista de (dados da programação, itens), com o cabeçalho
+    já serializado em `conteudo_json` (ver separar_conteudo).
+    """
+    if not linhas:
+        return []
+    ids = db.session.scalars(
+        insert(ProgramacaoGerada).returning(ProgramacaoGerada.id, sort_by_parameter_order=True),
+        [dados for dados, _ in linhas]
+    ).all()
+    itens = [
+        dict(item, programacao_id=programacao_id)
+        for programacao_id, (_, itens_programacao) in zip(ids, linhas)
+        for item in itens_programacao
+    ]
+    copiar_linhas(ProgramacaoItem, itens)
+    return ids
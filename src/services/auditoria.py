@@ -0,0 +1,142 @@
+"""
+Auditoria dos planos de consulta (EXPLAIN QUERY PLAN do SQLite) das rotas
+Sistema de Programação Musical
+"""
+import re
+from collections import OrderedDict
+
+from flask import has_request_context, request
+from sqlalchemy import event, inspect
+
+# Tabelas com menos linhas que isso podem ser varridas sem alerta
+LIMITE_VARREDURA = 1000
+
+# Consultas com até tantas colunas no resultado deveriam ser atendidas só pelo índice
+COLUNAS_COBERTURA = 3
+
+COMANDOS_AUDITADOS = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+_VARREDURA = re.compile(r'^SCAN (\w+)$')
+_BUSCA_SEM_COBERTURA = re.compile(r'^SEARCH (\w+) USING INDEX (\w+)')
+_APELIDO = re.compile(r'\b(\w+) AS (\w+)\b')
+
+
+class CapturaConsultas:
+    """Guardar os comandos SQL executados no engine, por endpoint, sem repetições
+
+    Uso: `with CapturaConsultas(engine) as captura: ...`; depois,
+    `captura.consultas` tem {(endpoint, sql): {'parametros', 'colunas', 'execucoes'}}.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.consultas = OrderedDict()
+
+    def _antes(self, conexao, cursor, sql, parametros, contexto, executemany):
+        contexto._auditoria = (not executemany and sql.lstrip().upper().startswith(COMANDOS_AUDITADOS))
+
+    def _depois(self, conexao, cursor, sql, parametros, contexto, executemany):
+        if not getattr(contexto, '_auditoria', False):
+            return
+        endpoint = (request.endpoint or request.path) if has_request_context() else None
+        chave = (endpoint, sql)
+        if chave in self.consultas:
+            self.consultas[chave]['execucoes'] += 1
+            return
+        self.consultas[chave] = {
+            'parametros': parametros,
+            'colunas': len(cursor.description or ()),
+            'execucoes': 1
+        }
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._antes)
+        event.listen(self.engine, 'after_cursor_execute', self._depois)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._antes)
+        event.remove(self.engine, 'after_cursor_execute', self._depois)
+        return False
+
+
+def contar_linhas(conexao):
+    """Linhas de cada tabela do banco"""
+    return {
+        tabela: conexao.exec_driver_sql(f'SELECT count(*) FROM "{tabela}"').scalar()
+        for tabela in inspect(conexao).get_table_names()
+    }
+
+
+def explicar(conexao, sql, parametros):
+    """Linhas de detalhe do EXPLAIN QUERY PLAN do comando"""
+    cursor = conexao.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, parametros)
+        return [linha[3] for linha in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def classificar(sql, plano, colunas, linhas_por_tabela, limite=LIMITE_VARREDURA):
+    """Alertas do plano: varreduras de tabelas grandes, B-trees temporárias,
+    índices automáticos e buscas por índice que ainda leem a tabela
+
+    Tabelas com menos de `limite` linhas não geram alertas, e uma varredura
+    sem ordenação em um comando com LIMIT para nas primeiras linhas (página
+    sem filtro).
+    """
+    apelidos = {apelido: tabela for tabela, apelido in _APELIDO.findall(sql)}
+
+    def linhas(nome):
+        return linhas_por_tabela.get(apelidos.get(nome, nome), 0)
+
+    tabelas_grandes = any(
+        linhas(detalhe.split()[1]) >= limite for detalhe in plano if detalhe.startswith(('SCAN ', 'SEARCH '))
+    )
+    ordena = any(detalhe.startswith('USE TEMP B-TREE') for detalhe in plano)
+    com_limite = re.search(r'\bLIMIT\b', sql, re.IGNORECASE) is not None
+
+    alertas = []
+    for detalhe in plano:
+        varredura = _VARREDURA.match(detalhe)
+        if varredura:
+            if linhas(varredura.group(1)) >= limite and (ordena or not com_limite):
+                alertas.append(('varredura', f'{detalhe} ({linhas(varredura.group(1))} linhas)'))
+        elif detalhe.startswith('USE TEMP B-TREE'):
+            if tabelas_grandes:
+                alertas.append(('b-tree temporaria', detalhe))
+        elif 'AUTOMATIC' in detalhe and 'INDEX' in detalhe:
+            alertas.append(('indice automatico', detalhe))
+        else:
+            busca = _BUSCA_SEM_COBERTURA.match(detalhe)
+            if busca and colunas and colunas <= COLUNAS_COBERTURA and linhas(busca.group(1)) >= limite:
+                alertas.append(('sem cobertura', f'{detalhe} ({colunas} colunas no resultado)'))
+    return alertas
+
+
+def auditar(conexao, consultas, limite=LIMITE_VARREDURA):
+    """Plano e alertas de cada consulta capturada, agrupados por blueprint
+
+    Retorna {blueprint: [{'endpoint', 'sql', 'execucoes', 'plano', 'alertas'}]}.
+    Só funciona no SQLite (EXPLAIN QUERY PLAN).
+    """
+    if conexao.dialect.name != 'sqlite':
+        raise ValueError('A auditoria de planos de consulta só está disponível no SQLite')
+
+    linhas_por_tabela = contar_linhas(conexao)
+    relatorio = OrderedDict()
+    for (endpoint, sql), dados in consultas.items():
+        blueprint = endpoint.split('.', 1)[0] if endpoint else '(fora de requisição)'
+        try:
+            plano = explicar(conexao, sql, dados['parametros'])
+        except Exception as e:
+            plano = [f'erro no EXPLAIN: {e}']
+        relatorio.setdefault(blueprint, []).append({
+            'endpoint': endpoint,
+            'sql': sql,
+            'execucoes': dados['execucoes'],
+            'plano': plano,
+            'alertas': classificar(sql, plano, dados['colunas'], linhas_por_tabela, limite)
+        })
+    return relatorio
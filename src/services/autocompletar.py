@@ -0,0 +1,218 @@
+"""
+Autocompletar de intérpretes, nomes e complementos: memorização em lote e
+índice em memória
+Sistema de Programação Musical
+"""
+import bisect
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import bindparam, case, insert, update
+
+from src.models.programacao import db, Interprete, NomeMusica, ComplementoMusica
+from src.services.cache_versionado import CacheVersionado, registrar_pendente
+from src.services.historico import normalizar_interprete as normalizar
+
+# Modelo -> coluna com o valor memorizado
+MEMORIZADOS = {
+    'interpretes': (Interprete, Interprete.nome),
+    'nomes': (NomeMusica, NomeMusica.nome),
+    'complementos': (ComplementoMusica, ComplementoMusica.complemento)
+}
+
+LIMITE_SUGESTOES = 10
+
+# Segundos entre as conferências da versão de musicas (as memorizações acompanham
+# as escritas de músicas); a recarga roda em segundo plano, sem travar as buscas
+VERIFICACAO_INDICE = 1
+
+
+def _bigramas(texto):
+    return {texto[i:i + 2] for i in range(len(texto) - 1)}
+
+
+class IndiceAutocompletar(CacheVersionado):
+    """Índice de substrings de uma tabela de autocompletar
+
+    Cada bigrama do texto normalizado (sem acentos, minúsculas) aponta para a
+    lista das entradas que o contêm, já ordenada por usado_count decrescente.
+    Uma busca percorre a menor lista entre os bigramas do termo e para nas
+    primeiras `limite` entradas que contêm o termo inteiro — que são as mais
+    usadas, sem ordenar nada na hora da consulta.
+    """
+
+    def __init__(self, modelo, coluna, intervalo=VERIFICACAO_INDICE):
+        super().__init__(('musicas',), intervalo=intervalo, em_segundo_plano=True)
+        self.modelo = modelo
+        self.coluna = coluna
+        self.campo = coluna.key
+        self._entradas = {}
+        self._normalizados = {}
+        self._chaves = {}
+        self._postings = {}
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def _chave(self, entrada):
+        return (-entrada['usado_count'], entrada[self.campo])
+
+    def _ler(self):
+        entradas = {}
+        for row in db.session.query(
+            self.modelo.id, self.coluna, self.modelo.usado_count, self.modelo.created_at, self.modelo.updated_at
+        ):
+            entradas[row[1]] = self._entrada(row)
+
+        postings = {}
+        normalizados = {}
+        chaves = {}
+        for valor, entrada in entradas.items():
+            normalizado = normalizar(valor) or ''
+            chave = self._chave(entrada)
+            normalizados[valor] = normalizado
+            chaves[valor] = chave
+            for bigrama in _bigramas(normalizado):
+                postings.setdefault(bigrama, []).append(chave)
+        for lista in postings.values():
+            lista.sort()
+        return entradas, normalizados, chaves, postings
+
+    def _instalar(self, conteudo):
+        self._entradas, self._normalizados, self._chaves, self._postings = conteudo
+
+    def _aplicar(self, alteracoes):
+        for valor, quantidade in alteracoes:
+            self.incrementar(valor, quantidade)
+
+    def _entrada(self, row):
+        return {
+            'id': row[0],
+            self.campo: row[1],
+            'usado_count': row[2] or 0,
+            'created_at': row[3].isoformat() if row[3] else None,
+            'updated_at': row[4].isoformat() if row[4] else None
+        }
+
+    def incrementar(self, valor, quantidade=1):
+        """Somar usos de um valor (novo ou existente) sem recarregar o índice"""
+        with self._lock:
+            if self._origem is None:
+                return
+            entrada = self._entradas.get(valor)
+            agora = datetime.utcnow().isoformat()
+            if entrada is None:
+                # O id é resolvido na primeira busca que retornar a entrada
+                entrada = {'id': None, self.campo: valor, 'usado_count': 0, 'created_at': agora, 'updated_at': agora}
+                self._entradas[valor] = entrada
+                self._normalizados[valor] = normalizar(valor) or ''
+            else:
+                antiga = self._chaves[valor]
+                for bigrama in _bigramas(self._normalizados[valor]):
+                    lista = self._postings[bigrama]
+                    del lista[bisect.bisect_left(lista, antiga)]
+
+            entrada['usado_count'] = max(entrada['usado_count'] + quantidade, 0)
+            entrada['updated_at'] = agora
+            chave = self._chave(entrada)
+            self._chaves[valor] = chave
+            for bigrama in _bigramas(self._normalizados[valor]):
+                bisect.insort(self._postings.setdefault(bigrama, []), chave)
+
+    def _resolver_ids(self, entradas):
+        valores = [entrada[self.campo] for entrada in entradas if entrada['id'] is None]
+        if not valores:
+            return
+        for row in db.session.query(
+            self.modelo.id, self.coluna, self.modelo.usado_count, self.modelo.created_at, self.modelo.updated_at
+        ).filter(self.coluna.in_(valores)):
+            atual = self._entradas.get(row[1])
+            if atual is not None:
+                atual['id'] = row[0]
+                atual['created_at'] = row[3].isoformat() if row[3] else atual['created_at']
+
+    def buscar(self, termo, limite=LIMITE_SUGESTOES):
+        """Entradas que contêm o termo (sem acentos), das mais usadas para as menos"""
+        normalizado = normalizar(termo)
+        if not normalizado or len(normalizado) < 2:
+            return []
+        with self._lock:
+            self._garantir_carregado()
+            listas = [self._postings.get(bigrama) for bigrama in _bigramas(normalizado)]
+            if not all(listas):
+                return []
+
+            encontradas = []
+            for _, valor in min(listas, key=len):
+                if normalizado in self._normalizados[valor]:
+                    encontradas.append(self._entradas[valor])
+                    if len(encontradas) == limite:
+                        break
+            self._resolver_ids(encontradas)
+            return [dict(entrada) for entrada in encontradas]
+
+
+INDICES = {
+    chave: IndiceAutocompletar(modelo, coluna)
+    for chave, (modelo, coluna) in MEMORIZADOS.items()
+}
+
+
+def registrar_memorizacao(tipo, valor, quantidade=1):
+    """Anotar uma memorização na sessão atual; o índice é atualizado após o commit"""
+    registrar_pendente(INDICES[tipo], (valor, quantidade))
+
+
+def contar_valores(musicas):
+    """Contar intérpretes, nomes e complementos de uma lista de músicas (dicts)"""
+    contagens = {chave: Counter() for chave in MEMORIZADOS}
+    for musica in musicas:
+        for campo in ('interprete1', 'interprete2', 'interprete3'):
+            if musica.get(campo):
+                contagens['interpretes'][musica[campo]] += 1
+        if musica.get('nome_musica'):
+            contagens['nomes'][musica['nome_musica']] += 1
+        if musica.get('complemento'):
+            contagens['complementos'][musica['complemento']] += 1
+    return contagens
+
+
+def memorizar_em_lote(tipo, contagem):
+    """Somar as contagens aos valores existentes e inserir os novos
+
+    Equivale a chamar _memorizar_* uma vez por ocorrência, mas com uma consulta
+    para os existentes, um UPDATE executemany e um INSERT executemany.
+    Contagens negativas (valores substituídos) descontam usos, sem passar de
+    zero, e não criam valores novos.
+    """
+    if not contagem:
+        return
+    modelo, coluna = MEMORIZADOS[tipo]
+    existentes = dict(db.session.query(coluna, modelo.id).filter(coluna.in_(list(contagem))))
+
+    if existentes:
+        tabela = modelo.__table__
+        somado = tabela.c.usado_count + bindparam('b_quantidade')
+        db.session.execute(
+            update(tabela).where(tabela.c.id == bindparam('b_id')).values(
+                usado_count=case((somado < 0, 0), else_=somado)
+            ),
+            [{'b_id': existentes[valor], 'b_quantidade': contagem[valor]} for valor in existentes]
+        )
+
+    novos = [
+        {coluna.key: valor, 'usado_count': quantidade}
+        for valor, quantidade in contagem.items() if valor not in existentes and quantidade > 0
+    ]
+    if novos:
+        db.session.execute(insert(modelo), novos)
+
+    for valor, quantidade in contagem.items():
+        if valor in existentes or quantidade > 0:
+            registrar_memorizacao(tipo, valor, quantidade)
+
+
+def memorizar_musicas(musicas):
+    """Memorizar os valores de autocompletar de várias músicas de uma vez"""
+    for tipo, contagem in contar_valores(musicas).items():
+        memorizar_em_lote(tipo, contagem)
@@ -0,0 +1,118 @@
+"""
+Busca textual no catálogo de músicas (SQLite FTS5, sem distinção de acentos)
+Sistema de Programação Musical
+"""
+from sqlalchemy import DDL, Float, Integer, event, or_, text
+
+from src.models.programacao import db, Musica
+
+TABELA_BUSCA = 'musicas_busca'
+COLUNAS_BUSCA = ['interprete1', 'interprete2', 'interprete3', 'nome_musica', 'complemento']
+
+# Peso de cada coluna na relevância (bm25), na ordem de COLUNAS_BUSCA
+PESOS = [3.0, 2.0, 2.0, 3.0, 1.0]
+
+_colunas = ', '.join(COLUNAS_BUSCA)
+_novos = ', '.join(f'new.{coluna}' for coluna in COLUNAS_BUSCA)
+_antigos = ', '.join(f'old.{coluna}' for coluna in COLUNAS_BUSCA)
+
+# Tabela FTS5 com conteúdo externo (lê os textos de `musicas`) mantida por triggers.
+# remove_diacritics 2 faz "Joao" encontrar "João" e "acao" encontrar "ação".
+COMANDOS_BUSCA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_BUSCA} USING fts5(
+        {_colunas}, content='musicas', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABELA_BUSCA}_ai AFTER INSERT ON musicas BEGIN
+        INSERT INTO {TABELA_BUSCA}(rowid, {_colunas}) VALUES (new.id, {_novos});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABELA_BUSCA}_ad AFTER DELETE ON musicas BEGIN
+        INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}, rowid, {_colunas}) VALUES ('delete', old.id, {_antigos});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABELA_BUSCA}_au AFTER UPDATE OF {_colunas} ON musicas BEGIN
+        INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}, rowid, {_colunas}) VALUES ('delete', old.id, {_antigos});
+        INSERT INTO {TABELA_BUSCA}(rowid, {_colunas}) VALUES (new.id, {_novos});
+    END"""
+]
+
+# Bancos novos: o índice é criado junto com a tabela musicas (db.create_all)
+for _comando in COMANDOS_BUSCA:
+    event.listen(Musica.__table__, 'after_create', DDL(_comando).execute_if(dialect='sqlite'))
+
+
+def padrao_contem(texto):
+    """Padrão LIKE '%texto%' com os curingas do usuário escapados (usar com escape='\\')"""
+    escapado = texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escapado}%'
+
+
+def garantir_indice_busca(conexao):
+    """Criar o índice em bancos já existentes e preenchê-lo com o catálogo atual"""
+    if conexao.dialect.name != 'sqlite':
+        return False
+    existia = conexao.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nome"),
+        {'nome': TABELA_BUSCA}
+    ).first() is not None
+    for comando in COMANDOS_BUSCA:
+        conexao.exec_driver_sql(comando)
+    if not existia:
+        conexao.exec_driver_sql(f"INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}) VALUES ('rebuild')")
+    return True
+
+
+def termo_fts(busca):
+    """Converter o texto digitado em uma consulta FTS5 segura
+
+    Cada palavra vira um termo entre aspas com busca por prefixo, e todas
+    precisam aparecer (AND implícito).
+    """
+    palavras = busca.replace('"', ' ').split()
+    return ' '.join(f'"{palavra}"*' for palavra in palavras)
+
+
+# Engines em que o índice já foi encontrado (evita consultar sqlite_master a cada busca)
+_engines_com_indice = set()
+
+
+def _indice_disponivel():
+    engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return False
+    if engine.url not in _engines_com_indice:
+        existe = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nome"),
+            {'nome': TABELA_BUSCA}
+        ).first() is not None
+        if not existe:
+            return False
+        _engines_com_indice.add(engine.url)
+    return True
+
+
+def filtrar_busca(query, busca, ordenar=True):
+    """Aplicar a busca textual a uma query de Musica, ordenando por relevância
+
+    Com `ordenar=False` só filtra (para quem define a própria ordenação, como
+    a paginação por cursor). Sem o índice FTS5 (outro banco ou índice ainda
+    não criado) usa ilike nas mesmas colunas, sem ordenação por relevância.
+    """
+    termo = termo_fts(busca)
+    if not termo:
+        return query
+
+    if not _indice_disponivel():
+        padrao = padrao_contem(busca)
+        return query.filter(or_(*(getattr(Musica, coluna).ilike(padrao, escape='\\') for coluna in COLUNAS_BUSCA)))
+
+    pesos = ', '.join(str(peso) for peso in PESOS)
+    resultados = text(
+        f'SELECT rowid AS id, bm25({TABELA_BUSCA}, {pesos}) AS relevancia '
+        f'FROM {TABELA_BUSCA} WHERE {TABELA_BUSCA} MATCH :termo'
+    ).bindparams(termo=termo).columns(id=Integer, relevancia=Float).subquery('busca')
+
+    query = query.join(resultados, resultados.c.id == Musica.id)
+    if not ordenar:
+        return query
+    # bm25 retorna valores menores para os resultados mais relevantes
+    return query.order_by(resultados.c.relevancia, Musica.id)
@@ -0,0 +1,151 @@
+"""
+Base dos caches em memória derivados do banco: recarga pela versão das
+tabelas e alterações pendentes aplicadas após o commit
+Sistema de Programação Musical
+"""
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.models.programacao import db
+from src.services.versoes import CHAVE_VERSOES, ler_versoes
+
+# Chave em session.info com as alterações de cada cache aplicadas após o commit
+CHAVE_PENDENTES = 'caches_pendentes'
+
+# Todos os caches criados (recebem as versões gravadas em cada commit)
+_CACHES = []
+
+
+class CacheVersionado:
+    """Conteúdo carregado do banco e marcado com a versão das tabelas de origem
+
+    A cada acesso a versão das tabelas (`versoes_tabelas`, uma consulta por
+    chave primária) é comparada com a do conteúdo; se outro processo alterou
+    as tabelas, o conteúdo é recarregado. Assim o cache nunca está atrás da
+    versão usada no ETag da mesma requisição. Com `intervalo`, a versão é
+    conferida no máximo uma vez a cada `intervalo` segundos; com
+    `em_segundo_plano`, a recarga roda em uma thread e o conteúdo anterior
+    segue respondendo até ser trocado.
+
+    As alterações feitas por esta instância entram com `registrar_pendente`
+    e são aplicadas após o commit (write-through); se a transação partiu da
+    versão do cache, ele avança para a versão gravada sem recarregar.
+
+    As subclasses implementam `_ler()` (novo conteúdo, lido do banco),
+    `_instalar(conteudo)` e `_aplicar(alteracoes)`.
+    """
+
+    def __init__(self, tabelas, intervalo=0, em_segundo_plano=False):
+        self.tabelas = tuple(sorted(tabelas))
+        self.intervalo = intervalo
+        self.em_segundo_plano = em_segundo_plano
+        self._lock = threading.RLock()
+        self._origem = None
+        self._versao = None
+        self._verificado_em = 0
+        self._geracao = 0
+        self._recarregando = False
+        _CACHES.append(self)
+
+    def _ler(self):
+        raise NotImplementedError
+
+    def _instalar(self, conteudo):
+        raise NotImplementedError
+
+    def _aplicar(self, alteracoes):
+        raise NotImplementedError
+
+    def invalidar(self):
+        """Descartar o conteúdo; ele é recarregado no próximo acesso"""
+        with self._lock:
+            self._origem = None
+            self._geracao += 1
+
+    @property
+    def carregado(self):
+        return self._origem is not None
+
+    def _carregar(self):
+        versao = ler_versoes(self.tabelas)
+        self._instalar(self._ler())
+        self._versao = versao
+        self._origem = db.engine.url
+        self._verificado_em = time.monotonic()
+
+    def _garantir_carregado(self):
+        """Chamado com o lock: carregar ou recarregar se a versão das tabelas mudou"""
+        if self._origem != db.engine.url:
+            self._carregar()
+            return
+        if self._recarregando or time.monotonic() - self._verificado_em < self.intervalo:
+            return
+        # Alterações ainda não confirmadas desta sessão: a versão lida seria a da transação
+        if set(db.session.info.get(CHAVE_VERSOES, ())) & set(self.tabelas):
+            return
+        versao = ler_versoes(self.tabelas)
+        self._verificado_em = time.monotonic()
+        if versao == self._versao:
+            return
+        if self.em_segundo_plano:
+            self._recarregar_em_segundo_plano()
+        else:
+            self._carregar()
+
+    def _recarregar_em_segundo_plano(self):
+        self._recarregando = True
+        app = current_app._get_current_object()
+        geracao = self._geracao
+
+        def recarregar():
+            try:
+                with app.app_context():
+                    versao = ler_versoes(self.tabelas)
+                    conteudo = self._ler()
+                with self._lock:
+                    # Descartado no meio da recarga: o próximo acesso lê de novo
+                    if geracao == self._geracao:
+                        self._instalar(conteudo)
+                        self._versao = versao
+            finally:
+                with self._lock:
+                    self._recarregando = False
+
+        threading.Thread(target=recarregar, name=f'recarga-{self.tabelas[0]}', daemon=True).start()
+
+    def _depois_do_commit(self, alteracoes, versoes):
+        with self._lock:
+            if self._origem is None:
+                return
+            if alteracoes:
+                self._aplicar(alteracoes)
+            gravadas = {tabela: versoes[tabela] for tabela in self.tabelas if tabela in versoes}
+            if not gravadas or self._versao is None:
+                return
+            # Só avança se a transação partiu da versão do cache (sem alterações de outros processos)
+            if all(self._versao.get(tabela) == anterior for tabela, (anterior, _) in gravadas.items()):
+                self._versao = dict(self._versao, **{tabela: nova for tabela, (_, nova) in gravadas.items()})
+
+
+def registrar_pendente(cache, alteracao, session=None):
+    """Anotar uma alteração do cache na sessão; ela é aplicada após o commit"""
+    session = session if session is not None else db.session
+    session.info.setdefault(CHAVE_PENDENTES, {}).setdefault(cache, []).append(alteracao)
+
+
+@event.listens_for(Session, 'after_commit')
+def _aplicar_pendentes(session):
+    pendentes = session.info.pop(CHAVE_PENDENTES, {})
+    versoes = session.info.pop(CHAVE_VERSOES, {})
+    for cache in _CACHES:
+        cache._depois_do_commit(pendentes.get(cache), versoes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_pendentes(session):
+    session.info.pop(CHAVE_PENDENTES, None)
+    session.info.pop(CHAVE_VERSOES, None)
@@ -0,0 +1,272 @@
+"""
+Carga inicial do banco em volume (fixtures CSV/JSON ou geradas), com inserts em lote
+Sistema de Programação Musical
+"""
+import json
+import os
+from collections import OrderedDict
+from datetime import date, datetime, time
+
+from src.models.programacao import (
+    db, Estilo, Categoria, Locutor, Emissora, LocutorEmissora, Musica, BancoLocucao
+)
+from src.services.aniversarios import reindexar
+from src.services.autocompletar import memorizar_musicas
+from src.services.busca import COMANDOS_BUSCA, TABELA_BUSCA
+from src.services.importacao import LEITORES, MapasReferencia, validar_linha
+from src.services.interpretes import registrar_variacoes, variacoes_musicas
+from src.services.postgres import copiar_linhas
+from src.services.referencias import REFERENCIAS
+from src.services.versoes import registrar_alteracao
+
+TAMANHO_LOTE = 10000
+
+# Ordem da carga: as tabelas referenciadas vêm antes de quem as referencia
+MODELOS = OrderedDict([
+    ('estilos', Estilo),
+    ('categorias', Categoria),
+    ('locutores', Locutor),
+    ('emissoras', Emissora),
+    ('locutor_emissora', LocutorEmissora),
+    ('musicas', Musica),
+    ('banco_locucoes', BancoLocucao),
+])
+
+# Pragmas do SQLite durante a carga (os valores anteriores voltam no fim). Sem
+# fsync a cada commit: uma queda no meio da carga pode exigir recomeçá-la.
+PRAGMAS_CARGA = {
+    'synchronous': 'OFF',
+    'cache_size': -262144,  # 256 MB
+    'temp_store': 'MEMORY'
+}
+
+VERDADEIROS = ('1', 'true', 't', 'sim', 's', 'yes', 'y')
+
+
+def _linhas_arquivo(caminho, formato):
+    """Linhas de um arquivo CSV ou JSON Lines, lidas só quando a tabela for carregada"""
+    leitor, primeira_linha = LEITORES[formato]
+    with open(caminho, encoding='utf-8-sig', newline='') as arquivo:
+        for numero, linha in enumerate(leitor(arquivo), start=primeira_linha):
+            if isinstance(linha, Exception):
+                raise ValueError(f'{os.path.basename(caminho)}, linha {numero}: {linha}')
+            if linha is not None:
+                yield linha
+
+
+def ler_fixtures(caminho):
+    """Fontes da carga a partir de um arquivo JSON ou de um diretório
+
+    O JSON é um objeto {tabela: [linhas]}. No diretório, cada tabela vem de
+    `<tabela>.csv` (com cabeçalho), `<tabela>.jsonl` ou `<tabela>.json` (lista
+    de objetos); tabelas sem arquivo não são carregadas. Retorna
+    {tabela: iterável de dicts}, na ordem de MODELOS.
+    """
+    if os.path.isfile(caminho):
+        with open(caminho, encoding='utf-8') as arquivo:
+            dados = json.load(arquivo)
+        if not isinstance(dados, dict):
+            raise ValueError('O arquivo JSON deve ser um objeto {tabela: [linhas]}')
+        desconhecidas = set(dados) - set(MODELOS)
+        if desconhecidas:
+            raise ValueError(f'Tabelas desconhecidas: {", ".join(sorted(desconhecidas))}')
+        return OrderedDict((tabela, dados[tabela]) for tabela in MODELOS if tabela in dados)
+
+    if not os.path.isdir(caminho):
+        raise ValueError(f'{caminho} não é um arquivo nem um diretório')
+    fontes = OrderedDict()
+    for tabela in MODELOS:
+        base = os.path.join(caminho, tabela)
+        if os.path.exists(base + '.csv'):
+            fontes[tabela] = _linhas_arquivo(base + '.csv', 'csv')
+        elif os.path.exists(base + '.jsonl'):
+            fontes[tabela] = _linhas_arquivo(base + '.jsonl', 'jsonl')
+        elif os.path.exists(base + '.json'):
+            with open(base + '.json', encoding='utf-8') as arquivo:
+                fontes[tabela] = json.load(arquivo)
+    return fontes
+
+
+def _converter(coluna, valor):
+    """Valor lido de CSV/JSON no tipo Python da coluna"""
+    if valor is None or valor == '':
+        return None
+    tipo = coluna.type.python_type
+    if isinstance(valor, tipo) and not (tipo is int and isinstance(valor, bool)):
+        return valor
+    if tipo is bool:
+        return str(valor).strip().lower() in VERDADEIROS
+    if tipo is int:
+        return int(valor)
+    if tipo in (date, datetime, time):
+        return tipo.fromisoformat(str(valor))
+    return str(valor)
+
+
+class _Referencias:
+    """Códigos de locutores e emissoras -> ids, lidos quando a primeira linha precisa"""
+
+    def __init__(self):
+        self._mapas = {}
+        self.mapas_musicas = None
+
+    def id(self, modelo, codigo):
+        if modelo not in self._mapas:
+            self._mapas[modelo] = dict(db.session.query(modelo.codigo, modelo.id))
+        if str(codigo) not in self._mapas[modelo]:
+            raise ValueError(f'{modelo.__name__} {codigo} não encontrado')
+        return self._mapas[modelo][str(codigo)]
+
+
+def _preparar(tabela, modelo, linha, referencias):
+    """Converter uma linha da fixture nos valores das colunas da tabela"""
+    if referencias.mapas_musicas is not None:
+        return validar_linha(linha, referencias.mapas_musicas)
+
+    linha = dict(linha)
+    for campo, referenciado in (('locutor', Locutor), ('emissora', Emissora)):
+        codigo = linha.pop(f'{campo}_codigo', None)
+        if codigo is not None and not linha.get(f'{campo}_id'):
+            linha[f'{campo}_id'] = referencias.id(referenciado, codigo)
+
+    colunas = modelo.__table__.columns
+    desconhecidos = set(linha) - set(colunas.keys())
+    if desconhecidos:
+        raise ValueError(f'Campos desconhecidos: {", ".join(sorted(desconhecidos))}')
+    try:
+        return {campo: _converter(colunas[campo], valor) for campo, valor in linha.items()}
+    except ValueError as e:
+        raise ValueError(f'Valor inválido: {e}')
+
+
+def _gravar_lote(tabela, modelo, lote):
+    """Inserir um lote (os campos ausentes recebem os defaults do modelo)"""
+    copiar_linhas(modelo, lote)
+    if tabela == 'musicas':
+        memorizar_musicas(lote)
+        registrar_variacoes(variacoes_musicas(lote))
+
+
+def _inserir(tabela, modelo, linhas, tamanho_lote, referencias):
+    total = 0
+    lote = []
+    for numero, linha in enumerate(linhas, start=1):
+        try:
+            lote.append(_preparar(tabela, modelo, linha, referencias))
+        except ValueError as e:
+            raise ValueError(f'{tabela}, registro {numero}: {e}')
+        if len(lote) >= tamanho_lote:
+            _gravar_lote(tabela, modelo, lote)
+            total += len(lote)
+            lote = []
+    _gravar_lote(tabela, modelo, lote)
+    return total + len(lote)
+
+
+def _adiar_indices(conexao, modelo):
+    """Remover os índices secundários (e o trigger da busca) antes de carregar a tabela vazia
+
+    Retorna a função que os recria depois da carga: construir um índice
+    sobre a tabela cheia é bem mais rápido que mantê-lo a cada insert.
+    """
+    indices = [indice for indice in modelo.__table__.indexes if not indice.unique]
+    for indice in indices:
+        indice.drop(conexao, checkfirst=True)
+
+    trigger = f'{TABELA_BUSCA}_ai'
+    busca = modelo is Musica and conexao.dialect.name == 'sqlite' and conexao.exec_driver_sql(
+        f"SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = '{trigger}'"
+    ).first() is not None
+    if busca:
+        conexao.exec_driver_sql(f'DROP TRIGGER {trigger}')
+
+    def recriar():
+        for indice in indices:
+            indice.create(conexao, checkfirst=True)
+        if busca:
+            conexao.exec_driver_sql(COMANDOS_BUSCA[1])
+            conexao.exec_driver_sql(f"INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}) VALUES ('rebuild')")
+
+    return recriar
+
+
+def _relaxar_pragmas(conexao):
+    """Aplicar PRAGMAS_CARGA à conexão da carga; retorna os valores anteriores"""
+    anteriores = {}
+    for nome, valor in PRAGMAS_CARGA.items():
+        anteriores[nome] = conexao.exec_driver_sql(f'PRAGMA {nome}').scalar()
+        conexao.exec_driver_sql(f'PRAGMA {nome} = {valor}')
+    return anteriores
+
+
+def carregar(fontes, tamanho_lote=TAMANHO_LOTE, adiar_indices=True, validar=True):
+    """Carregar as fontes {tabela: iterável de dicts} em uma única transação
+
+    Idempotente por tabela: tabelas que já têm registros são puladas (e
+    aparecem como None no resultado), as demais recebem todas as linhas da
+    fonte em inserts de `tamanho_lote` linhas (COPY no PostgreSQL). As
+    linhas podem referenciar categorias e estilos pelo código/nome (como na
+    importação de músicas) e locutores e emissoras por `locutor_codigo` e
+    `emissora_codigo`. Uma linha inválida desfaz a carga inteira
+    (ValueError com a tabela e o registro). Com `validar=False` (linhas
+    geradas, já com os tipos e ids certos) as músicas não passam pela
+    validação da importação.
+
+    Com `adiar_indices`, os índices das tabelas carregadas são criados só
+    depois dos inserts; no SQLite a conexão usa PRAGMAS_CARGA durante a
+    carga. Deve ser chamada sem escritas pendentes na sessão.
+    Retorna {tabela: linhas inseridas ou None}.
+    """
+    desconhecidas = set(fontes) - set(MODELOS)
+    if desconhecidas:
+        raise ValueError(f'Tabelas desconhecidas: {", ".join(sorted(desconhecidas))}')
+
+    conexao = db.session.connection()
+    sqlite = conexao.dialect.name == 'sqlite'
+    dbapi = conexao.connection.dbapi_connection
+    anteriores = _relaxar_pragmas(conexao) if sqlite else {}
+
+    resultado = OrderedDict()
+    referencias = _Referencias()
+    try:
+        # O pysqlite só abre a transação no primeiro INSERT: sem o BEGIN explícito
+        # o DROP INDEX/TRIGGER de _adiar_indices seria confirmado na hora e uma
+        # carga desfeita deixaria a tabela sem os índices e sem o trigger da busca
+        if sqlite and not dbapi.in_transaction:
+            conexao.exec_driver_sql('BEGIN')
+        for tabela, modelo in MODELOS.items():
+            if tabela not in fontes:
+                continue
+            if db.session.query(modelo.id).first() is not None:
+                resultado[tabela] = None
+                continue
+            # Categorias e estilos carregados nesta mesma transação já aparecem aqui
+            referencias.mapas_musicas = MapasReferencia() if tabela == 'musicas' and validar else None
+            recriar = _adiar_indices(conexao, modelo) if adiar_indices else None
+            resultado[tabela] = _inserir(tabela, modelo, fontes[tabela], tamanho_lote, referencias)
+            if recriar:
+                recriar()
+            if tabela == 'musicas':
+                # Índice de aniversários de uma vez, sobre a tabela cheia
+                reindexar(conexao)
+
+        carregadas = [tabela for tabela, total in resultado.items() if total is not None]
+        if carregadas:
+            registrar_alteracao(*carregadas)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        if anteriores:
+            cursor = dbapi.cursor()
+            try:
+                for nome, valor in anteriores.items():
+                    cursor.execute(f'PRAGMA {nome} = {valor}')
+            finally:
+                cursor.close()
+
+    # Os inserts em lote não passam pelo ORM: as tabelas de referência são relidas
+    for cache in REFERENCIAS.values():
+        cache.invalidar()
+    return resultado
@@ -0,0 +1,150 @@
+"""
+Dados sintéticos em volume de produção (auditoria de consultas e benchmarks)
+Sistema de Programação Musical
+"""
+import random
+from datetime import date, time, timedelta
+
+from sqlalchemy import insert
+
+from src.models.programacao import (
+    db, Categoria, Estilo, Emissora, Locutor, LocutorEmissora,
+    GradeProgramacao, GradeSequenciaCategoria, HorarioIntervalo
+)
+from src.services.carga_inicial import TAMANHO_LOTE, carregar
+from src.services.lote import gerar_lote
+
+PALAVRAS = [
+    'amor', 'saudade', 'coração', 'noite', 'estrada', 'lua', 'mar', 'sertão', 'cidade', 'tempo',
+    'vida', 'sonho', 'fogo', 'chuva', 'sol', 'beijo', 'paixão', 'festa', 'verão', 'segredo'
+]
+SOBRENOMES = ['Silva', 'Souza', 'Costa', 'Santos', 'Oliveira', 'Pereira', 'Lima', 'Gomes', 'Ribeiro', 'Alves']
+TIPOS = ['AC', 'AV', 'ER', 'RMX']
+
+
+def _interpretes(rng, quantidade):
+    """Nomes de intérpretes únicos"""
+    return [f'{rng.choice(PALAVRAS).title()} {rng.choice(SOBRENOMES)} {i}' for i in range(quantidade)]
+
+
+def _musica(rng, indice, interpretes, categoria_ids, estilo_ids):
+    # Poucos intérpretes concentram boa parte do catálogo (como num acervo real)
+    if rng.random() < 0.3:
+        posicao = min(int(rng.paretovariate(1.2)) - 1, len(interpretes) - 1)
+    else:
+        posicao = rng.randrange(len(interpretes))
+    interprete = interpretes[posicao]
+    dados = {
+        'interprete1': interprete,
+        'interprete2': rng.choice(interpretes) if rng.random() < 0.1 else None,
+        'interprete3': None,
+        'nome_musica': f'{rng.choice(PALAVRAS).title()} {rng.choice(PALAVRAS)} {indice}',
+        'tipo': rng.choice(TIPOS),
+        'categoria_id': rng.choice(categoria_ids),
+        'velocidade': rng.randint(1, 3),
+        'estilo_id': rng.choice(estilo_ids),
+        'ano_lancamento': rng.randint(1960, 2025),
+        'complemento': rng.choice(PALAVRAS) if rng.random() < 0.2 else None,
+        'duracao_padrao': time(0, rng.randint(2, 5), rng.randint(0, 59)),
+        'data_aniversario_interprete1': None,
+        'data_aniversario_interprete2': None,
+        'data_aniversario_interprete3': None
+    }
+    if rng.random() < 0.05:
+        dados['data_aniversario_interprete1'] = date(rng.randint(1940, 2000), 1, 1) + timedelta(days=rng.randrange(365))
+    return dados
+
+
+def _grade(rng, categoria_ids):
+    """Grade diária com sequência de categorias e dois breaks por hora"""
+    grade = GradeProgramacao(nome='Grade sintética', todos_dias=True)
+    db.session.add(grade)
+    db.session.flush()
+    sequencia = [rng.choice(categoria_ids) for _ in range(12)]
+    db.session.execute(insert(GradeSequenciaCategoria), [
+        {'grade_id': grade.id, 'categoria_id': categoria_id, 'ordem': ordem}
+        for ordem, categoria_id in enumerate(sequencia)
+    ])
+    horarios = []
+    for hora in range(24):
+        horarios.append({'grade_id': grade.id, 'hora': time(hora, 28), 'tipo': 'BC', 'duracao': time(0, 4), 'ordem': 1})
+        horarios.append({'grade_id': grade.id, 'hora': time(hora, 55), 'tipo': 'BC', 'duracao': time(0, 3), 'ordem': 2})
+    db.session.execute(insert(HorarioIntervalo), horarios)
+    return grade.id
+
+
+def fontes_sinteticas(musicas=200000, emissoras=50, locutores=200, locucoes=5000,
+                      categorias=20, estilos=15, semente=42):
+    """Fontes para `carga_inicial.carregar` com o catálogo sintético, sem grade nem programação
+
+    As linhas são geradas sob demanda: as músicas e locuções leem os ids das
+    tabelas carregadas antes delas (ou já existentes), na mesma transação.
+    """
+    rng = random.Random(semente)
+    interpretes = _interpretes(rng, max(musicas // 8, 1))
+
+    def _locutor_emissora():
+        emissora_ids = list(db.session.scalars(db.select(Emissora.id)))
+        for locutor_id in db.session.scalars(db.select(Locutor.id)).all():
+            for emissora_id in sorted(rng.sample(emissora_ids, min(3, len(emissora_ids)))):
+                yield {'locutor_id': locutor_id, 'emissora_id': emissora_id, 'ativo': True}
+
+    def _musicas():
+        categoria_ids = list(db.session.scalars(db.select(Categoria.id)))
+        estilo_ids = list(db.session.scalars(db.select(Estilo.id)))
+        for indice in range(musicas):
+            yield _musica(rng, indice, interpretes, categoria_ids, estilo_ids)
+
+    def _locucoes():
+        vinculos = db.session.execute(db.select(LocutorEmissora.locutor_id, LocutorEmissora.emissora_id)).all()
+        for _ in range(locucoes):
+            locutor_id, emissora_id = rng.choice(vinculos)
+            yield {
+                'emissora_id': emissora_id, 'locutor_id': locutor_id,
+                'interprete': rng.choice(interpretes), 'velocidade': rng.randint(1, 5), 'ativa': rng.random() < 0.9
+            }
+
+    return {
+        'estilos': [{'nome': f'Estilo {i}'} for i in range(estilos)],
+        'categorias': [{'codigo': f'C{i:02d}', 'nome': f'Categoria {i}'} for i in range(categorias)],
+        'locutores': [{'codigo': f'L{i:03d}', 'nome': f'Locutor {i}'} for i in range(locutores)],
+        'emissoras': [
+            {'codigo': f'R{i:03d}', 'nome': f'Rádio {i}', 'cidade': f'Cidade {i % 20}',
+             'estado': rng.choice(['SP', 'RJ', 'MG', 'BA', 'RS']), 'ativa': True}
+            for i in range(emissoras)
+        ],
+        'locutor_emissora': _locutor_emissora(),
+        'musicas': _musicas(),
+        'banco_locucoes': _locucoes()
+    }
+
+
+def gerar_dados_sinteticos(musicas=200000, emissoras=50, locutores=200, locucoes=5000, dias=7,
+                           categorias=20, estilos=15, semente=42, tamanho_lote=TAMANHO_LOTE, processos=None):
+    """Popular o banco atual com um catálogo sintético; retorna as quantidades inseridas
+
+    O catálogo de `fontes_sinteticas` (o mesmo de `init_data.py --sintetico`)
+    entra pela carga inicial, em uma transação com inserts em lote de
+    `tamanho_lote` linhas; depois vêm uma grade diária e a programação de
+    `dias` dias de todas as emissoras, pelo gerador de lote. Os valores
+    dependem só de `semente`.
+    """
+    resultado = carregar(
+        fontes_sinteticas(musicas=musicas, emissoras=emissoras, locutores=locutores, locucoes=locucoes,
+                          categorias=categorias, estilos=estilos, semente=semente),
+        tamanho_lote=tamanho_lote, validar=False
+    )
+
+    # Semente própria: a grade não muda o catálogo gerado com a mesma semente
+    _grade(random.Random(f'{semente}:grade'), list(db.session.scalars(db.select(Categoria.id))))
+    db.session.commit()
+
+    programacoes = 0
+    if dias:
+        programacoes = gerar_lote(date.today() - timedelta(days=dias), dias=dias, processos=processos)['geradas']
+    return {
+        'categorias': resultado['categorias'], 'estilos': resultado['estilos'],
+        'emissoras': resultado['emissoras'], 'locutores': resultado['locutores'],
+        'vinculos': resultado['locutor_emissora'], 'musicas': resultado['musicas'],
+        'locucoes': resultado['banco_locucoes'], 'programacoes': programacoes
+    }
@@ -0,0 +1,162 @@
+"""
+Versão do esquema do banco e migrações
+Sistema de Programação Musical
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import func, inspect, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.models.programacao import (
+    db, AniversarioInterprete, Musica, ProgramacaoGerada, ProgramacaoItem, VersaoEsquema
+)
+from src.services.aniversarios import reindexar
+from src.services.armazenamento import separar_conteudo
+from src.services.busca import garantir_indice_busca
+from src.services.postgres import garantir_indices_trigrama
+
+
+def _criar_tabelas(conexao):
+    """Tabelas que ainda não existem (bancos novos recebem o esquema completo)"""
+    db.metadata.create_all(bind=conexao)
+
+
+def _adicionar_coluna(conexao, coluna):
+    """ALTER TABLE ... ADD COLUMN, se a coluna ainda não existir"""
+    tabela = coluna.table.name
+    existentes = {item['name'] for item in inspect(conexao).get_columns(tabela)}
+    if coluna.name in existentes:
+        return
+    tipo = coluna.type.compile(dialect=conexao.dialect)
+    referencia = ''
+    for chave in coluna.foreign_keys:
+        referencia = f' REFERENCES {chave.column.table.name}({chave.column.name})'
+    conexao.exec_driver_sql(f'ALTER TABLE {tabela} ADD COLUMN {coluna.name} {tipo}{referencia}')
+
+
+def _colunas_exportacao_e_lote(conexao):
+    """Colunas e índices incluídos depois do esquema original"""
+    _adicionar_coluna(conexao, Musica.__table__.c.arquivo_audio)
+    _adicionar_coluna(conexao, ProgramacaoGerada.__table__.c.emissora_id)
+    for tabela in (ProgramacaoGerada.__table__, ProgramacaoItem.__table__):
+        for indice in tabela.indexes:
+            indice.create(bind=conexao, checkfirst=True)
+
+
+def _indices_do_modelo(conexao):
+    """Índices declarados nos modelos que o banco ainda não tem"""
+    for tabela in db.metadata.sorted_tables:
+        for indice in tabela.indexes:
+            indice.create(bind=conexao, checkfirst=True)
+
+
+def _indice_aniversarios(conexao):
+    """Tabela de aniversários por mês/dia, preenchida com as datas já cadastradas"""
+    AniversarioInterprete.__table__.create(bind=conexao, checkfirst=True)
+    for indice in AniversarioInterprete.__table__.indexes:
+        indice.create(bind=conexao, checkfirst=True)
+    reindexar(conexao)
+
+
+def _itens_das_programacoes_antigas(conexao):
+    """Levar para programacao_itens os itens das programações gravadas só no conteudo_json
+
+    Programações antigas com conteúdo em outro formato ficam como estão (o
+    modelo ainda lê os itens de dentro do JSON).
+    """
+    tabela = ProgramacaoGerada.__table__
+    antigas = conexao.execute(
+        select(tabela.c.id, tabela.c.conteudo_json).where(tabela.c.conteudo_json.like('%"itens"%'))
+    ).all()
+    for programacao_id, conteudo_json in antigas:
+        try:
+            conteudo = json.loads(conteudo_json)
+            if not any('itens' in bloco for bloco in conteudo.get('blocos', [])):
+                continue
+            cabecalho, itens = separar_conteudo(conteudo)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            continue
+        if itens:
+            conexao.execute(insert(ProgramacaoItem.__table__), [
+                dict(item, programacao_id=programacao_id) for item in itens
+            ])
+        conexao.execute(update(tabela).where(tabela.c.id == programacao_id).values(conteudo_json=cabecalho))
+
+
+def _remover_indice_categoria(conexao):
+    """idx_musicas_categoria é prefixo de idx_musicas_categoria_velocidade, que já atende os filtros"""
+    conexao.exec_driver_sql('DROP INDEX IF EXISTS idx_musicas_categoria')
+
+
+# (versão, descrição, função) em ordem; cada migração roda em uma transação
+# e só uma vez por banco. Novas alterações de esquema entram no fim da lista.
+MIGRACOES = [
+    (1, 'Tabelas do modelo', _criar_tabelas),
+    (2, 'Arquivo de áudio das músicas, emissora das programações e índices', _colunas_exportacao_e_lote),
+    (3, 'Índice de busca textual (FTS5)', garantir_indice_busca),
+    (4, 'Índices trigrama para ilike (PostgreSQL)', garantir_indices_trigrama),
+    (5, 'Índices dos filtros e ordenações das rotas', _indices_do_modelo),
+    (6, 'Índice de aniversários dos intérpretes', _indice_aniversarios),
+    (7, 'Itens das programações gravadas antes da tabela de itens', _itens_das_programacoes_antigas),
+    (8, 'Remoção do índice redundante de categoria das músicas', _remover_indice_categoria)
+]
+
+VERSAO_ESQUEMA = MIGRACOES[-1][0]
+
+
+def versao_banco(conexao):
+    """Última migração aplicada ao banco (0 se nenhuma)"""
+    if not inspect(conexao).has_table(VersaoEsquema.__tablename__):
+        return 0
+    return conexao.execute(select(func.max(VersaoEsquema.versao))).scalar() or 0
+
+
+def migrar_esquema(engine=None):
+    """Aplicar as migrações pendentes; retorna as versões aplicadas
+
+    Cada migração e o registro da sua versão ficam na mesma transação. Se
+    outro processo aplicar a mesma migração ao mesmo tempo, o registro
+    duplicado da versão desfaz a transação deste processo e a migração é
+    considerada aplicada.
+    """
+    engine = engine if engine is not None else db.engine
+    aplicadas = []
+    for versao, descricao, migracao in MIGRACOES:
+        try:
+            with engine.begin() as conexao:
+                if versao_banco(conexao) >= versao:
+                    continue
+                VersaoEsquema.__table__.create(bind=conexao, checkfirst=True)
+                migracao(conexao)
+                conexao.execute(insert(VersaoEsquema).values(
+                    versao=versao, descricao=descricao, aplicada_em=datetime.utcnow()
+                ))
+            aplicadas.append(versao)
+        except IntegrityError:
+            continue
+    return aplicadas
+
+
+def verificar_esquema(app, migrar=False):
+    """Conferir a versão do banco na inicialização (uma consulta)
+
+    Com `migrar=True` (desenvolvimento) as migrações pendentes são aplicadas;
+    sem isso, um banco desatualizado impede a inicialização, para que as
+    migrações rodem uma única vez no deploy (scripts/migrar_banco.py) e não em
+    cada worker.
+    """
+    with app.app_context():
+        with db.engine.connect() as conexao:
+            versao = versao_banco(conexao)
+        if versao < VERSAO_ESQUEMA:
+            if not migrar:
+                raise RuntimeError(
+                    f'Banco na versão {versao} do esquema, esperada {VERSAO_ESQUEMA}: '
+                    'execute python scripts/migrar_banco.py'
+                )
+            migrar_esquema()
+        elif versao > VERSAO_ESQUEMA:
+            app.logger.warning(
+                'Banco na versão %s do esquema, mais nova que a desta aplicação (%s)', versao, VERSAO_ESQUEMA
+            )
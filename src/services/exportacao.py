@@ -0,0 +1,205 @@
+"""
+Exportação da programação gerada para sistemas de automação (M3U, CSV e XML)
+Sistema de Programação Musical
+"""
+import csv
+import io
+from collections import namedtuple
+from xml.sax.saxutils import escape, quoteattr
+
+from src.models.programacao import db, Musica, Vinheta, Trilha, Comercial, ProgramacaoGerada, ProgramacaoItem
+from src.services.gerador import formatar_hora
+
+# Programações carregadas por vez: a memória depende do lote, não do período exportado
+LOTE_PROGRAMACOES = 10
+
+FORMATOS = {
+    'm3u': 'audio/x-mpegurl; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'xml': 'application/xml; charset=utf-8'
+}
+
+COLUNAS_CSV = [
+    'programacao_id', 'data', 'emissora_id', 'hora', 'tipo', 'referencia_id',
+    'titulo', 'interprete', 'duracao', 'arquivo_audio'
+]
+
+LinhaExportacao = namedtuple('LinhaExportacao', [
+    'hora', 'tipo', 'referencia_id', 'titulo', 'interprete', 'duracao', 'arquivo_audio'
+])
+
+Referencia = namedtuple('Referencia', ['titulo', 'interprete', 'arquivo_audio'])
+
+
+def _buscar_musicas(ids):
+    referencias = {}
+    for row in db.session.query(
+        Musica.id, Musica.interprete1, Musica.interprete2, Musica.interprete3,
+        Musica.nome_musica, Musica.arquivo_audio
+    ).filter(Musica.id.in_(ids)):
+        interpretes = ' / '.join(nome for nome in (row.interprete1, row.interprete2, row.interprete3) if nome)
+        referencias[row.id] = Referencia(row.nome_musica, interpretes, row.arquivo_audio)
+    return referencias
+
+
+def _buscar_por_nome(modelo, coluna):
+    def buscar(ids):
+        return {
+            row.id: Referencia(row.titulo, None, row.arquivo_audio)
+            for row in db.session.query(
+                modelo.id, coluna.label('titulo'), modelo.arquivo_audio
+            ).filter(modelo.id.in_(ids))
+        }
+    return buscar
+
+
+# Tipo do item -> consulta em lote das referências
+BUSCAS = {
+    'musica': _buscar_musicas,
+    'vinheta': _buscar_por_nome(Vinheta, Vinheta.nome),
+    'trilha': _buscar_por_nome(Trilha, Trilha.nome),
+    'comercial': _buscar_por_nome(Comercial, Comercial.titulo)
+}
+
+
+def resolver_referencias(itens):
+    """Resolver as referências dos itens com uma consulta por tipo"""
+    ids_por_tipo = {}
+    for item in itens:
+        referencia_id = item.musica_id if item.tipo == 'musica' else item.referencia_id
+        if referencia_id and item.tipo in BUSCAS:
+            ids_por_tipo.setdefault(item.tipo, set()).add(referencia_id)
+    return {
+        tipo: BUSCAS[tipo](list(ids))
+        for tipo, ids in ids_por_tipo.items()
+    }
+
+
+def selecionar_programacoes(ids=None, data_inicio=None, data_fim=None, emissora_ids=None):
+    """Cabeçalhos (id, data, emissora, grade) das programações a exportar, em ordem"""
+    query = db.session.query(
+        ProgramacaoGerada.id, ProgramacaoGerada.data_programacao,
+        ProgramacaoGerada.emissora_id, ProgramacaoGerada.grade_id
+    )
+    if ids is not None:
+        query = query.filter(ProgramacaoGerada.id.in_(ids))
+    if data_inicio:
+        query = query.filter(ProgramacaoGerada.data_programacao >= data_inicio)
+    if data_fim:
+        query = query.filter(ProgramacaoGerada.data_programacao <= data_fim)
+    if emissora_ids:
+        query = query.filter(ProgramacaoGerada.emissora_id.in_(emissora_ids))
+    return query.order_by(
+        ProgramacaoGerada.data_programacao, ProgramacaoGerada.emissora_id, ProgramacaoGerada.id
+    ).all()
+
+
+def iterar_programacoes(programacoes):
+    """Gerar (programação, linhas) lendo os itens em lotes de programações"""
+    for inicio in range(0, len(programacoes), LOTE_PROGRAMACOES):
+        lote = programacoes[inicio:inicio + LOTE_PROGRAMACOES]
+        itens = db.session.query(
+            ProgramacaoItem.programacao_id, ProgramacaoItem.hora, ProgramacaoItem.tipo,
+            ProgramacaoItem.musica_id, ProgramacaoItem.referencia_id, ProgramacaoItem.duracao
+        ).filter(
+            ProgramacaoItem.programacao_id.in_([programacao.id for programacao in lote])
+        ).order_by(
+            ProgramacaoItem.programacao_id, ProgramacaoItem.bloco, ProgramacaoItem.ordem
+        ).all()
+        referencias = resolver_referencias(itens)
+
+        itens_por_programacao = {}
+        for item in itens:
+            itens_por_programacao.setdefault(item.programacao_id, []).append(item)
+
+        for programacao in lote:
+            linhas = []
+            for item in itens_por_programacao.get(programacao.id, ()):
+                referencia_id = item.musica_id if item.tipo == 'musica' else item.referencia_id
+                referencia = referencias.get(item.tipo, {}).get(referencia_id)
+                linhas.append(LinhaExportacao(
+                    hora=item.hora,
+                    tipo=item.tipo,
+                    referencia_id=referencia_id,
+                    titulo=referencia.titulo if referencia else None,
+                    interprete=referencia.interprete if referencia else None,
+                    duracao=item.duracao,
+                    arquivo_audio=referencia.arquivo_audio if referencia else None
+                ))
+            yield programacao, linhas
+
+
+def _titulo_m3u(linha):
+    if linha.interprete and linha.titulo:
+        return f'{linha.interprete} - {linha.titulo}'
+    return linha.titulo or linha.tipo
+
+
+def exportar_m3u(programacoes):
+    """Playlist M3U estendida; itens sem arquivo usam o identificador tipo:id"""
+    yield '#EXTM3U\n'
+    for programacao, linhas in iterar_programacoes(programacoes):
+        partes = [
+            f'# Programação {programacao.id} - {programacao.data_programacao.isoformat()}'
+            f' - emissora {programacao.emissora_id or "-"}\n'
+        ]
+        for linha in linhas:
+            if linha.referencia_id is None:
+                # Intervalo sem conteúdo definido (ex.: break comercial da grade)
+                partes.append(f'# {formatar_hora(linha.hora)} {linha.tipo.upper()} {formatar_hora(linha.duracao)}\n')
+                continue
+            titulo = ' '.join(_titulo_m3u(linha).split())
+            partes.append(f'#EXTINF:{linha.duracao},{titulo}\n')
+            partes.append(f'{linha.arquivo_audio or f"{linha.tipo}:{linha.referencia_id}"}\n')
+        yield ''.join(partes)
+
+
+def exportar_csv(programacoes):
+    """Uma linha por item, com cabeçalho"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUNAS_CSV)
+    for programacao, linhas in iterar_programacoes(programacoes):
+        data = programacao.data_programacao.isoformat()
+        for linha in linhas:
+            writer.writerow([
+                programacao.id, data, programacao.emissora_id, formatar_hora(linha.hora),
+                linha.tipo, linha.referencia_id, linha.titulo, linha.interprete,
+                formatar_hora(linha.duracao), linha.arquivo_audio
+            ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _elemento(nome, valor):
+    return f'<{nome}>{escape(str(valor))}</{nome}>' if valor is not None else ''
+
+
+def exportar_xml(programacoes):
+    """Log genérico em XML: <programacoes><programacao><item/></programacao></programacoes>"""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<programacoes>\n'
+    for programacao, linhas in iterar_programacoes(programacoes):
+        partes = [
+            f'  <programacao id="{programacao.id}" data="{programacao.data_programacao.isoformat()}"'
+            f' emissora_id="{programacao.emissora_id or ""}" grade_id="{programacao.grade_id or ""}">\n'
+        ]
+        for linha in linhas:
+            referencia = f' referencia_id="{linha.referencia_id}"' if linha.referencia_id is not None else ''
+            partes.append(
+                f'    <item hora="{formatar_hora(linha.hora)}" tipo={quoteattr(linha.tipo)}{referencia}'
+                f' duracao="{formatar_hora(linha.duracao)}">'
+                f'{_elemento("titulo", linha.titulo)}{_elemento("interprete", linha.interprete)}'
+                f'{_elemento("arquivo", linha.arquivo_audio)}</item>\n'
+            )
+        partes.append('  </programacao>\n')
+        yield ''.join(partes)
+    yield '</programacoes>\n'
+
+
+EXPORTADORES = {
+    'm3u': exportar_m3u,
+    'csv': exportar_csv,
+    'xml': exportar_xml
+}
@@ -0,0 +1,383 @@
+"""
+Motor de geração da programação diária a partir de uma grade
+Sistema de Programação Musical
+"""
+import random
+from collections import namedtuple
+
+from sqlalchemy import select, String, type_coerce
+
+from src.models.programacao import (
+    db, Musica, AniversarioInterprete, GradeProgramacao, GradeSequenciaCategoria, HorarioIntervalo
+)
+from src.services.aniversarios import condicao_periodo, dias_do_periodo
+from src.services.historico import (
+    SEGUNDOS_DIA, HistoricoExecucoes, carregar_historico, instante_absoluto, normalizar_interprete
+)
+
+DURACAO_PADRAO = 210  # 3:30, mesmo padrão de Musica.duracao_padrao
+
+# Regras de repetição padrão (em minutos)
+SEPARACAO_MUSICA_PADRAO = 180
+SEPARACAO_INTERPRETE_PADRAO = 60
+
+# Limite de candidatas avaliadas por posição antes de relaxar as regras
+MAX_TENTATIVAS = 200
+
+Candidata = namedtuple('Candidata', ['id', 'categoria_id', 'interpretes', 'chaves_interpretes', 'nome_musica', 'duracao'])
+
+
+def para_segundos(valor):
+    """Converter um datetime.time em segundos desde 00:00:00"""
+    if valor is None:
+        return 0
+    return valor.hour * 3600 + valor.minute * 60 + valor.second
+
+
+def formatar_hora(segundos):
+    """Formatar segundos como HH:MM:SS (pode passar de 24h no último item do dia)"""
+    horas, resto = divmod(int(segundos), 3600)
+    minutos, segs = divmod(resto, 60)
+    return f'{horas:02d}:{minutos:02d}:{segs:02d}'
+
+
+def grade_vale_para(grade, data):
+    """Verificar se a grade se aplica ao dia da semana da data"""
+    dia_semana = data.weekday()  # 0=segunda ... 6=domingo
+    if grade.todos_dias:
+        return True
+    if grade.segunda_sexta and dia_semana < 5:
+        return True
+    if grade.fim_semana and dia_semana >= 5:
+        return True
+    dias = {1: grade.terca, 2: grade.quarta, 3: grade.quinta, 4: grade.sexta, 5: grade.sabado, 6: grade.domingo}
+    return bool(dias.get(dia_semana))
+
+
+def selecionar_grade(data):
+    """Selecionar a primeira grade ativa que se aplica à data"""
+    grades = GradeProgramacao.query.filter_by(ativa=True).order_by(GradeProgramacao.id).all()
+    for grade in grades:
+        if grade_vale_para(grade, data):
+            return grade
+    return None
+
+
+def carregar_grade(grade):
+    """Carregar a sequência de categorias e os intervalos da grade em estruturas simples"""
+    sequencia = [
+        row.categoria_id for row in db.session.query(GradeSequenciaCategoria.categoria_id).filter_by(
+            grade_id=grade.id
+        ).order_by(GradeSequenciaCategoria.ordem, GradeSequenciaCategoria.id)
+    ]
+    intervalos = [
+        (row.id, para_segundos(row.hora), row.tipo, para_segundos(row.duracao))
+        for row in db.session.query(
+            HorarioIntervalo.id, HorarioIntervalo.hora, HorarioIntervalo.tipo, HorarioIntervalo.duracao
+        ).filter_by(grade_id=grade.id).order_by(HorarioIntervalo.hora, HorarioIntervalo.ordem)
+    ]
+    return {'id': grade.id, 'sequencia': sequencia, 'intervalos': intervalos}
+
+
+def _segundos_duracao(valor):
+    """Converter a duração crua da consulta em segundos
+
+    O SQLite guarda Time como texto 'HH:MM:SS[.ffffff]'; o PostgreSQL
+    devolve datetime.time.
+    """
+    if not valor:
+        return 0
+    if not isinstance(valor, str):
+        return para_segundos(valor)
+    try:
+        return int(valor[0:2]) * 3600 + int(valor[3:5]) * 60 + int(valor[6:8])
+    except ValueError:
+        return 0
+
+
+def criar_candidata(linha, chaves_cache=None):
+    """Montar a Candidata a partir da linha crua do catálogo"""
+    musica_id, categoria_id, int1, int2, int3, nome_musica, duracao = linha
+    interpretes = tuple(nome for nome in (int1, int2, int3) if nome)
+    chaves = []
+    for nome in interpretes:
+        chave = chaves_cache.get(nome) if chaves_cache is not None else None
+        if chave is None:
+            chave = normalizar_interprete(nome)
+            if chaves_cache is not None:
+                chaves_cache[nome] = chave
+        if chave and chave not in chaves:
+            chaves.append(chave)
+    return Candidata(
+        musica_id, categoria_id, interpretes, tuple(chaves), nome_musica,
+        _segundos_duracao(duracao) or DURACAO_PADRAO
+    )
+
+
+def carregar_catalogo(categoria_ids):
+    """Carregar de uma só vez as músicas candidatas de cada categoria
+
+    As linhas ficam cruas (tuplas) e só viram Candidata quando o gerador as
+    avalia, já que um dia usa poucas centenas de músicas de um catálogo de
+    centenas de milhares.
+    """
+    catalogo = {categoria_id: [] for categoria_id in categoria_ids}
+    if not catalogo:
+        return catalogo
+
+    stmt = select(
+        Musica.id, Musica.categoria_id, Musica.interprete1, Musica.interprete2, Musica.interprete3,
+        Musica.nome_musica, type_coerce(Musica.duracao_padrao, String)
+    ).where(Musica.categoria_id.in_(list(catalogo))).order_by(Musica.id)
+
+    for linha in db.session.connection().execute(stmt).tuples().all():
+        catalogo[linha[1]].append(linha)
+    return catalogo
+
+
+def carregar_aniversariantes(categoria_ids, datas):
+    """Músicas das categorias com aniversário de algum intérprete em cada data
+
+    Uma consulta pelo índice de aniversários (mês/dia), sem percorrer o
+    catálogo. Retorna {data ISO: {categoria_id: [linhas]}}, com as linhas
+    no mesmo formato de `carregar_catalogo`.
+    """
+    aniversariantes = {}
+    if not categoria_ids or not datas:
+        return aniversariantes
+
+    inicio, fim = min(datas), max(datas)
+    dias = dias_do_periodo(inicio, fim)
+    pedidas = {dia.isoformat() for dia in datas}
+    stmt = select(
+        Musica.id, Musica.categoria_id, Musica.interprete1, Musica.interprete2, Musica.interprete3,
+        Musica.nome_musica, type_coerce(Musica.duracao_padrao, String), AniversarioInterprete.mes_dia
+    ).join(AniversarioInterprete, AniversarioInterprete.musica_id == Musica.id).where(
+        condicao_periodo(inicio, fim), Musica.categoria_id.in_(list(categoria_ids))
+    ).order_by(AniversarioInterprete.mes_dia, AniversarioInterprete.musica_id)
+
+    vistas = set()
+    for linha in db.session.connection().execute(stmt).tuples():
+        data_iso = dias[linha[7]].isoformat()
+        if data_iso not in pedidas or (data_iso, linha[0]) in vistas:
+            continue
+        vistas.add((data_iso, linha[0]))
+        aniversariantes.setdefault(data_iso, {}).setdefault(linha[1], []).append(tuple(linha[:7]))
+    return aniversariantes
+
+
+def montar_blocos(intervalos):
+    """Dividir as 24h do dia em blocos a partir dos horários de intervalo da grade
+
+    Os trechos não cobertos por nenhum intervalo viram blocos musicais, de modo
+    que a programação sempre ocupa o dia inteiro.
+    """
+    blocos = []
+    cursor = 0
+    for intervalo_id, hora, tipo, duracao in intervalos:
+        inicio = max(hora, cursor)
+        fim = min(hora + duracao, SEGUNDOS_DIA)
+        if inicio > cursor:
+            blocos.append({'inicio': cursor, 'fim': inicio, 'tipo': 'BM', 'horario_intervalo_id': None})
+        if fim > inicio:
+            blocos.append({'inicio': inicio, 'fim': fim, 'tipo': tipo, 'horario_intervalo_id': intervalo_id})
+        cursor = max(cursor, fim)
+    if cursor < SEGUNDOS_DIA:
+        blocos.append({'inicio': cursor, 'fim': SEGUNDOS_DIA, 'tipo': 'BM', 'horario_intervalo_id': None})
+    return blocos
+
+
+class GeradorProgramacao:
+    """Gera o conteúdo de um dia a partir da grade e do catálogo já carregados"""
+
+    def __init__(self, grade, catalogo, separacao_musica=SEPARACAO_MUSICA_PADRAO,
+                 separacao_interprete=SEPARACAO_INTERPRETE_PADRAO, semente=None, historico=None,
+                 aniversariantes=None):
+        if not grade['sequencia']:
+            raise ValueError('Grade sem sequência de categorias')
+        self.grade = grade
+        self.separacao_musica = separacao_musica * 60
+        self.separacao_interprete = separacao_interprete * 60
+        self.rng = random.Random(semente)
+
+        # Histórico da emissora compartilhado entre dias consecutivos
+        if historico is None:
+            historico = HistoricoExecucoes(janela=max(self.separacao_musica, self.separacao_interprete))
+        self.historico = historico
+        self._base = 0
+
+        # Cada categoria vira um "baralho" embaralhado percorrido em rodízio
+        self._baralhos = {}
+        self._posicoes = {}
+        for categoria_id, candidatas in catalogo.items():
+            baralho = list(candidatas)
+            self.rng.shuffle(baralho)
+            self._baralhos[categoria_id] = baralho
+            self._posicoes[categoria_id] = 0
+
+        self._chaves_cache = {}
+
+        # Músicas de aniversariantes ({data ISO: {categoria_id: [linhas]}}):
+        # tocam antes do rodízio, uma vez no dia, se as regras permitirem
+        self._aniversariantes = aniversariantes or {}
+        self._destaques = {}
+
+    def _candidata(self, baralho, indice):
+        """Converter sob demanda a linha crua do baralho em Candidata"""
+        item = baralho[indice]
+        if not isinstance(item, Candidata):
+            item = baralho[indice] = criar_candidata(item, self._chaves_cache)
+        return item
+
+    def _livre(self, candidata, instante):
+        """Verificar as regras de repetição de música e intérprete"""
+        return self.historico.livre(
+            candidata.id, candidata.chaves_interpretes, instante,
+            self.separacao_musica, self.separacao_interprete
+        )
+
+    def _escolher_destaque(self, categoria_id, instante):
+        """Primeira música de aniversariante do dia livre na categoria (sai da lista ao tocar)"""
+        destaques = self._destaques.get(categoria_id)
+        if not destaques:
+            return None
+        for indice in range(len(destaques)):
+            candidata = self._candidata(destaques, indice)
+            if self._livre(candidata, instante):
+                del destaques[indice]
+                self.historico.registrar(instante, candidata.id, candidata.chaves_interpretes)
+                return candidata
+        return None
+
+    def _escolher(self, categoria_id, instante):
+        """Escolher a próxima música da categoria respeitando as regras de repetição"""
+        candidata = self._escolher_destaque(categoria_id, instante)
+        if candidata is not None:
+            return candidata
+
+        baralho = self._baralhos.get(categoria_id)
+        if not baralho:
+            return None
+
+        total = len(baralho)
+        posicao = self._posicoes[categoria_id] % total
+        escolhida = None
+        for tentativa in range(min(total, MAX_TENTATIVAS)):
+            indice = (posicao + tentativa) % total
+            if self._livre(self._candidata(baralho, indice), instante):
+                escolhida = indice
+                break
+        if escolhida is None:
+            # Nenhuma candidata livre: relaxar as regras e seguir o rodízio
+            escolhida = posicao
+
+        # Trazer a escolhida para a posição atual e avançar, preservando as puladas
+        baralho[posicao], baralho[escolhida] = baralho[escolhida], baralho[posicao]
+        self._posicoes[categoria_id] = posicao + 1
+        candidata = self._candidata(baralho, posicao)
+        self.historico.registrar(instante, candidata.id, candidata.chaves_interpretes)
+        return candidata
+
+    def _preencher_bloco(self, bloco, sequencia, posicao_sequencia):
+        """Preencher um bloco musical seguindo a sequência de categorias"""
+        itens = []
+        cursor = bloco['inicio']
+        falhas = 0
+        while cursor < bloco['fim'] and falhas < len(sequencia):
+            posicao = posicao_sequencia % len(sequencia)
+            categoria_id = sequencia[posicao]
+            posicao_sequencia += 1
+            candidata = self._escolher(categoria_id, self._base + cursor)
+            if candidata is None:
+                falhas += 1
+                continue
+            falhas = 0
+            itens.append({
+                'hora': formatar_hora(cursor),
+                'tipo': 'musica',
+                'musica_id': candidata.id,
+                'categoria_id': candidata.categoria_id,
+                'interprete': ' / '.join(candidata.interpretes),
+                'nome_musica': candidata.nome_musica,
+                'duracao': formatar_hora(candidata.duracao),
+                'posicao': posicao
+            })
+            cursor += candidata.duracao
+        return itens, posicao_sequencia
+
+    def gerar_bloco(self, data, bloco, indice, sequencia, posicao_sequencia):
+        """Gerar um único bloco do dia a partir da posição informada da sequência"""
+        self._base = instante_absoluto(data, 0)
+        saida = {
+            'indice': indice,
+            'inicio': formatar_hora(bloco['inicio']),
+            'fim': formatar_hora(bloco['fim']),
+            'tipo': bloco['tipo'],
+            'horario_intervalo_id': bloco['horario_intervalo_id']
+        }
+        if bloco['tipo'] == 'BC':
+            saida['itens'] = [{
+                'hora': formatar_hora(bloco['inicio']),
+                'tipo': 'comercial',
+                'duracao': formatar_hora(bloco['fim'] - bloco['inicio'])
+            }]
+        else:
+            saida['posicao_sequencia'] = posicao_sequencia
+            saida['itens'], posicao_sequencia = self._preencher_bloco(bloco, sequencia, posicao_sequencia)
+        return saida, posicao_sequencia
+
+    def gerar(self, data, grade=None):
+        """Gerar a programação completa (24h) da data
+
+        Chamadas sucessivas (dias consecutivos) continuam o rodízio dos
+        baralhos e o histórico de execuções; `grade` permite trocar a grade
+        de um dia para outro (dias úteis e fim de semana, por exemplo).
+        """
+        grade = grade or self.grade
+        if not grade['sequencia']:
+            raise ValueError('Grade sem sequência de categorias')
+        self._destaques = {}
+        for categoria_id, linhas in self._aniversariantes.get(data.isoformat(), {}).items():
+            destaques = list(linhas)
+            self.rng.shuffle(destaques)
+            self._destaques[categoria_id] = destaques
+        blocos = []
+        posicao_sequencia = 0
+        for indice, bloco in enumerate(montar_blocos(grade['intervalos'])):
+            saida, posicao_sequencia = self.gerar_bloco(data, bloco, indice, grade['sequencia'], posicao_sequencia)
+            blocos.append(saida)
+
+        return {
+            'data': data.isoformat(),
+            'grade_id': grade['id'],
+            'sequencia': list(grade['sequencia']),
+            'total_musicas': contar_musicas(blocos),
+            'blocos': blocos
+        }
+
+
+def contar_musicas(blocos):
+    """Total de músicas nos blocos de um conteúdo gerado"""
+    return sum(1 for bloco in blocos for item in bloco['itens'] if item['tipo'] == 'musica')
+
+
+def gerar_programacao_dia(grade, data, emissora_id=None, priorizar_aniversarios=False, **opcoes):
+    """Carregar grade, catálogo e histórico da emissora e gerar o dia
+
+    Com `priorizar_aniversarios`, as músicas de intérpretes que fazem
+    aniversário na data entram antes do rodízio de cada categoria.
+    """
+    snapshot = carregar_grade(grade)
+    catalogo = carregar_catalogo(set(snapshot['sequencia']))
+    if priorizar_aniversarios:
+        opcoes['aniversariantes'] = carregar_aniversariantes(set(snapshot['sequencia']), [data])
+    if opcoes.get('semente') is None:
+        opcoes['semente'] = f'{emissora_id}:{grade.id}:{data.isoformat()}'
+    separacao_musica = opcoes.get('separacao_musica', SEPARACAO_MUSICA_PADRAO)
+    separacao_interprete = opcoes.get('separacao_interprete', SEPARACAO_INTERPRETE_PADRAO)
+    opcoes['historico'] = carregar_historico(
+        emissora_id, data, max(separacao_musica, separacao_interprete) * 60
+    )
+    conteudo = GeradorProgramacao(snapshot, catalogo, **opcoes).gerar(data)
+    conteudo['emissora_id'] = emissora_id
+    return conteudo
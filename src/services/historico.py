@@ -0,0 +1,219 @@
+"""
+Índice em memória das execuções recentes por emissora (regras de repetição)
+Sistema de Programação Musical
+"""
+import bisect
+import unicodedata
+from datetime import date
+
+from src.models.programacao import db, Musica, ProgramacaoGerada, ProgramacaoItem
+
+SEGUNDOS_DIA = 24 * 60 * 60
+CAPACIDADE_INICIAL = 512
+
+
+def normalizar_interprete(nome):
+    """Chave normalizada do intérprete: sem acentos, minúsculas e espaços simples"""
+    if not nome:
+        return None
+    texto = unicodedata.normalize('NFKD', nome)
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = ' '.join(texto.casefold().split())
+    return texto or None
+
+
+def ler_hora(texto):
+    """Converter 'HH:MM:SS' (pode passar de 24h) em segundos"""
+    horas, minutos, segundos = (int(parte) for parte in texto.split(':'))
+    return horas * 3600 + minutos * 60 + segundos
+
+
+def instante_absoluto(data, segundos):
+    """Converter data + segundos do dia em um instante contínuo entre dias"""
+    return data.toordinal() * SEGUNDOS_DIA + segundos
+
+
+class HistoricoExecucoes:
+    """Execuções recentes de uma emissora
+
+    As execuções ficam em um buffer circular em ordem cronológica e dois mapas
+    guardam o último instante de cada música e de cada intérprete. As
+    verificações de separação são consultas O(1) aos mapas; o buffer só serve
+    para expirar o que saiu da janela e manter a memória limitada.
+    """
+
+    def __init__(self, emissora_id=None, janela=SEGUNDOS_DIA):
+        self.emissora_id = emissora_id
+        self.janela = janela
+        self._buffer = [None] * CAPACIDADE_INICIAL
+        self._inicio = 0
+        self._tamanho = 0
+        self.ultima_musica = {}
+        self.ultimo_interprete = {}
+
+    def __len__(self):
+        return self._tamanho
+
+    def _crescer(self):
+        capacidade = len(self._buffer)
+        ordenado = [self._buffer[(self._inicio + i) % capacidade] for i in range(self._tamanho)]
+        self._buffer = ordenado + [None] * capacidade
+        self._inicio = 0
+
+    def _expirar(self, instante):
+        """Remover do início do buffer as execuções fora da janela"""
+        capacidade = len(self._buffer)
+        limite = instante - self.janela
+        while self._tamanho:
+            momento, musica_id, chaves = self._buffer[self._inicio]
+            if momento >= limite:
+                break
+            self._buffer[self._inicio] = None
+            self._inicio = (self._inicio + 1) % capacidade
+            self._tamanho -= 1
+            # Só remove dos mapas se não houve execução mais recente
+            if self.ultima_musica.get(musica_id) == momento:
+                del self.ultima_musica[musica_id]
+            for chave in chaves:
+                if self.ultimo_interprete.get(chave) == momento:
+                    del self.ultimo_interprete[chave]
+
+    def registrar(self, instante, musica_id, chaves_interpretes):
+        """Registrar uma execução (instantes devem chegar em ordem crescente)"""
+        self._expirar(instante)
+        if self._tamanho == len(self._buffer):
+            self._crescer()
+        fim = (self._inicio + self._tamanho) % len(self._buffer)
+        self._buffer[fim] = (instante, musica_id, chaves_interpretes)
+        self._tamanho += 1
+        self.ultima_musica[musica_id] = instante
+        for chave in chaves_interpretes:
+            self.ultimo_interprete[chave] = instante
+
+    def musica_tocou(self, musica_id, instante, separacao):
+        """A música tocou nos últimos `separacao` segundos?"""
+        ultima = self.ultima_musica.get(musica_id)
+        return ultima is not None and instante - ultima < separacao
+
+    def interprete_tocou(self, chave, instante, separacao):
+        """O intérprete (chave normalizada) tocou nos últimos `separacao` segundos?"""
+        ultima = self.ultimo_interprete.get(chave)
+        return ultima is not None and instante - ultima < separacao
+
+    def livre(self, musica_id, chaves_interpretes, instante, separacao_musica, separacao_interprete):
+        """Verificar as regras de separação de música e intérprete"""
+        if self.musica_tocou(musica_id, instante, separacao_musica):
+            return False
+        for chave in chaves_interpretes:
+            if self.interprete_tocou(chave, instante, separacao_interprete):
+                return False
+        return True
+
+
+class HistoricoBidirecional:
+    """Execuções fixas antes e depois de um trecho que será regenerado
+
+    Usado na regeneração parcial de um dia: a música escolhida precisa
+    respeitar a separação tanto em relação ao que toca antes quanto ao que
+    continua tocando depois do bloco. Mesma interface de HistoricoExecucoes.
+    """
+
+    def __init__(self, execucoes=(), emissora_id=None):
+        self.emissora_id = emissora_id
+        self._musicas = {}
+        self._interpretes = {}
+        for instante, musica_id, chaves in sorted(execucoes):
+            self._musicas.setdefault(musica_id, []).append(instante)
+            for chave in chaves:
+                self._interpretes.setdefault(chave, []).append(instante)
+
+    @staticmethod
+    def _proximo(instantes, instante, separacao):
+        if not instantes:
+            return False
+        posicao = bisect.bisect_left(instantes, instante)
+        if posicao < len(instantes) and instantes[posicao] - instante < separacao:
+            return True
+        return posicao > 0 and instante - instantes[posicao - 1] < separacao
+
+    def registrar(self, instante, musica_id, chaves_interpretes):
+        bisect.insort(self._musicas.setdefault(musica_id, []), instante)
+        for chave in chaves_interpretes:
+            bisect.insort(self._interpretes.setdefault(chave, []), instante)
+
+    def livre(self, musica_id, chaves_interpretes, instante, separacao_musica, separacao_interprete):
+        """Verificar a separação nos dois sentidos do tempo"""
+        if self._proximo(self._musicas.get(musica_id), instante, separacao_musica):
+            return False
+        for chave in chaves_interpretes:
+            if self._proximo(self._interpretes.get(chave), instante, separacao_interprete):
+                return False
+        return True
+
+
+def execucoes_do_conteudo(data, conteudo, ignorar_blocos=()):
+    """Extrair (instante, musica_id) das músicas de um conteúdo gerado"""
+    execucoes = []
+    for bloco in conteudo.get('blocos', []):
+        if bloco.get('indice') in ignorar_blocos:
+            continue
+        for item in bloco.get('itens', []):
+            if item.get('tipo') == 'musica' and item.get('musica_id'):
+                execucoes.append((instante_absoluto(data, ler_hora(item['hora'])), item['musica_id']))
+    return execucoes
+
+
+def resolver_chaves(execucoes):
+    """Completar (instante, musica_id) com as chaves dos intérpretes em uma única consulta"""
+    if not execucoes:
+        return []
+    musica_ids = {musica_id for _, musica_id in execucoes}
+    chaves_por_musica = {}
+    for row in db.session.query(Musica.id, Musica.interprete1, Musica.interprete2, Musica.interprete3).filter(
+        Musica.id.in_(musica_ids)
+    ):
+        chaves = {normalizar_interprete(nome) for nome in (row.interprete1, row.interprete2, row.interprete3)}
+        chaves_por_musica[row.id] = tuple(chaves - {None})
+    return [(instante, musica_id, chaves_por_musica.get(musica_id, ())) for instante, musica_id in execucoes]
+
+
+def carregar_execucoes(emissora_id, inicio, fim, ignorar_ids=()):
+    """Execuções da emissora entre os instantes `inicio` e `fim` (programações já gravadas)
+
+    Consulta direta à tabela de itens, sem desserializar os dias inteiros.
+    """
+    # O dia anterior entra porque o último item de um dia pode passar da meia-noite
+    query = db.session.query(
+        ProgramacaoGerada.data_programacao, ProgramacaoItem.hora, ProgramacaoItem.musica_id
+    ).join(ProgramacaoItem, ProgramacaoItem.programacao_id == ProgramacaoGerada.id).filter(
+        ProgramacaoGerada.emissora_id == emissora_id,
+        ProgramacaoGerada.data_programacao >= date.fromordinal(inicio // SEGUNDOS_DIA - 1),
+        ProgramacaoGerada.data_programacao <= date.fromordinal(fim // SEGUNDOS_DIA),
+        ProgramacaoItem.tipo == 'musica'
+    )
+    if ignorar_ids:
+        query = query.filter(ProgramacaoGerada.id.notin_(list(ignorar_ids)))
+
+    execucoes = []
+    for data_programacao, hora, musica_id in query:
+        instante = instante_absoluto(data_programacao, hora)
+        if inicio <= instante < fim:
+            execucoes.append((instante, musica_id))
+    return execucoes
+
+
+def carregar_historico(emissora_id, data, janela):
+    """Montar o histórico da emissora com as programações anteriores à data
+
+    Lê apenas os dias que cabem na janela e resolve os intérpretes de todas as
+    músicas executadas com uma única consulta.
+    """
+    historico = HistoricoExecucoes(emissora_id, janela)
+    if janela <= 0:
+        return historico
+
+    inicio_dia = instante_absoluto(data, 0)
+    execucoes = carregar_execucoes(emissora_id, inicio_dia - janela, inicio_dia)
+    for instante, musica_id, chaves in sorted(resolver_chaves(execucoes)):
+        historico.registrar(instante, musica_id, chaves)
+    return historico
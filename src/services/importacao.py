@@ -0,0 +1,190 @@
+"""
+Importação em lote do catálogo de músicas (CSV e JSON Lines)
+Sistema de Programação Musical
+"""
+import csv
+import json
+from datetime import datetime
+
+from sqlalchemy import func
+
+from src.models.programacao import db, Musica, Categoria, Estilo
+from src.services.aniversarios import reindexar, tem_aniversario
+from src.services.autocompletar import memorizar_musicas
+from src.services.interpretes import registrar_variacoes, variacoes_musicas
+from src.services.postgres import copiar_linhas
+from src.services.versoes import registrar_alteracao
+
+TAMANHO_LOTE = 1000
+MAX_ERROS = 1000
+
+CAMPOS_TEXTO = ['interprete1', 'interprete2', 'interprete3', 'nome_musica', 'tipo', 'complemento', 'arquivo_audio']
+CAMPOS_INTEIROS = ['categoria_id', 'estilo_id', 'velocidade', 'ano_lancamento']
+CAMPOS_DATAS = ['data_aniversario_interprete1', 'data_aniversario_interprete2', 'data_aniversario_interprete3']
+CAMPOS_OBRIGATORIOS = ['interprete1', 'nome_musica', 'ano_lancamento', 'categoria_id']
+
+
+def ler_csv(arquivo):
+    """Linhas de um CSV com cabeçalho (valores vazios viram None)"""
+    for linha in csv.DictReader(arquivo):
+        yield {chave.strip(): (valor.strip() or None) if isinstance(valor, str) else valor
+               for chave, valor in linha.items() if chave}
+
+
+def ler_jsonl(arquivo):
+    """Um objeto JSON por linha (linhas em branco são ignoradas)"""
+    for texto in arquivo:
+        texto = texto.strip()
+        if not texto:
+            yield None
+            continue
+        try:
+            objeto = json.loads(texto)
+        except ValueError as e:
+            yield ValueError(f'JSON inválido: {e}')
+            continue
+        yield objeto if isinstance(objeto, dict) else ValueError('Cada linha deve ser um objeto JSON')
+
+
+# Formato -> (leitor, número da primeira linha de dados)
+LEITORES = {
+    'csv': (ler_csv, 2),
+    'jsonl': (ler_jsonl, 1)
+}
+
+
+def importar_arquivo(arquivo, formato, tamanho_lote=TAMANHO_LOTE):
+    """Importar um arquivo de texto aberto no formato informado (csv ou jsonl)"""
+    leitor, primeira_linha = LEITORES[formato]
+    return importar_musicas(leitor(arquivo), tamanho_lote=tamanho_lote, primeira_linha=primeira_linha)
+
+
+class MapasReferencia:
+    """Categorias e estilos carregados uma única vez para validar o arquivo inteiro"""
+
+    def __init__(self):
+        self.categorias = dict(db.session.query(Categoria.codigo, Categoria.id))
+        self.categoria_ids = set(self.categorias.values())
+        self.estilos = dict(db.session.query(Estilo.nome, Estilo.id))
+        self.estilo_ids = set(self.estilos.values())
+
+
+def validar_linha(linha, mapas):
+    """Converter e validar uma linha; retorna os dados da música ou levanta ValueError
+
+    Aceita `categoria_codigo` no lugar de `categoria_id` e `estilo` (nome) no
+    lugar de `estilo_id`.
+    """
+    dados = {}
+    for campo in CAMPOS_TEXTO:
+        valor = linha.get(campo)
+        dados[campo] = str(valor) if valor not in (None, '') else None
+
+    if not linha.get('categoria_id') and linha.get('categoria_codigo'):
+        codigo = str(linha['categoria_codigo'])
+        if codigo not in mapas.categorias:
+            raise ValueError(f'Categoria {codigo} não encontrada')
+        linha = dict(linha, categoria_id=mapas.categorias[codigo])
+    if not linha.get('estilo_id') and linha.get('estilo'):
+        estilo = str(linha['estilo'])
+        if estilo not in mapas.estilos:
+            raise ValueError(f'Estilo {estilo} não encontrado')
+        linha = dict(linha, estilo_id=mapas.estilos[estilo])
+
+    for campo in CAMPOS_INTEIROS:
+        valor = linha.get(campo)
+        if valor in (None, ''):
+            dados[campo] = None
+            continue
+        try:
+            dados[campo] = int(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f'Campo {campo} deve ser um número inteiro')
+
+    for campo in CAMPOS_OBRIGATORIOS:
+        if not dados.get(campo):
+            raise ValueError(f'Campo {campo} é obrigatório')
+
+    if dados['categoria_id'] not in mapas.categoria_ids:
+        raise ValueError('Categoria não encontrada')
+    if dados['estilo_id'] and dados['estilo_id'] not in mapas.estilo_ids:
+        raise ValueError('Estilo não encontrado')
+
+    for campo in CAMPOS_DATAS:
+        if linha.get(campo):
+            try:
+                dados[campo] = datetime.strptime(str(linha[campo]), '%Y-%m-%d').date()
+            except ValueError:
+                raise ValueError(f'Formato de data inválido para {campo} (use YYYY-MM-DD)')
+
+    if linha.get('duracao_padrao'):
+        try:
+            dados['duracao_padrao'] = datetime.strptime(str(linha['duracao_padrao']), '%H:%M:%S').time()
+        except ValueError:
+            raise ValueError('Formato de duração inválido (use HH:MM:SS)')
+
+    return dados
+
+
+def _gravar_lote(validas, resultado):
+    """Inserir um lote já validado e memorizar seus valores de autocompletar
+
+    Cada lote é uma transação: uma falha no banco descarta só este lote.
+    """
+    if not validas:
+        return
+    musicas = [dados for _, dados in validas]
+    try:
+        # Os inserts em lote não passam pelos eventos do ORM: o índice de
+        # aniversários é refeito para as músicas acima do maior id anterior
+        aniversarios = tem_aniversario(musicas)
+        if aniversarios:
+            maximo = db.session.query(func.max(Musica.id)).scalar() or 0
+        copiar_linhas(Musica, musicas)
+        if aniversarios:
+            reindexar(db.session.connection(), Musica.id > maximo)
+        memorizar_musicas(musicas)
+        registrar_variacoes(variacoes_musicas(musicas))
+        registrar_alteracao('musicas')
+        db.session.commit()
+        resultado['importadas'] += len(musicas)
+    except Exception as e:
+        db.session.rollback()
+        for numero, _ in validas:
+            _registrar_erro(resultado, numero, str(e))
+
+
+def _registrar_erro(resultado, numero, mensagem):
+    resultado['total_erros'] += 1
+    if len(resultado['erros']) < MAX_ERROS:
+        resultado['erros'].append({'linha': numero, 'erro': mensagem})
+
+
+def importar_musicas(linhas, tamanho_lote=TAMANHO_LOTE, primeira_linha=1):
+    """Importar músicas de um iterável de linhas (dicts), em lotes
+
+    Linhas inválidas são relatadas com o número da linha no arquivo
+    (`primeira_linha` = 2 em CSV, por causa do cabeçalho) e não interrompem a
+    importação. Retorna {'total', 'importadas', 'total_erros', 'erros'}.
+    """
+    mapas = MapasReferencia()
+    resultado = {'total': 0, 'importadas': 0, 'total_erros': 0, 'erros': []}
+
+    validas = []
+    for numero, linha in enumerate(linhas, start=primeira_linha):
+        if linha is None:
+            continue
+        resultado['total'] += 1
+        try:
+            if isinstance(linha, Exception):
+                raise linha
+            validas.append((numero, validar_linha(linha, mapas)))
+        except ValueError as e:
+            _registrar_erro(resultado, numero, str(e))
+
+        if len(validas) >= tamanho_lote:
+            _gravar_lote(validas, resultado)
+            validas = []
+
+    _gravar_lote(validas, resultado)
+    return resultado
@@ -0,0 +1,149 @@
+"""
+Conjunto materializado dos intérpretes do catálogo (formulário de locuções)
+Sistema de Programação Musical
+"""
+import bisect
+from collections import Counter
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from src.models.programacao import db, Musica
+from src.services.cache_versionado import CacheVersionado, registrar_pendente
+from src.services.historico import normalizar_interprete as normalizar
+
+CAMPOS_INTERPRETE = ('interprete1', 'interprete2', 'interprete3')
+
+
+def _entradas_busca(nome):
+    """Trechos normalizados que começam em cada palavra do nome
+
+    "João Gomes" gera "joao gomes" e "gomes": a busca por prefixo encontra o
+    intérprete pelo início de qualquer palavra.
+    """
+    palavras = (normalizar(nome) or '').split()
+    return [(' '.join(palavras[i:]), nome) for i in range(len(palavras))]
+
+
+class ConjuntoInterpretes(CacheVersionado):
+    """Intérpretes distintos de interprete1/2/3, com contagem de músicas
+
+    A contagem permite manter o conjunto de forma incremental: um nome sai
+    quando a última música que o usa é removida ou alterada. A lista em ordem
+    alfabética e a lista de trechos para busca por prefixo ficam sempre
+    ordenadas (inserção com bisect). As rotas que o usam têm o ETag da versão
+    de musicas: o conjunto é recarregado assim que essa versão muda.
+    """
+
+    def __init__(self):
+        super().__init__(('musicas',))
+        self._contagem = Counter()
+        self._ordenados = []
+        self._busca = []
+
+    def _ler(self):
+        contagem = Counter()
+        for row in db.session.query(Musica.interprete1, Musica.interprete2, Musica.interprete3):
+            for nome in row:
+                if nome:
+                    contagem[nome] += 1
+        return contagem, sorted(contagem), sorted(entrada for nome in contagem for entrada in _entradas_busca(nome))
+
+    def _instalar(self, conteudo):
+        self._contagem, self._ordenados, self._busca = conteudo
+
+    def _aplicar(self, alteracoes):
+        variacoes = Counter()
+        for parcial in alteracoes:
+            variacoes.update(parcial)
+        self.aplicar(variacoes)
+
+    def aplicar(self, variacoes):
+        """Aplicar variações {nome: +n/-n} de músicas incluídas, alteradas ou removidas"""
+        with self._lock:
+            if self._origem is None:
+                return
+            for nome, variacao in variacoes.items():
+                if not nome or not variacao:
+                    continue
+                anterior = self._contagem[nome]
+                atual = anterior + variacao
+                if atual > 0:
+                    self._contagem[nome] = atual
+                else:
+                    del self._contagem[nome]
+
+                if anterior <= 0 < atual:
+                    bisect.insort(self._ordenados, nome)
+                    for entrada in _entradas_busca(nome):
+                        bisect.insort(self._busca, entrada)
+                elif anterior > 0 >= atual:
+                    del self._ordenados[bisect.bisect_left(self._ordenados, nome)]
+                    for entrada in _entradas_busca(nome):
+                        del self._busca[bisect.bisect_left(self._busca, entrada)]
+
+    def listar(self):
+        """Todos os intérpretes em ordem alfabética"""
+        with self._lock:
+            self._garantir_carregado()
+            return list(self._ordenados)
+
+    def buscar(self, termo, limite=20):
+        """Intérpretes com alguma palavra começando pelo termo (sem acentos), em ordem alfabética"""
+        normalizado = normalizar(termo)
+        if not normalizado:
+            return []
+        with self._lock:
+            self._garantir_carregado()
+            encontrados = set()
+            posicao = bisect.bisect_left(self._busca, (normalizado,))
+            while posicao < len(self._busca) and self._busca[posicao][0].startswith(normalizado):
+                encontrados.add(self._busca[posicao][1])
+                posicao += 1
+        return sorted(encontrados)[:limite]
+
+
+INTERPRETES = ConjuntoInterpretes()
+
+
+def variacoes_musicas(musicas, sinal=1):
+    """Variações de contagem para músicas (dicts) incluídas (+1) ou removidas (-1)"""
+    variacoes = Counter()
+    for musica in musicas:
+        for campo in CAMPOS_INTERPRETE:
+            if musica.get(campo):
+                variacoes[musica[campo]] += sinal
+    return variacoes
+
+
+def registrar_variacoes(variacoes, session=None):
+    """Anotar variações na sessão; o conjunto é atualizado após o commit"""
+    registrar_pendente(INTERPRETES, variacoes, session)
+
+
+@event.listens_for(Session, 'before_flush')
+def _variacoes_do_flush(session, contexto, instancias):
+    """Capturar intérpretes de músicas incluídas, alteradas e removidas pelo ORM"""
+    variacoes = Counter()
+    for musica in session.new:
+        if isinstance(musica, Musica):
+            for campo in CAMPOS_INTERPRETE:
+                if getattr(musica, campo):
+                    variacoes[getattr(musica, campo)] += 1
+    for musica in session.deleted:
+        if isinstance(musica, Musica):
+            for campo in CAMPOS_INTERPRETE:
+                if getattr(musica, campo):
+                    variacoes[getattr(musica, campo)] -= 1
+    for musica in session.dirty:
+        if isinstance(musica, Musica):
+            for campo in CAMPOS_INTERPRETE:
+                historico = inspect(musica).attrs[campo].history
+                for nome in historico.deleted:
+                    if nome:
+                        variacoes[nome] -= 1
+                for nome in historico.added:
+                    if nome:
+                        variacoes[nome] += 1
+    if variacoes:
+        registrar_variacoes(variacoes, session)
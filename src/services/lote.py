@@ -0,0 +1,173 @@
+"""
+Geração em lote (várias emissoras, vários dias) com pool de processos
+Sistema de Programação Musical
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from src.models.programacao import db, ProgramacaoGerada
+from src.services.gerador import (
+    SEPARACAO_MUSICA_PADRAO, SEPARACAO_INTERPRETE_PADRAO,
+    GeradorProgramacao, carregar_aniversariantes, carregar_grade, carregar_catalogo, selecionar_grade
+)
+from src.services.armazenamento import inserir_lote, remover_itens, separar_conteudo
+from src.services.historico import carregar_historico
+from src.services.referencias import REFERENCIAS
+
+# Instantâneo somente leitura do catálogo e das grades em cada processo do pool
+_catalogo = None
+_grades = None
+
+
+def _inicializar_processo(catalogo, grades):
+    """Receber o instantâneo uma única vez por processo do pool"""
+    global _catalogo, _grades
+    _catalogo = catalogo
+    _grades = grades
+
+
+def _gerar_sequencia(tarefa, catalogo=None, grades=None):
+    """Gerar em ordem os dias consecutivos de uma emissora
+
+    Roda no processo do pool e não acessa o banco: recebe o histórico já
+    carregado e devolve as linhas prontas para o insert em lote.
+    """
+    catalogo = catalogo if catalogo is not None else _catalogo
+    grades = grades if grades is not None else _grades
+    emissora_id, dias, historico, opcoes = tarefa
+
+    primeira_data, primeira_grade = dias[0]
+    gerador = GeradorProgramacao(
+        grades[primeira_grade], catalogo,
+        semente=f'{emissora_id}:{primeira_data}', historico=historico, **opcoes
+    )
+
+    linhas = []
+    for data_iso, grade_id in dias:
+        dia = date.fromisoformat(data_iso)
+        conteudo = gerador.gerar(dia, grades[grade_id])
+        conteudo['emissora_id'] = emissora_id
+        cabecalho, itens = separar_conteudo(conteudo)
+        linhas.append(({
+            'data_programacao': dia,
+            'grade_id': grade_id,
+            'emissora_id': emissora_id,
+            'conteudo_json': cabecalho
+        }, itens))
+    return linhas
+
+
+def _sequencias_continuas(datas):
+    """Agrupar datas pendentes em trechos de dias consecutivos"""
+    trechos = []
+    for dia in datas:
+        if trechos and trechos[-1][-1] + timedelta(days=1) == dia:
+            trechos[-1].append(dia)
+        else:
+            trechos.append([dia])
+    return trechos
+
+
+def gerar_lote(data_inicio, dias=7, emissora_ids=None, processos=None, substituir=False,
+               priorizar_aniversarios=False, **opcoes):
+    """Gerar a programação de várias emissoras e dias e gravar com inserts em lote
+
+    As tarefas são agrupadas por emissora (dias consecutivos em sequência,
+    para que o histórico de execuções passe de um dia para o outro) e
+    distribuídas entre os processos do pool. Com `priorizar_aniversarios`,
+    as músicas dos aniversariantes de todo o período são lidas uma vez e
+    seguem com as tarefas.
+    """
+    datas = [data_inicio + timedelta(days=i) for i in range(dias)]
+
+    if emissora_ids is None:
+        emissora_ids = [emissora['id'] for emissora in REFERENCIAS['emissoras'].listar() if emissora['ativa']]
+
+    # Grade de cada data (compartilhada entre as emissoras)
+    grades = {}
+    grade_por_data = {}
+    sem_grade = []
+    for dia in datas:
+        grade = selecionar_grade(dia)
+        if grade is None:
+            sem_grade.append(dia.isoformat())
+            continue
+        if grade.id not in grades:
+            grades[grade.id] = carregar_grade(grade)
+        if not grades[grade.id]['sequencia']:
+            sem_grade.append(dia.isoformat())
+            continue
+        grade_por_data[dia] = grade.id
+
+    # Programações já existentes no período
+    existentes = ProgramacaoGerada.query.filter(
+        ProgramacaoGerada.emissora_id.in_(emissora_ids),
+        ProgramacaoGerada.data_programacao >= datas[0],
+        ProgramacaoGerada.data_programacao <= datas[-1]
+    )
+    ignoradas = []
+    if substituir:
+        remover_itens([row.id for row in existentes.with_entities(ProgramacaoGerada.id)])
+        existentes.delete(synchronize_session=False)
+        ja_geradas = set()
+    else:
+        ja_geradas = {(row.emissora_id, row.data_programacao) for row in existentes.with_entities(
+            ProgramacaoGerada.emissora_id, ProgramacaoGerada.data_programacao
+        )}
+
+    separacao_musica = opcoes.get('separacao_musica', SEPARACAO_MUSICA_PADRAO)
+    separacao_interprete = opcoes.get('separacao_interprete', SEPARACAO_INTERPRETE_PADRAO)
+    janela = max(separacao_musica, separacao_interprete) * 60
+
+    categorias = set()
+    for grade in grades.values():
+        categorias.update(grade['sequencia'])
+    if priorizar_aniversarios:
+        opcoes['aniversariantes'] = carregar_aniversariantes(categorias, list(grade_por_data))
+
+    tarefas = []
+    for emissora_id in emissora_ids:
+        pendentes = []
+        for dia in sorted(grade_por_data):
+            if (emissora_id, dia) in ja_geradas:
+                ignoradas.append({'emissora_id': emissora_id, 'data': dia.isoformat()})
+            else:
+                pendentes.append(dia)
+        for trecho in _sequencias_continuas(pendentes):
+            historico = carregar_historico(emissora_id, trecho[0], janela)
+            dias_tarefa = [(dia.isoformat(), grade_por_data[dia]) for dia in trecho]
+            tarefas.append((emissora_id, dias_tarefa, historico, opcoes))
+
+    linhas = []
+    usados = 0
+    if tarefas:
+        catalogo = {
+            categoria_id: [tuple(linha) for linha in candidatas]
+            for categoria_id, candidatas in carregar_catalogo(categorias).items()
+        }
+
+        usados = min(processos or os.cpu_count() or 1, len(tarefas))
+        if usados <= 1:
+            for tarefa in tarefas:
+                linhas.extend(_gerar_sequencia(tarefa, catalogo, grades))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=usados,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_inicializar_processo,
+                initargs=(catalogo, grades)
+            ) as pool:
+                for resultado in pool.map(_gerar_sequencia, tarefas):
+                    linhas.extend(resultado)
+
+    inserir_lote(linhas)
+    db.session.commit()
+
+    return {
+        'geradas': len(linhas),
+        'ignoradas': ignoradas,
+        'sem_grade': sem_grade,
+        'processos': usados
+    }
@@ -0,0 +1,274 @@
+"""
+Instrumentação das requisições: tempo, SQL, tamanho da resposta e /metrics (Prometheus)
+Sistema de Programação Musical
+"""
+import hmac
+import logging
+import threading
+import time
+
+from flask import Response, current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Chave no environ da requisição com as medições em andamento (cada sub-requisição
+# de /api/batch tem o seu environ, então as contas não se misturam)
+CHAVE_MEDICAO = 'gprog.metricas'
+
+LIMITES_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LIMITES_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+LIMITES_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Tamanho máximo do SQL e dos parâmetros no log de consultas lentas
+MAX_TEXTO_LOG = 2000
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(nomes, valores, extra=''):
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Histograma:
+    """Histograma cumulativo por conjunto de rótulos (formato de texto do Prometheus)"""
+
+    def __init__(self, nome, descricao, rotulos, limites):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos
+        self.limites = limites
+        self._series = {}
+
+    def observar(self, valores, valor):
+        serie = self._series.get(valores)
+        if serie is None:
+            serie = self._series[valores] = [[0] * len(self.limites), 0, 0.0]
+        for posicao, limite in enumerate(self.limites):
+            if valor <= limite:
+                serie[0][posicao] += 1
+        serie[1] += 1
+        serie[2] += valor
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.descricao}', f'# TYPE {self.nome} histogram']
+        for valores, (baldes, total, soma) in sorted(self._series.items()):
+            for limite, quantidade in zip(self.limites, baldes):
+                rotulos = _rotulos(self.rotulos, valores, 'le="%s"' % _numero(limite))
+                linhas.append(f'{self.nome}_bucket{rotulos} {quantidade}')
+            infinito = _rotulos(self.rotulos, valores, 'le="+Inf"')
+            linhas.append(f'{self.nome}_bucket{infinito} {total}')
+            linhas.append(f'{self.nome}_sum{_rotulos(self.rotulos, valores)} {_numero(soma)}')
+            linhas.append(f'{self.nome}_count{_rotulos(self.rotulos, valores)} {total}')
+        return linhas
+
+
+class Contador:
+    """Contador por conjunto de rótulos"""
+
+    def __init__(self, nome, descricao, rotulos):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos
+        self._series = {}
+
+    def incrementar(self, valores, quantidade=1):
+        self._series[valores] = self._series.get(valores, 0) + quantidade
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.descricao}', f'# TYPE {self.nome} counter']
+        for valores, total in sorted(self._series.items()):
+            linhas.append(f'{self.nome}{_rotulos(self.rotulos, valores)} {_numero(total)}')
+        return linhas
+
+
+class RegistroMetricas:
+    """Métricas das requisições deste processo
+
+    Cada worker do gunicorn tem o seu registro: o Prometheus deve coletar
+    cada worker (ou somar as séries por instância).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requisicoes = Contador(
+            'gprog_requisicoes_total', 'Requisições atendidas', ('endpoint', 'metodo', 'status')
+        )
+        self.duracao = Histograma(
+            'gprog_requisicao_duracao_segundos', 'Tempo total da requisição', ('endpoint', 'metodo'), LIMITES_DURACAO
+        )
+        self.consultas = Histograma(
+            'gprog_requisicao_consultas_sql', 'Comandos SQL executados por requisição', ('endpoint',), LIMITES_CONSULTAS
+        )
+        self.tempo_sql = Histograma(
+            'gprog_requisicao_sql_segundos', 'Tempo gasto em SQL por requisição', ('endpoint',), LIMITES_DURACAO
+        )
+        self.bytes = Histograma(
+            'gprog_resposta_bytes', 'Tamanho do corpo da resposta (após a compressão)', ('endpoint',), LIMITES_BYTES
+        )
+        self.consultas_lentas = Contador(
+            'gprog_consultas_lentas_total', 'Comandos SQL acima do limite de consulta lenta', ('endpoint',)
+        )
+
+    def registrar(self, endpoint, metodo, status, duracao, consultas, tempo_sql, tamanho):
+        with self._lock:
+            self.requisicoes.incrementar((endpoint, metodo, str(status)))
+            self.duracao.observar((endpoint, metodo), duracao)
+            self.consultas.observar((endpoint,), consultas)
+            self.tempo_sql.observar((endpoint,), tempo_sql)
+            if tamanho is not None:
+                self.bytes.observar((endpoint,), tamanho)
+
+    def registrar_consulta_lenta(self, endpoint):
+        with self._lock:
+            self.consultas_lentas.incrementar((endpoint,))
+
+    def exportar(self):
+        with self._lock:
+            linhas = []
+            for metrica in (self.requisicoes, self.duracao, self.consultas, self.tempo_sql, self.bytes,
+                            self.consultas_lentas):
+                linhas.extend(metrica.exportar())
+        return '\n'.join(linhas) + '\n'
+
+
+METRICAS = RegistroMetricas()
+
+
+def _endpoint():
+    return request.endpoint or 'nao_encontrado'
+
+
+def _medicao():
+    try:
+        return request.environ.get(CHAVE_MEDICAO)
+    except RuntimeError:  # fora de uma requisição (scripts, threads)
+        return None
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_do_cursor(conexao, cursor, sql, parametros, contexto, executemany):
+    if _medicao() is not None:
+        contexto._inicio_metricas = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _depois_do_cursor(conexao, cursor, sql, parametros, contexto, executemany):
+    inicio = getattr(contexto, '_inicio_metricas', None)
+    medicao = _medicao()
+    if inicio is None or medicao is None:
+        return
+    duracao = time.perf_counter() - inicio
+    medicao['consultas'] += 1
+    medicao['tempo_sql'] += duracao
+
+    limite = medicao['consulta_lenta']
+    if limite and duracao >= limite:
+        endpoint = _endpoint()
+        METRICAS.registrar_consulta_lenta(endpoint)
+        logger.warning(
+            'Consulta lenta (%.1f ms) em %s: %s | parâmetros: %s',
+            duracao * 1000, endpoint, sql[:MAX_TEXTO_LOG], repr(parametros)[:MAX_TEXTO_LOG]
+        )
+
+
+def _iniciar_medicao():
+    if request.endpoint == 'metricas':
+        return
+    request.environ[CHAVE_MEDICAO] = {
+        'inicio': time.perf_counter(),
+        'consultas': 0,
+        'tempo_sql': 0.0,
+        'consulta_lenta': current_app.config.get('METRICAS_CONSULTA_LENTA', 0),
+        'status': 500,
+        'bytes': None,
+        'streaming': False
+    }
+
+
+def _contar_bytes(corpo, medicao):
+    """Repassar o corpo em streaming somando os bytes enviados"""
+    try:
+        for parte in corpo:
+            medicao['bytes'] += len(parte.encode() if isinstance(parte, str) else parte)
+            yield parte
+    finally:
+        if hasattr(corpo, 'close'):
+            corpo.close()
+
+
+def _finalizar(environ, endpoint, metodo):
+    medicao = environ.pop(CHAVE_MEDICAO, None)
+    if medicao is None:
+        return
+    METRICAS.registrar(
+        endpoint, metodo, medicao['status'], time.perf_counter() - medicao['inicio'],
+        medicao['consultas'], medicao['tempo_sql'], medicao['bytes']
+    )
+
+
+def _encerrar_medicao(response):
+    medicao = _medicao()
+    if medicao is None:
+        return response
+
+    medicao['status'] = response.status_code
+    if current_app.config.get('METRICAS_SERVER_TIMING', True):
+        response.headers.add(
+            'Server-Timing',
+            f'app;dur={(time.perf_counter() - medicao["inicio"]) * 1000:.1f}, '
+            f'db;dur={medicao["tempo_sql"] * 1000:.1f};desc="{medicao["consultas"]} consultas"'
+        )
+
+    if response.is_streamed:
+        # Exportações em streaming: a medição termina quando o corpo acaba de
+        # ser enviado, contando o SQL executado durante o envio
+        medicao['streaming'] = True
+        medicao['bytes'] = 0
+        response.response = _contar_bytes(response.response, medicao)
+        environ, endpoint, metodo = request.environ, _endpoint(), request.method
+        response.call_on_close(lambda: _finalizar(environ, endpoint, metodo))
+    else:
+        medicao['bytes'] = response.content_length
+    return response
+
+
+def _descartar_medicao(exc):
+    """Fim do contexto da requisição; sem after_request (exceção não tratada) conta como 500"""
+    medicao = _medicao()
+    if medicao is not None and not medicao['streaming']:
+        _finalizar(request.environ, _endpoint(), request.method)
+
+
+def exibir_metricas():
+    """Métricas no formato de texto do Prometheus"""
+    token = current_app.config.get('METRICAS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return Response('Não autorizado\n', status=401, mimetype='text/plain')
+    return Response(METRICAS.exportar(), mimetype='text/plain; version=0.0.4')
+
+
+def configurar_metricas(app):
+    """Medir cada requisição e publicar /metrics (desligado com METRICAS_ATIVAS = False)
+
+    Deve ser chamada antes de configurar_respostas: os after_request rodam
+    na ordem inversa, então o tamanho medido é o da resposta já comprimida.
+    """
+    if not app.config.get('METRICAS_ATIVAS', True):
+        return False
+
+    app.before_request(_iniciar_medicao)
+    app.after_request(_encerrar_medicao)
+    app.teardown_request(_descartar_medicao)
+    app.add_url_rule('/metrics', 'metricas', exibir_metricas)
+    return True
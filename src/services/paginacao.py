@@ -0,0 +1,74 @@
+"""
+Paginação por cursor (keyset) e total aproximado em cache
+Sistema de Programação Musical
+"""
+import base64
+import json
+import threading
+import time
+
+from sqlalchemy import tuple_
+
+# Segundos que um total calculado continua valendo para o mesmo filtro
+VALIDADE_TOTAL = 60
+MAX_TOTAIS = 256
+
+_totais = {}
+_lock_totais = threading.Lock()
+
+
+def codificar_cursor(ordenar, descendente, valor, ultimo_id):
+    """Cursor opaco com a ordenação e a chave do último item da página"""
+    dados = json.dumps({'o': ordenar, 'd': descendente, 'v': valor, 'i': ultimo_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(dados.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Ler um cursor gerado por codificar_cursor (ValueError se inválido)"""
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        dados = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+        return dados['o'], bool(dados['d']), dados['v'], int(dados['i'])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError('Cursor inválido')
+
+
+def paginar_por_cursor(query, modelo, coluna, descendente=False, apos=None, limite=50):
+    """Buscar uma página ordenada por (coluna, id) a partir da chave `apos`
+
+    Usa WHERE (coluna, id) > (valor, id) em vez de OFFSET, então o custo de
+    cada página não cresce com a profundidade. Retorna (itens, há_mais).
+    """
+    if coluna is modelo.id:
+        chave, ordem = modelo.id, [modelo.id]
+    else:
+        chave, ordem = tuple_(coluna, modelo.id), [coluna, modelo.id]
+
+    if apos is not None:
+        referencia = apos[1] if coluna is modelo.id else tuple_(*apos)
+        query = query.filter(chave < referencia if descendente else chave > referencia)
+
+    query = query.order_by(*[item.desc() if descendente else item for item in ordem])
+    itens = query.limit(limite + 1).all()
+    return itens[:limite], len(itens) > limite
+
+
+def total_aproximado(chave, query):
+    """COUNT(*) do filtro, reaproveitado por VALIDADE_TOTAL segundos
+
+    O valor pode estar defasado em até VALIDADE_TOTAL segundos; serve para
+    indicar o tamanho da listagem sem contar a cada página.
+    """
+    agora = time.monotonic()
+    with _lock_totais:
+        guardado = _totais.get(chave)
+        if guardado and agora - guardado[1] < VALIDADE_TOTAL:
+            return guardado[0]
+
+    total = query.order_by(None).count()
+    with _lock_totais:
+        if len(_totais) >= MAX_TOTAIS:
+            # Descarta o mais antigo
+            del _totais[min(_totais, key=lambda k: _totais[k][1])]
+        _totais[chave] = (total, agora)
+    return total
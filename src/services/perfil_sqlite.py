@@ -0,0 +1,147 @@
+"""
+Perfil de produção do SQLite: pragmas por conexão e manutenção periódica
+Sistema de Programação Musical
+"""
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event
+
+from src.models.programacao import db
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Aplicados a cada conexão nova (valores de config.SQLITE_PRAGMAS substituem estes)
+PRAGMAS_PADRAO = {
+    'journal_mode': 'WAL',        # leitores não bloqueiam o escritor (e vice-versa)
+    'busy_timeout': 5000,         # ms esperando o lock de escrita antes de "database is locked"
+    'synchronous': 'NORMAL',      # seguro com WAL; fsync só nos checkpoints
+    'cache_size': -65536,         # 64 MB de cache de páginas por conexão
+    'mmap_size': 268435456,       # 256 MB lidos via mmap
+    'temp_store': 'MEMORY',
+    'auto_vacuum': 'INCREMENTAL'  # só vale para bancos novos (ou após VACUUM)
+}
+
+# Páginas livres devolvidas ao sistema de arquivos a cada manutenção
+PAGINAS_VACUUM = 2000
+
+
+def _arquivo_banco(engine):
+    """Caminho do arquivo SQLite do engine, ou None (outro banco ou :memory:)"""
+    if engine.dialect.name != 'sqlite':
+        return None
+    banco = engine.url.database
+    if not banco or banco == ':memory:' or banco.startswith('file::memory:'):
+        return None
+    return os.path.abspath(banco)
+
+
+def configurar_sqlite(app):
+    """Aplicar os pragmas de app.config['SQLITE_PRAGMAS'] a cada conexão do engine
+
+    Chamado na criação da aplicação, antes da primeira conexão. O pool mantém
+    as conexões abertas entre requisições, então o cache de páginas de cada
+    uma continua quente.
+    """
+    pragmas = dict(PRAGMAS_PADRAO)
+    pragmas.update(app.config.get('SQLITE_PRAGMAS') or {})
+
+    with app.app_context():
+        engine = db.engine
+    if _arquivo_banco(engine) is None:
+        return False
+
+    @event.listens_for(engine, 'connect')
+    def _aplicar_pragmas(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        try:
+            # auto_vacuum precisa vir antes de qualquer tabela existir no arquivo
+            for nome in sorted(pragmas, key=lambda nome: nome != 'auto_vacuum'):
+                cursor.execute(f'PRAGMA {nome} = {pragmas[nome]}')
+        finally:
+            cursor.close()
+
+    return True
+
+
+def executar_manutencao(engine):
+    """ANALYZE, PRAGMA optimize, vacuum incremental e checkpoint do WAL"""
+    inicio = time.monotonic()
+    with engine.connect() as conexao:
+        conexao.exec_driver_sql('PRAGMA analysis_limit = 1000')
+        conexao.exec_driver_sql('ANALYZE')
+        conexao.exec_driver_sql('PRAGMA optimize')
+        if conexao.exec_driver_sql('PRAGMA auto_vacuum').scalar() == 2:
+            # executescript roda o pragma até o fim (execute libera só uma página)
+            conexao.connection.dbapi_connection.executescript(f'PRAGMA incremental_vacuum({PAGINAS_VACUUM})')
+        conexao.exec_driver_sql('PRAGMA wal_checkpoint(PASSIVE)').fetchall()
+        conexao.commit()
+    logger.info('Manutenção do SQLite concluída em %.2fs', time.monotonic() - inicio)
+
+
+def _manutencao_devida(caminho_lock, intervalo):
+    """Rodar só se nenhum processo rodou no intervalo (mtime do arquivo de lock)"""
+    try:
+        return time.time() - os.path.getmtime(caminho_lock) >= intervalo
+    except OSError:
+        return True
+
+
+def _ciclo_manutencao(engine, caminho_lock, intervalo, parar):
+    while not parar.wait(intervalo):
+        if not _manutencao_devida(caminho_lock, intervalo):
+            continue
+        existia = os.path.exists(caminho_lock)
+        with open(caminho_lock, 'a') as lock:
+            # Com vários workers, só um processo faz a manutenção de cada vez
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    continue
+            # Outro worker pode ter terminado enquanto este esperava
+            if existia and not _manutencao_devida(caminho_lock, intervalo):
+                continue
+            try:
+                executar_manutencao(engine)
+            except Exception:
+                logger.exception('Falha na manutenção do SQLite')
+            os.utime(caminho_lock)
+
+
+def iniciar_manutencao(app):
+    """Iniciar a thread de manutenção periódica (app.config['SQLITE_MANUTENCAO_INTERVALO'] segundos)
+
+    Retorna o Event que encerra a thread, ou None se a manutenção estiver
+    desligada (intervalo 0) ou o banco não for um arquivo SQLite.
+    """
+    intervalo = app.config.get('SQLITE_MANUTENCAO_INTERVALO', 0)
+    with app.app_context():
+        engine = db.engine
+    arquivo = _arquivo_banco(engine)
+    if not intervalo or arquivo is None:
+        return None
+
+    parar = threading.Event()
+    threading.Thread(
+        target=_ciclo_manutencao, args=(engine, arquivo + '.manutencao', intervalo, parar),
+        name='manutencao-sqlite', daemon=True
+    ).start()
+    return parar
+
+
+def compactar_banco(engine):
+    """VACUUM completo, ativando o auto_vacuum incremental em bancos criados sem ele"""
+    if _arquivo_banco(engine) is None:
+        return False
+    with engine.connect() as conexao:
+        conexao.exec_driver_sql('PRAGMA auto_vacuum = INCREMENTAL')
+        conexao.exec_driver_sql('VACUUM')
+    return True
@@ -0,0 +1,106 @@
+"""
+Recursos específicos do PostgreSQL: carga em lote com COPY e índices trigrama
+Sistema de Programação Musical
+"""
+import io
+from datetime import date, datetime, time
+
+from sqlalchemy import DDL, event, insert
+
+from src.models.programacao import db, Musica, BancoLocucao
+
+# Abaixo disso o INSERT em lote (executemany) é tão rápido quanto o COPY
+MINIMO_COPY = 200
+
+# Colunas filtradas com ilike '%termo%' (busca sem FTS e filtro de locuções)
+COLUNAS_TRIGRAMA = [
+    (Musica.__tablename__, coluna)
+    for coluna in ('interprete1', 'interprete2', 'interprete3', 'nome_musica', 'complemento')
+] + [(BancoLocucao.__tablename__, 'interprete')]
+
+COMANDOS_TRIGRAMA = [
+    f'CREATE INDEX IF NOT EXISTS idx_{tabela}_{coluna}_trgm ON {tabela} USING gin ({coluna} gin_trgm_ops)'
+    for tabela, coluna in COLUNAS_TRIGRAMA
+]
+
+# Bancos novos: a extensão antes das tabelas, os índices junto com cada tabela (db.create_all)
+event.listen(
+    db.metadata, 'before_create', DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
+for (_tabela, _), _comando in zip(COLUNAS_TRIGRAMA, COMANDOS_TRIGRAMA):
+    event.listen(db.metadata.tables[_tabela], 'after_create', DDL(_comando).execute_if(dialect='postgresql'))
+
+
+def garantir_indices_trigrama(conexao):
+    """Criar a extensão pg_trgm e os índices trigrama em bancos já existentes"""
+    if conexao.dialect.name != 'postgresql':
+        return False
+    conexao.exec_driver_sql('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for comando in COMANDOS_TRIGRAMA:
+        conexao.exec_driver_sql(comando)
+    return True
+
+
+def _valor_copy(valor):
+    """Valor no formato texto do COPY (\\N para nulo, tab/quebras escapados)"""
+    if valor is None:
+        return '\\N'
+    if isinstance(valor, bool):
+        return 't' if valor else 'f'
+    if isinstance(valor, (date, datetime, time)):
+        return valor.isoformat()
+    return str(valor).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _com_padroes(tabela, linhas):
+    """Colunas e linhas completadas com os defaults do modelo (o COPY não os aplica)"""
+    informadas = set().union(*linhas)
+    colunas = [
+        coluna for coluna in tabela.columns
+        if coluna.key in informadas or (coluna.default is not None and not coluna.default.is_sequence)
+    ]
+
+    def valor(linha, coluna):
+        if coluna.key in linha:
+            return linha[coluna.key]
+        if coluna.default is None:
+            return None
+        # Defaults chamáveis são guardados pelo SQLAlchemy como fn(contexto)
+        return coluna.default.arg(None) if coluna.default.is_callable else coluna.default.arg
+
+    return [coluna.name for coluna in colunas], [[valor(linha, coluna) for coluna in colunas] for linha in linhas]
+
+
+def copiar_linhas(modelo, linhas):
+    """Inserir dicts em lote: COPY ... FROM STDIN no PostgreSQL, INSERT executemany nos demais
+
+    Roda na conexão (e transação) da sessão atual. Não retorna ids; para
+    linhas cujos ids são necessários use insert(...).returning.
+    """
+    if not linhas:
+        return
+    conexao = db.session.connection()
+    tabela = modelo.__table__
+    colunas, valores = _com_padroes(tabela, linhas)
+    if conexao.dialect.name != 'postgresql' or len(linhas) < MINIMO_COPY:
+        # INSERT do Core com as linhas completadas: um único executemany (o insert
+        # do ORM separa as linhas pelos campos nulos, até um comando por linha)
+        db.session.execute(insert(tabela), [dict(zip(colunas, linha)) for linha in valores])
+        return
+
+    dados = io.StringIO()
+    for linha in valores:
+        dados.write('\t'.join(_valor_copy(valor) for valor in linha))
+        dados.write('\n')
+    dados.seek(0)
+
+    comando = f'COPY {tabela.name} ({", ".join(colunas)}) FROM STDIN'
+    cursor = conexao.connection.dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, 'copy_expert'):  # psycopg2
+            cursor.copy_expert(comando, dados)
+        else:  # psycopg 3
+            with cursor.copy(comando) as copia:
+                copia.write(dados.getvalue())
+    finally:
+        cursor.close()
@@ -0,0 +1,124 @@
+"""
+Cache em memória das tabelas de referência (categorias, estilos, emissoras, locutores)
+Sistema de Programação Musical
+"""
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.models.programacao import db, Categoria, Estilo, Emissora, Locutor
+from src.services.cache_versionado import CacheVersionado, registrar_pendente
+
+# Tabelas maiores que isso deixam de ficar inteiras em memória (só os ids mais usados)
+MAX_ITENS_REFERENCIA = 5000
+
+
+class CacheReferencia(CacheVersionado):
+    """Linhas de uma tabela de referência, como dicts do to_dict, por id
+
+    Enquanto a tabela cabe em `max_itens` ela fica inteira em memória: validar
+    um id ou listar a tabela não consulta o banco. Acima disso, só os ids
+    consultados ficam guardados (os menos usados saem primeiro) e a listagem
+    vai ao banco. Inclusões, alterações e exclusões feitas pelo ORM são
+    gravadas no cache após o commit (write-through); as de outros processos
+    mudam a versão da tabela e o cache é recarregado no próximo acesso. Um
+    id ausente do cache ainda é procurado no banco antes de responder None.
+    """
+
+    def __init__(self, modelo, max_itens=MAX_ITENS_REFERENCIA):
+        super().__init__((modelo.__tablename__,))
+        self.modelo = modelo
+        self.max_itens = max_itens
+        self._completo = False
+        self._itens = OrderedDict()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def _ler(self):
+        objetos = db.session.query(self.modelo).order_by(self.modelo.id).limit(self.max_itens + 1).all()
+        completo = len(objetos) <= self.max_itens
+        return completo, OrderedDict((objeto.id, objeto.to_dict()) for objeto in (objetos if completo else ()))
+
+    def _instalar(self, conteudo):
+        self._completo, self._itens = conteudo
+
+    def _guardar(self, item_id, dados):
+        self._itens[item_id] = dados
+        self._itens.move_to_end(item_id)
+        if not self._completo:
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def obter(self, item_id):
+        """Dicionário da linha com o id informado, ou None se não existir"""
+        try:
+            item_id = int(item_id)
+        except (TypeError, ValueError):
+            return None
+        with self._lock:
+            self._garantir_carregado()
+            dados = self._itens.get(item_id)
+            if dados is None:
+                objeto = db.session.get(self.modelo, item_id)
+                if objeto is None:
+                    return None
+                dados = objeto.to_dict()
+                if not self._completo:
+                    self._guardar(item_id, dados)
+            elif not self._completo:
+                self._itens.move_to_end(item_id)
+            return dict(dados) if dados is not None else None
+
+    def existe(self, item_id):
+        return self.obter(item_id) is not None
+
+    def listar(self):
+        """Todas as linhas em ordem de id"""
+        with self._lock:
+            self._garantir_carregado()
+            if self._completo:
+                return [dict(dados) for dados in self._itens.values()]
+        return [objeto.to_dict() for objeto in self.modelo.query.order_by(self.modelo.id)]
+
+    def _aplicar(self, alteracoes):
+        """Gravar as linhas alteradas [(id, dict, ou None se removida)]"""
+        with self._lock:
+            for item_id, dados in OrderedDict(alteracoes).items():
+                if dados is None:
+                    self._itens.pop(item_id, None)
+                elif self._completo:
+                    self._itens[item_id] = dados
+                    if len(self._itens) > self.max_itens:
+                        # A tabela cresceu além do limite: volta ao modo parcial
+                        self._completo = False
+                        while len(self._itens) > self.max_itens:
+                            self._itens.popitem(last=False)
+                elif item_id in self._itens:
+                    self._guardar(item_id, dados)
+            if self._completo:
+                self._itens = OrderedDict(sorted(self._itens.items()))
+
+
+REFERENCIAS = {
+    'categorias': CacheReferencia(Categoria),
+    'estilos': CacheReferencia(Estilo),
+    'emissoras': CacheReferencia(Emissora),
+    'locutores': CacheReferencia(Locutor)
+}
+
+MODELOS_REFERENCIA = {cache.modelo: chave for chave, cache in REFERENCIAS.items()}
+
+
+@event.listens_for(Session, 'after_flush')
+def _referencias_do_flush(session, contexto):
+    """Guardar o estado gravado das linhas de referência; o cache é atualizado após o commit"""
+    for objeto in list(session.new) + list(session.dirty) + list(session.deleted):
+        chave = MODELOS_REFERENCIA.get(type(objeto))
+        if chave is None:
+            continue
+        if objeto in session.deleted:
+            registrar_pendente(REFERENCIAS[chave], (objeto.id, None), session)
+        elif objeto in session.new or session.is_modified(objeto, include_collections=False):
+            registrar_pendente(REFERENCIAS[chave], (objeto.id, objeto.to_dict()), session)
@@ -0,0 +1,119 @@
+"""
+Regeneração incremental: refaz apenas os blocos afetados por edições na grade
+Sistema de Programação Musical
+"""
+from src.services.gerador import (
+    SEPARACAO_MUSICA_PADRAO, SEPARACAO_INTERPRETE_PADRAO,
+    GeradorProgramacao, carregar_grade, carregar_catalogo, contar_musicas, formatar_hora, montar_blocos
+)
+from src.services.historico import (
+    SEGUNDOS_DIA, HistoricoBidirecional, carregar_execucoes, execucoes_do_conteudo, instante_absoluto, resolver_chaves
+)
+
+
+def posicoes_alteradas(sequencia_antiga, sequencia_nova):
+    """Posições da sequência de categorias que mudaram (None = todas)"""
+    if sequencia_antiga is None or len(sequencia_antiga) != len(sequencia_nova):
+        return None
+    return {
+        posicao for posicao, (antiga, nova) in enumerate(zip(sequencia_antiga, sequencia_nova))
+        if antiga != nova
+    }
+
+
+def bloco_afetado(bloco, alteradas):
+    """Verificar se um bloco já gerado usa alguma posição alterada da sequência"""
+    if bloco['tipo'] == 'BC':
+        return False
+    if alteradas is None:
+        return True
+    for item in bloco['itens']:
+        if item['tipo'] != 'musica':
+            continue
+        if 'posicao' not in item or item['posicao'] in alteradas:
+            return True
+    return False
+
+
+def _proxima_posicao(bloco):
+    """Posição da sequência em que o bloco seguinte continua"""
+    itens = [item for item in bloco['itens'] if item['tipo'] == 'musica']
+    if itens and 'posicao' in itens[-1]:
+        return itens[-1]['posicao'] + 1
+    return bloco.get('posicao_sequencia', 0) + len(itens)
+
+
+def regenerar_programacao(programacao, separacao_musica=SEPARACAO_MUSICA_PADRAO,
+                          separacao_interprete=SEPARACAO_INTERPRETE_PADRAO, semente=None):
+    """Regenerar apenas os blocos de uma programação afetados por mudanças na grade
+
+    Um bloco é mantido quando o mesmo trecho (início, fim e tipo) ainda existe
+    na grade e nenhuma das posições da sequência de categorias que ele usa
+    mudou. Os blocos refeitos respeitam a separação em relação às músicas que
+    tocam antes e depois deles, então os blocos mantidos continuam válidos.
+
+    Retorna o novo conteúdo e a lista de índices dos blocos regenerados.
+    """
+    conteudo = programacao.conteudo() or {'blocos': []}
+    grade = carregar_grade(programacao.grade)
+    if not grade['sequencia']:
+        raise ValueError('Grade sem sequência de categorias')
+
+    dia = programacao.data_programacao
+    alteradas = posicoes_alteradas(conteudo.get('sequencia'), grade['sequencia'])
+    antigos = {(bloco['inicio'], bloco['fim'], bloco['tipo']): bloco for bloco in conteudo['blocos']}
+
+    # Separar blocos mantidos dos que precisam ser refeitos
+    plano = []
+    for indice, bloco in enumerate(montar_blocos(grade['intervalos'])):
+        antigo = antigos.get((formatar_hora(bloco['inicio']), formatar_hora(bloco['fim']), bloco['tipo']))
+        manter = antigo is not None and not bloco_afetado(antigo, alteradas)
+        plano.append((indice, bloco, antigo, manter))
+
+    regenerados = [indice for indice, _, _, manter in plano if not manter]
+    if not regenerados:
+        return conteudo, []
+
+    # Execuções fixas: dias vizinhos já gravados + blocos mantidos deste dia
+    janela = max(separacao_musica, separacao_interprete) * 60
+    inicio_dia = instante_absoluto(dia, 0)
+    execucoes = carregar_execucoes(
+        programacao.emissora_id, inicio_dia - janela, inicio_dia + SEGUNDOS_DIA + janela,
+        ignorar_ids={programacao.id}
+    )
+    mantidos = {'blocos': [antigo for _, _, antigo, manter in plano if manter]}
+    execucoes.extend(execucoes_do_conteudo(dia, mantidos))
+    historico = HistoricoBidirecional(resolver_chaves(execucoes), programacao.emissora_id)
+
+    catalogo = carregar_catalogo(set(grade['sequencia']))
+    if semente is None:
+        semente = f'{programacao.emissora_id}:{grade["id"]}:{dia.isoformat()}:regenerar'
+    gerador = GeradorProgramacao(
+        grade, catalogo,
+        separacao_musica=separacao_musica,
+        separacao_interprete=separacao_interprete,
+        semente=semente, historico=historico
+    )
+
+    blocos = []
+    posicao_sequencia = 0
+    for indice, bloco, antigo, manter in plano:
+        if manter:
+            saida = dict(antigo, indice=indice, horario_intervalo_id=bloco['horario_intervalo_id'])
+            if saida['tipo'] != 'BC':
+                posicao_sequencia = _proxima_posicao(saida)
+        else:
+            if antigo is not None and 'posicao_sequencia' in antigo:
+                posicao_sequencia = antigo['posicao_sequencia']
+            saida, posicao_sequencia = gerador.gerar_bloco(
+                dia, bloco, indice, grade['sequencia'], posicao_sequencia
+            )
+        blocos.append(saida)
+
+    conteudo.update({
+        'grade_id': grade['id'],
+        'sequencia': list(grade['sequencia']),
+        'total_musicas': contar_musicas(blocos),
+        'blocos': blocos
+    })
+    return conteudo, regenerados
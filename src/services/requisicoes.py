@@ -0,0 +1,137 @@
+"""
+Várias requisições da API em uma chamada (POST /api/batch)
+Sistema de Programação Musical
+"""
+from flask_sqlalchemy.session import Session
+
+from src.models.programacao import db
+from src.services.autocompletar import INDICES
+from src.services.interpretes import INTERPRETES
+from src.services.referencias import REFERENCIAS
+
+# Sub-requisições aceitas por chamada
+MAX_REQUISICOES = 100
+
+METODOS = {'GET', 'POST', 'PUT', 'PATCH', 'DELETE'}
+
+PREFIXO_API = '/api/'
+
+
+class SessaoTransacao(Session):
+    """Sessão presa à conexão da transação do lote
+
+    A sessão do Flask-SQLAlchemy escolhe o engine por tabela e ignoraria a
+    conexão informada em `bind`; aqui toda consulta usa essa conexão.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        return bind if bind is not None else self.bind
+
+
+def validar_requisicoes(requisicoes, caminho_lote):
+    """Normalizar a lista de sub-requisições; ValueError se alguma for inválida"""
+    if not isinstance(requisicoes, list) or not requisicoes:
+        raise ValueError('requisicoes deve ser uma lista não vazia')
+    if len(requisicoes) > MAX_REQUISICOES:
+        raise ValueError(f'Máximo de {MAX_REQUISICOES} requisições por lote')
+
+    normalizadas = []
+    for posicao, requisicao in enumerate(requisicoes):
+        if not isinstance(requisicao, dict):
+            raise ValueError(f'Requisição {posicao}: deve ser um objeto')
+        metodo = str(requisicao.get('metodo', 'GET')).upper()
+        caminho = requisicao.get('caminho')
+        if metodo not in METODOS:
+            raise ValueError(f'Requisição {posicao}: método {metodo} não suportado')
+        if not isinstance(caminho, str) or not caminho.startswith(PREFIXO_API):
+            raise ValueError(f'Requisição {posicao}: caminho deve começar com {PREFIXO_API}')
+        if caminho.split('?', 1)[0].rstrip('/') == caminho_lote.rstrip('/'):
+            raise ValueError(f'Requisição {posicao}: lotes não podem ser aninhados')
+        cabecalhos = requisicao.get('cabecalhos') or {}
+        if not isinstance(cabecalhos, dict):
+            raise ValueError(f'Requisição {posicao}: cabecalhos deve ser um objeto')
+        normalizadas.append({
+            'metodo': metodo,
+            'caminho': caminho,
+            'corpo': requisicao.get('corpo'),
+            'cabecalhos': {str(nome): str(valor) for nome, valor in cabecalhos.items()}
+        })
+    return normalizadas
+
+
+def _despachar(app, requisicao):
+    """Executar uma sub-requisição no contexto da aplicação atual
+
+    O contexto de requisição criado reaproveita o contexto da aplicação em
+    uso, então todas as sub-requisições compartilham a mesma db.session.
+    """
+    with app.test_request_context(
+        requisicao['caminho'], method=requisicao['metodo'],
+        json=requisicao['corpo'], headers=requisicao['cabecalhos']
+    ):
+        try:
+            resposta = app.full_dispatch_request()
+        except Exception as e:
+            db.session.rollback()
+            return {'status': 500, 'corpo': {'error': str(e)}}
+
+    # Arquivos (send_from_directory) vêm em modo passthrough; o corpo é lido aqui
+    resposta.direct_passthrough = False
+    corpo = resposta.get_json(silent=True) if resposta.is_json else resposta.get_data(as_text=True)
+    resposta.close()
+    resultado = {'status': resposta.status_code, 'corpo': corpo}
+    if resposta.headers.get('ETag'):
+        resultado['etag'] = resposta.headers['ETag']
+    return resultado
+
+
+def _invalidar_caches():
+    """Os caches em memória recebem as alterações em cada commit das rotas;
+    se a transação do lote é desfeita, eles voltam a ser lidos do banco"""
+    for cache in (*INDICES.values(), INTERPRETES, *REFERENCIAS.values()):
+        cache.invalidar()
+
+
+def _executar_em_transacao(app, requisicoes):
+    """Todas as sub-requisições em uma transação: confirmada só se todas tiverem sucesso
+
+    Os commits das rotas apenas gravam (flush) na transação externa; o
+    primeiro status de erro interrompe o lote e desfaz tudo.
+    """
+    conexao = db.engine.connect()
+    externa = conexao.begin()
+    sessao = SessaoTransacao(db, bind=conexao, join_transaction_mode='rollback_only')
+    db.session.remove()
+    db.session.registry.set(sessao)
+
+    respostas = []
+    confirmada = False
+    try:
+        for requisicao in requisicoes:
+            respostas.append(_despachar(app, requisicao))
+            if respostas[-1]['status'] >= 400:
+                break
+        else:
+            sessao.commit()
+            externa.commit()
+            confirmada = True
+    finally:
+        if not confirmada:
+            if externa.is_active:
+                externa.rollback()
+            _invalidar_caches()
+        sessao.close()
+        db.session.registry.clear()
+        conexao.close()
+    return respostas, confirmada
+
+
+def executar_requisicoes(app, requisicoes, transacao=False):
+    """Executar as sub-requisições em ordem; retorna (respostas, confirmada)
+
+    Sem `transacao`, cada sub-requisição confirma as próprias alterações
+    (como se fosse chamada isoladamente) e `confirmada` é None.
+    """
+    if transacao:
+        return _executar_em_transacao(app, requisicoes)
+    return [_despachar(app, requisicao) for requisicao in requisicoes], None
@@ -0,0 +1,176 @@
+"""
+Codificação JSON rápida, compressão negociada e formato colunar das listagens
+Sistema de Programação Musical
+"""
+import gzip
+import zlib
+
+from flask import current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+# Respostas menores que isso não compensam o custo da compressão
+COMPRESSAO_MINIMO = 1024
+COMPRESSAO_NIVEL_GZIP = 6
+COMPRESSAO_NIVEL_BROTLI = 4
+
+TIPOS_COMPRIMIVEIS = {
+    'application/json', 'application/xml', 'text/csv', 'text/html', 'text/plain',
+    'text/css', 'application/javascript', 'text/javascript', 'audio/x-mpegurl'
+}
+
+
+class ProvedorJSON(DefaultJSONProvider):
+    """Provedor JSON do Flask que usa orjson quando instalado
+
+    A saída é equivalente à do provedor padrão (chaves ordenadas, datas no
+    mesmo formato); sem o orjson, ou para objetos que ele não sabe codificar,
+    o json da biblioteca padrão é usado.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        opcoes = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opcoes |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=self.default, option=opcoes).decode()
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # Mesma mensagem de erro (e mesmas extensões) do json padrão
+            return super().loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        opcoes = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        if self.sort_keys:
+            opcoes |= orjson.OPT_SORT_KEYS
+        try:
+            corpo = orjson.dumps(obj, default=self.default, option=opcoes)
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(corpo, mimetype=self.mimetype)
+
+
+def em_colunas(linhas):
+    """Lista de dicts no formato colunar: os nomes das chaves uma vez e cada linha como lista
+
+    [{'id': 1, 'nome': 'A'}, {'id': 2, 'nome': 'B'}] vira
+    {'colunas': ['id', 'nome'], 'linhas': [[1, 'A'], [2, 'B']]}
+    """
+    colunas = []
+    vistas = set()
+    for linha in linhas:
+        for chave in linha:
+            if chave not in vistas:
+                vistas.add(chave)
+                colunas.append(chave)
+    return {'colunas': colunas, 'linhas': [[linha.get(coluna) for coluna in colunas] for linha in linhas]}
+
+
+def formato_lista(linhas):
+    """Lista de dicts da resposta, em formato colunar se pedido com ?colunar=true"""
+    if request.args.get('colunar', 'false').lower() == 'true':
+        return em_colunas(linhas)
+    return linhas
+
+
+def _codificacao_aceita():
+    """Melhor codificação aceita pelo cliente (br, depois gzip) ou None"""
+    aceitas = request.accept_encodings
+    if brotli is not None and aceitas['br']:
+        return 'br'
+    if aceitas['gzip']:
+        return 'gzip'
+    return None
+
+
+def _comprimir_fluxo(partes, codificacao, nivel):
+    """Comprimir uma resposta em streaming à medida que as partes são geradas"""
+    if codificacao == 'br':
+        compressor = brotli.Compressor(quality=nivel)
+        comprimir, finalizar = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+        comprimir, finalizar = compressor.compress, compressor.flush
+    try:
+        for parte in partes:
+            if isinstance(parte, str):
+                parte = parte.encode('utf-8')
+            dados = comprimir(parte)
+            if dados:
+                yield dados
+        yield finalizar()
+    finally:
+        if hasattr(partes, 'close'):
+            partes.close()
+
+
+def comprimir_resposta(resposta):
+    """after_request: comprimir o corpo com br/gzip conforme o Accept-Encoding
+
+    Respostas pequenas (abaixo de COMPRESSAO_MINIMO), de tipos não textuais
+    ou já codificadas são enviadas como estão. Exportações em streaming são
+    comprimidas parte a parte, sem montar o arquivo em memória.
+    """
+    if resposta.status_code != 200:
+        return resposta
+    if request.method == 'HEAD' or 'Content-Encoding' in resposta.headers:
+        return resposta
+    if resposta.mimetype not in TIPOS_COMPRIMIVEIS:
+        return resposta
+
+    resposta.vary.add('Accept-Encoding')
+    codificacao = _codificacao_aceita()
+    if codificacao is None:
+        return resposta
+
+    nivel = current_app.config.get(
+        'COMPRESSAO_NIVEL_BROTLI' if codificacao == 'br' else 'COMPRESSAO_NIVEL_GZIP',
+        COMPRESSAO_NIVEL_BROTLI if codificacao == 'br' else COMPRESSAO_NIVEL_GZIP
+    )
+
+    if resposta.is_streamed:
+        resposta.response = _comprimir_fluxo(resposta.response, codificacao, nivel)
+        resposta.direct_passthrough = False
+        resposta.headers.pop('Content-Length', None)
+    else:
+        corpo = resposta.get_data()
+        if len(corpo) < current_app.config.get('COMPRESSAO_MINIMO', COMPRESSAO_MINIMO):
+            return resposta
+        if codificacao == 'br':
+            resposta.set_data(brotli.compress(corpo, quality=nivel))
+        else:
+            resposta.set_data(gzip.compress(corpo, compresslevel=nivel, mtime=0))
+
+    resposta.headers['Content-Encoding'] = codificacao
+    # O corpo comprimido é outra representação: o ETag deixa de ser forte
+    etag, fraco = resposta.get_etag()
+    if etag and not fraco:
+        resposta.set_etag(etag, weak=True)
+    return resposta
+
+
+def configurar_respostas(app):
+    """Instalar o provedor JSON e a compressão das respostas na aplicação"""
+    app.json = ProvedorJSON(app)
+    app.after_request(comprimir_resposta)
@@ -0,0 +1,78 @@
+"""
+Serialização das listagens: carregamento antecipado dos relacionamentos e
+campos esparsos (?fields= e ?expand=)
+Sistema de Programação Musical
+"""
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+from src.models.programacao import Musica, BancoLocucao, LocutorEmissora
+
+# Relacionamentos que cada modelo inclui no to_dict
+RELACIONAMENTOS = {
+    Musica: ('categoria', 'estilo'),
+    BancoLocucao: ('emissora', 'locutor'),
+    LocutorEmissora: ('locutor', 'emissora')
+}
+
+
+def _lista_parametro(valor):
+    return [parte.strip() for parte in valor.split(',') if parte.strip()]
+
+
+class Serializador:
+    """Serializa uma lista de objetos com os campos e relacionamentos pedidos
+
+    - sem parâmetros: resposta completa, como o to_dict do modelo;
+    - `fields=id,nome_musica`: apenas esses campos (relacionamentos citados
+      em `fields` são incluídos);
+    - `expand=categoria`: só os relacionamentos listados; `expand=` vazio
+      remove todos os objetos aninhados.
+
+    Os relacionamentos incluídos são carregados junto com a consulta
+    principal (joinedload para muitos-para-um, selectinload para coleções),
+    em vez de uma consulta por linha.
+    """
+
+    def __init__(self, modelo, campos=None, expand=None):
+        self.modelo = modelo
+        relacionamentos = RELACIONAMENTOS.get(modelo, ())
+        colunas = [coluna.key for coluna in inspect(modelo).column_attrs]
+
+        validos = set(colunas) | set(relacionamentos)
+        for nome in (campos or []) + (expand or []):
+            if nome not in validos:
+                raise ValueError(f'Campo inválido: {nome}')
+
+        if expand is not None:
+            self.expand = [nome for nome in relacionamentos if nome in expand]
+        elif campos is not None:
+            self.expand = [nome for nome in relacionamentos if nome in campos]
+        else:
+            self.expand = list(relacionamentos)
+
+        self.campos = set(campos) | set(self.expand) if campos is not None else None
+
+    @classmethod
+    def da_requisicao(cls, modelo, args):
+        """Montar a partir dos parâmetros `fields` e `expand` da query string"""
+        campos = _lista_parametro(args['fields']) if 'fields' in args else None
+        expand = _lista_parametro(args['expand']) if 'expand' in args else None
+        return cls(modelo, campos, expand)
+
+    def carregar(self, query):
+        """Aplicar o carregamento antecipado dos relacionamentos incluídos"""
+        opcoes = []
+        for nome in self.expand:
+            atributo = getattr(self.modelo, nome)
+            opcoes.append(selectinload(atributo) if atributo.property.uselist else joinedload(atributo))
+        return query.options(*opcoes) if opcoes else query
+
+    def serializar(self, objeto):
+        dados = objeto.to_dict(expand=self.expand)
+        if self.campos is not None:
+            dados = {chave: valor for chave, valor in dados.items() if chave in self.campos}
+        return dados
+
+    def lista(self, objetos):
+        return [self.serializar(objeto) for objeto in objetos]
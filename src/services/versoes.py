@@ -0,0 +1,123 @@
+"""
+Versões das tabelas de referência e GET condicional (ETag / Last-Modified / 304)
+Sistema de Programação Musical
+"""
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from flask import Response, make_response, request
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+
+from src.models.programacao import db, VersaoTabela
+
+# Tabelas cujas alterações mudam a versão (e o ETag) das listagens
+TABELAS_VERSIONADAS = {'categorias', 'estilos', 'emissoras', 'locutores', 'locutor_emissora', 'musicas'}
+
+# Chave em session.info com {tabela: (versão antes da transação, versão gravada)}
+CHAVE_VERSOES = 'versoes_gravadas'
+
+
+def incrementar_versoes(conexao, tabelas, info=None):
+    """Incrementar a versão das tabelas informadas na conexão (transação) atual
+
+    Com `info` (session.info), guarda a versão de antes da transação e a
+    nova, para os caches em memória avançarem após o commit.
+    """
+    agora = datetime.utcnow()
+    tabela_versoes = VersaoTabela.__table__
+    for tabela in sorted(tabelas):
+        nova = conexao.execute(
+            update(tabela_versoes).where(tabela_versoes.c.tabela == tabela).values(
+                versao=tabela_versoes.c.versao + 1, atualizado_em=agora
+            ).returning(tabela_versoes.c.versao)
+        ).scalar()
+        if nova is None:
+            conexao.execute(insert(tabela_versoes).values(tabela=tabela, versao=1, atualizado_em=agora))
+            nova = 1
+        if info is not None:
+            gravadas = info.setdefault(CHAVE_VERSOES, {})
+            gravadas[tabela] = (gravadas.get(tabela, (nova - 1,))[0], nova)
+
+
+@event.listens_for(Session, 'after_flush')
+def _versoes_do_flush(session, contexto):
+    """Incrementar as versões das tabelas alteradas pelo ORM, na mesma transação"""
+    tabelas = set()
+    for objeto in list(session.new) + list(session.deleted):
+        tabelas.add(getattr(objeto, '__tablename__', None))
+    for objeto in session.dirty:
+        if session.is_modified(objeto, include_collections=False):
+            tabelas.add(getattr(objeto, '__tablename__', None))
+    tabelas &= TABELAS_VERSIONADAS
+    if tabelas:
+        incrementar_versoes(session.connection(), tabelas, session.info)
+
+
+def registrar_alteracao(*tabelas):
+    """Marcar tabelas alteradas por comandos em lote (INSERT/UPDATE/DELETE fora do ORM)"""
+    incrementar_versoes(db.session.connection(), tabelas, db.session.info)
+
+
+def ler_versoes(tabelas):
+    """{tabela: versão atual} (0 para tabelas ainda sem alteração)"""
+    versoes = dict.fromkeys(tabelas, 0)
+    if versoes:
+        versoes.update(db.session.query(VersaoTabela.tabela, VersaoTabela.versao).filter(
+            VersaoTabela.tabela.in_(list(versoes))
+        ))
+    return versoes
+
+
+def versao_atual(tabelas):
+    """ETag da requisição atual e data da última alteração das tabelas, com uma única consulta"""
+    linhas = []
+    if tabelas:
+        linhas = db.session.query(VersaoTabela.tabela, VersaoTabela.versao, VersaoTabela.atualizado_em).filter(
+            VersaoTabela.tabela.in_(tabelas)
+        ).all()
+    versoes = {tabela: (versao, atualizado_em) for tabela, versao, atualizado_em in linhas}
+    assinatura = request.full_path + ';' + ';'.join(
+        f'{tabela}:{versoes.get(tabela, (0, None))[0]}' for tabela in sorted(tabelas)
+    )
+    etag = hashlib.sha1(assinatura.encode()).hexdigest()[:16]
+    datas = [atualizado_em for _, atualizado_em in versoes.values() if atualizado_em]
+    return etag, max(datas) if datas else None
+
+
+def get_condicional(*tabelas):
+    """Decorator de rotas GET: responde 304 sem executar a rota se nada mudou
+
+    O ETag vem das versões das tabelas usadas pela rota, então a verificação
+    custa uma consulta por chave primária e nenhuma linha da listagem é
+    carregada ou serializada quando o cliente já tem a versão atual.
+    """
+    def decorator(rota):
+        @wraps(rota)
+        def envolvida(*args, **kwargs):
+            etag, ultima_alteracao = versao_atual(tabelas)
+
+            if request.if_none_match:
+                # Comparação fraca: a compressão marca o ETag como fraco (W/"...")
+                atual = request.if_none_match.contains_weak(etag)
+            elif request.if_modified_since and ultima_alteracao:
+                atual = ultima_alteracao.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+            else:
+                atual = False
+
+            if atual:
+                resposta = Response(status=304)
+            else:
+                resposta = make_response(rota(*args, **kwargs))
+                if resposta.status_code != 200:
+                    return resposta
+
+            resposta.set_etag(etag)
+            if ultima_alteracao:
+                resposta.last_modified = ultima_alteracao
+            # O cliente pode guardar, mas deve revalidar a cada uso
+            resposta.headers['Cache-Control'] = 'no-cache'
+            return resposta
+        return envolvida
+    return decorator
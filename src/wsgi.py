@@ -0,0 +1,20 @@
+"""
+Ponto de entrada WSGI para servidores com vários workers
+Sistema de Programação Musical
+
+Exemplo:
+    python scripts/migrar_banco.py          # uma vez, a cada deploy
+    gunicorn -w 4 -b 0.0.0.0:5000 src.wsgi:app
+
+A configuração vem de FLASK_CONFIG (padrão: production). Cada worker só
+confere a versão do esquema; as migrações não rodam na inicialização.
+"""
+import os
+
+from src.main import create_app
+from src.services.perfil_sqlite import iniciar_manutencao
+
+app = create_app(os.environ.get('FLASK_CONFIG', 'production'))
+
+# ANALYZE / PRAGMA optimize / vacuum incremental periódicos (um worker por vez)
+iniciar_manutencao(app)
@@ -0,0 +1,84 @@
+"""
+Fixtures compartilhadas dos testes: aplicação em SQLite na memória e um catálogo com grade
+Sistema de Programação Musical
+"""
+import os
+import sys
+from datetime import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import create_app
+from src.models.programacao import (
+    db, Categoria, Estilo, Emissora, Musica, GradeProgramacao, GradeSequenciaCategoria, HorarioIntervalo
+)
+from src.services.autocompletar import INDICES
+from src.services.interpretes import INTERPRETES
+from src.services.referencias import REFERENCIAS
+
+# Catálogo da fixture `catalogo`: músicas de 3 minutos, três por intérprete
+MUSICAS_CATALOGO = 240
+INTERPRETES_CATALOGO = 80
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+    # Todo banco de teste tem a mesma URL (sqlite:///:memory:): os caches não podem passar de um teste ao outro
+    for cache in [*REFERENCIAS.values(), *INDICES.values(), INTERPRETES]:
+        cache.invalidar()
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def catalogo(app):
+    """Duas categorias alternadas na grade diária, uma emissora e MUSICAS_CATALOGO músicas
+
+    A grade tem dois breaks comerciais por hora (hh:28 e hh:55). Retorna os
+    ids criados.
+    """
+    with app.app_context():
+        categorias = [Categoria(codigo=f'C{i}', nome=f'Categoria {i}') for i in range(2)]
+        estilo = Estilo(nome='Pop')
+        emissora = Emissora(codigo='R1', nome='Rádio 1')
+        db.session.add_all([*categorias, estilo, emissora])
+        db.session.flush()
+
+        db.session.add_all([
+            Musica(
+                interprete1=f'Intérprete {indice % INTERPRETES_CATALOGO}', nome_musica=f'Canção {indice}',
+                ano_lancamento=1990 + indice % 30, categoria_id=categorias[indice % 2].id,
+                estilo_id=estilo.id, velocidade=1 + indice % 3, duracao_padrao=time(0, 3)
+            )
+            for indice in range(MUSICAS_CATALOGO)
+        ])
+
+        grade = GradeProgramacao(nome='Grade diária', todos_dias=True, ativa=True)
+        db.session.add(grade)
+        db.session.flush()
+        db.session.add_all([
+            GradeSequenciaCategoria(grade_id=grade.id, categoria_id=categoria.id, ordem=ordem)
+            for ordem, categoria in enumerate(categorias)
+        ])
+        for hora in range(24):
+            db.session.add_all([
+                HorarioIntervalo(grade_id=grade.id, hora=time(hora, 28), tipo='BC', duracao=time(0, 4), ordem=1),
+                HorarioIntervalo(grade_id=grade.id, hora=time(hora, 55), tipo='BC', duracao=time(0, 3), ordem=2),
+            ])
+        db.session.commit()
+        return {
+            'categorias': [categoria.id for categoria in categorias],
+            'estilo': estilo.id,
+            'emissora': emissora.id,
+            'grade': grade.id
+        }
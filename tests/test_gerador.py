@@ -0,0 +1,83 @@
+"""
+Geração diária: separação entre repetições de música e de intérprete
+Sistema de Programação Musical
+"""
+from src.models.programacao import db, Musica, ProgramacaoItem
+
+SEPARACAO_MUSICA = 180
+SEPARACAO_INTERPRETE = 60
+
+
+def _gerar(cliente, catalogo, **opcoes):
+    resposta = cliente.post('/api/programacao/gerar', json={
+        'data': '2024-03-04', 'emissora_id': catalogo['emissora'], 'semente': 7, **opcoes
+    })
+    assert resposta.status_code == 201, resposta.get_json()
+    return resposta.get_json()['id']
+
+
+def _musicas_tocadas(app, programacao_id):
+    """[(hora em segundos, música, intérprete)] na ordem do dia"""
+    with app.app_context():
+        return (
+            db.session.query(ProgramacaoItem.hora, Musica.id, Musica.interprete1)
+            .join(Musica, Musica.id == ProgramacaoItem.musica_id)
+            .filter(ProgramacaoItem.programacao_id == programacao_id, ProgramacaoItem.tipo == 'musica')
+            .order_by(ProgramacaoItem.hora)
+            .all()
+        )
+
+
+def _menor_intervalo(tocadas, chave):
+    """Menor distância, em segundos, entre duas execuções com a mesma chave"""
+    ultima = {}
+    menor = None
+    for hora, *valores in tocadas:
+        valor = valores[chave]
+        if valor in ultima:
+            intervalo = hora - ultima[valor]
+            menor = intervalo if menor is None else min(menor, intervalo)
+        ultima[valor] = hora
+    return menor
+
+
+def test_geracao_respeita_as_separacoes(app, cliente, catalogo):
+    programacao_id = _gerar(
+        cliente, catalogo, separacao_musica=SEPARACAO_MUSICA, separacao_interprete=SEPARACAO_INTERPRETE
+    )
+    tocadas = _musicas_tocadas(app, programacao_id)
+
+    # Dia inteiro preenchido: 24h de músicas de 3 minutos menos os breaks
+    assert len(tocadas) > 400
+    assert tocadas[-1][0] >= 23 * 3600
+    assert _menor_intervalo(tocadas, 0) >= SEPARACAO_MUSICA * 60
+    assert _menor_intervalo(tocadas, 1) >= SEPARACAO_INTERPRETE * 60
+
+
+def test_categorias_seguem_a_sequencia_da_grade(app, cliente, catalogo):
+    programacao_id = _gerar(cliente, catalogo)
+    with app.app_context():
+        categorias = [
+            categoria_id for (categoria_id,) in db.session.query(ProgramacaoItem.categoria_id)
+            .filter(ProgramacaoItem.programacao_id == programacao_id, ProgramacaoItem.tipo == 'musica')
+            .order_by(ProgramacaoItem.hora)
+        ]
+    primeira, segunda = catalogo['categorias']
+    assert all(
+        (anterior, atual) in ((primeira, segunda), (segunda, primeira))
+        for anterior, atual in zip(categorias, categorias[1:])
+    )
+
+
+def test_mesma_semente_gera_a_mesma_programacao(app, cliente, catalogo):
+    primeira = _musicas_tocadas(app, _gerar(cliente, catalogo))
+    segunda = _musicas_tocadas(app, _gerar(cliente, catalogo, substituir=True))
+    assert primeira == segunda
+
+
+def test_separacao_com_tipo_errado_e_recusada(cliente, catalogo):
+    resposta = cliente.post('/api/programacao/gerar', json={
+        'data': '2024-03-04', 'separacao_musica': '180'
+    })
+    assert resposta.status_code == 400
+    assert 'separacao_musica' in resposta.get_json()['error']
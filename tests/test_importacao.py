@@ -0,0 +1,63 @@
+"""
+Importação de músicas: erros por linha em JSON Lines e CSV
+Sistema de Programação Musical
+"""
+import json
+
+from src.models.programacao import Musica
+
+
+def _importar(cliente, formato, corpo, tipo):
+    resposta = cliente.post(f'/api/musicas/importar?formato={formato}', data=corpo, content_type=tipo)
+    assert resposta.status_code == 200, resposta.get_json()
+    return resposta.get_json()
+
+
+def test_jsonl_reporta_cada_linha_invalida_e_importa_as_demais(app, cliente, catalogo):
+    valida = {
+        'interprete1': 'Novo Intérprete', 'nome_musica': 'Nova Canção', 'ano_lancamento': 1995,
+        'categoria_codigo': 'C0', 'estilo': 'Pop'
+    }
+    linhas = [
+        json.dumps(valida),
+        '{"interprete1": "Sem fechar"',
+        '["não", "é", "objeto"]',
+        json.dumps(dict(valida, estilo=['Pop'])),
+        json.dumps(dict(valida, ano_lancamento='noventa')),
+        '',
+        json.dumps(dict(valida, nome_musica='Outra Canção', categoria_codigo='C1')),
+    ]
+    resultado = _importar(cliente, 'jsonl', '\n'.join(linhas), 'application/x-ndjson')
+
+    assert resultado['importadas'] == 2
+    assert resultado['total_erros'] == 4
+    erros = {erro['linha']: erro['erro'] for erro in resultado['erros']}
+    assert sorted(erros) == [2, 3, 4, 5]
+    assert erros[2].startswith('JSON inválido')
+    assert erros[3] == 'Cada linha deve ser um objeto JSON'
+    assert 'Estilo' in erros[4]
+    assert erros[5] == 'Campo ano_lancamento deve ser um número inteiro'
+
+    with app.app_context():
+        assert Musica.query.filter_by(interprete1='Novo Intérprete').count() == 2
+
+
+def test_csv_numera_as_linhas_a_partir_do_cabecalho(app, cliente, catalogo):
+    corpo = (
+        'interprete1,nome_musica,ano_lancamento,categoria_codigo\n'
+        'Intérprete CSV,Canção CSV,2001,C0\n'
+        'Intérprete CSV,,2001,C0\n'
+        'Intérprete CSV,Canção Sem Categoria,2001,C7\n'
+    )
+    resultado = _importar(cliente, 'csv', corpo, 'text/csv')
+
+    assert resultado['importadas'] == 1
+    assert resultado['erros'] == [
+        {'linha': 3, 'erro': 'Campo nome_musica é obrigatório'},
+        {'linha': 4, 'erro': 'Categoria C7 não encontrada'},
+    ]
+
+
+def test_formato_desconhecido_e_recusado(cliente):
+    resposta = cliente.post('/api/musicas/importar?formato=xml', data='<musicas/>', content_type='text/xml')
+    assert resposta.status_code == 400
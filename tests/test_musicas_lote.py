@@ -0,0 +1,66 @@
+"""
+Alterações em lote de músicas: seleção por filtros da query string
+Sistema de Programação Musical
+"""
+import pytest
+
+from src.models.programacao import db, Categoria, Musica
+
+
+@pytest.fixture(autouse=True)
+def musicas(app):
+    with app.app_context():
+        categoria = Categoria(codigo='C1', nome='Categoria 1')
+        db.session.add(categoria)
+        db.session.flush()
+        db.session.add_all([
+            Musica(interprete1='João Silva', nome_musica='Canção A', ano_lancamento=1990,
+                   categoria_id=categoria.id, velocidade=1),
+            Musica(interprete1='Maria Souza', nome_musica='Canção B', ano_lancamento=2000,
+                   categoria_id=categoria.id, velocidade=1),
+        ])
+        db.session.commit()
+
+
+def _velocidades(app):
+    with app.app_context():
+        return sorted(velocidade for (velocidade,) in db.session.query(Musica.velocidade))
+
+
+@pytest.mark.parametrize('filtros', ['ano=abc', 'ano=', 'categoria_id=0', 'velocidade=x', 'q=', 'q=%22', 'q=%20'])
+def test_filtro_invalido_nao_seleciona_o_catalogo(app, filtros):
+    cliente = app.test_client()
+
+    resposta = cliente.patch(f'/api/musicas?{filtros}', json={'valores': {'velocidade': 3}})
+    assert resposta.status_code == 400
+    assert _velocidades(app) == [1, 1]
+
+    resposta = cliente.delete(f'/api/musicas?{filtros}')
+    assert resposta.status_code == 400
+    with app.app_context():
+        assert Musica.query.count() == 2
+
+
+def test_filtro_invalido_junto_de_um_valido_e_recusado(app):
+    resposta = app.test_client().patch('/api/musicas?ano=1990&categoria_id=0', json={'valores': {'velocidade': 3}})
+    assert resposta.status_code == 400
+    assert _velocidades(app) == [1, 1]
+
+
+def test_filtros_validos_selecionam_so_as_musicas_filtradas(app):
+    cliente = app.test_client()
+
+    resposta = cliente.patch('/api/musicas?ano=1990', json={'valores': {'velocidade': 3}})
+    assert resposta.status_code == 200
+    assert _velocidades(app) == [1, 3]
+
+    resposta = cliente.delete('/api/musicas?q=maria')
+    assert resposta.status_code == 200
+    with app.app_context():
+        assert [musica.interprete1 for musica in Musica.query] == ['João Silva']
+
+
+def test_listagem_continua_ignorando_filtro_invalido(app):
+    resposta = app.test_client().get('/api/musicas?ano=abc&categoria_id=0')
+    assert resposta.status_code == 200
+    assert len(resposta.get_json()['musicas']) == 2
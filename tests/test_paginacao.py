@@ -0,0 +1,46 @@
+"""
+Paginação por cursor da listagem de músicas
+Sistema de Programação Musical
+"""
+import pytest
+
+from src.models.programacao import db, Musica
+
+
+def _percorrer(cliente, **parametros):
+    """Todas as páginas seguindo next_cursor; retorna a lista de músicas e o número de páginas"""
+    musicas = []
+    paginas = 0
+    cursor = ''
+    while cursor is not None:
+        resposta = cliente.get('/api/musicas', query_string={'cursor': cursor, 'per_page': 25, **parametros})
+        assert resposta.status_code == 200, resposta.get_json()
+        dados = resposta.get_json()
+        musicas.extend(dados['musicas'])
+        cursor = dados['next_cursor']
+        paginas += 1
+    return musicas, paginas
+
+
+def test_cursor_percorre_o_catalogo_sem_repetir(app, cliente, catalogo):
+    musicas, paginas = _percorrer(cliente)
+
+    with app.app_context():
+        ids = [musica_id for (musica_id,) in db.session.query(Musica.id).order_by(Musica.id)]
+    assert [musica['id'] for musica in musicas] == ids
+    assert paginas == len(ids) // 25 + 1
+
+
+@pytest.mark.parametrize('ordem', ['asc', 'desc'])
+def test_cursor_com_ordenacao_por_coluna_repetida(cliente, catalogo, ordem):
+    # Três músicas por intérprete: o desempate pelo id não pode pular nem repetir linhas
+    musicas, _ = _percorrer(cliente, ordenar='interprete1', ordem=ordem)
+
+    chaves = [(musica['interprete1'], musica['id']) for musica in musicas]
+    assert chaves == sorted(chaves, reverse=ordem == 'desc')
+    assert len(set(chaves)) == len(chaves)
+
+
+def test_cursor_invalido_e_recusado(cliente, catalogo):
+    resposta = cliente.get('/api/musicas?cursor=nao-e-um-cursor')
+    assert resposta.status_code == 400
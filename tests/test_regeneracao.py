@@ -0,0 +1,61 @@
+"""
+Regeneração incremental: só os blocos afetados por mudanças na grade são refeitos
+Sistema de Programação Musical
+"""
+from datetime import time
+
+from src.models.programacao import db, HorarioIntervalo, ProgramacaoItem
+
+
+def _itens_por_bloco(app, programacao_id):
+    with app.app_context():
+        itens = {}
+        for bloco, ordem, hora, musica_id in (
+            db.session.query(ProgramacaoItem.bloco, ProgramacaoItem.ordem, ProgramacaoItem.hora, ProgramacaoItem.musica_id)
+            .filter_by(programacao_id=programacao_id)
+            .order_by(ProgramacaoItem.bloco, ProgramacaoItem.ordem)
+        ):
+            itens.setdefault(bloco, []).append((ordem, hora, musica_id))
+        return itens
+
+
+def _gerar(cliente, catalogo):
+    resposta = cliente.post('/api/programacao/gerar', json={
+        'data': '2024-03-04', 'emissora_id': catalogo['emissora'], 'semente': 7
+    })
+    assert resposta.status_code == 201, resposta.get_json()
+    return resposta.get_json()['id']
+
+
+def _regenerar(cliente, programacao_id):
+    resposta = cliente.post(f'/api/programacao/{programacao_id}/regenerar', json={'semente': 11})
+    assert resposta.status_code == 200, resposta.get_json()
+    return resposta.get_json()['blocos_regenerados']
+
+
+def test_grade_sem_mudancas_nao_regenera_nada(app, cliente, catalogo):
+    programacao_id = _gerar(cliente, catalogo)
+    antes = _itens_por_bloco(app, programacao_id)
+
+    assert _regenerar(cliente, programacao_id) == []
+    assert _itens_por_bloco(app, programacao_id) == antes
+
+
+def test_mudanca_de_um_intervalo_refaz_so_os_blocos_vizinhos(app, cliente, catalogo):
+    programacao_id = _gerar(cliente, catalogo)
+    antes = _itens_por_bloco(app, programacao_id)
+
+    with app.app_context():
+        intervalo = HorarioIntervalo.query.filter_by(grade_id=catalogo['grade'], hora=time(10, 28)).one()
+        intervalo.hora = time(10, 31)
+        db.session.commit()
+
+    regenerados = _regenerar(cliente, programacao_id)
+    depois = _itens_por_bloco(app, programacao_id)
+
+    assert regenerados
+    assert len(regenerados) < len(depois) // 4
+    assert antes.keys() == depois.keys()
+    for bloco in set(depois) - set(regenerados):
+        assert depois[bloco] == antes[bloco]
+    assert any(depois[bloco] != antes[bloco] for bloco in regenerados)
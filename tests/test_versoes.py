@@ -0,0 +1,27 @@
+"""
+Respostas condicionais (ETag/304) das listagens versionadas
+Sistema de Programação Musical
+"""
+
+
+def test_etag_repetido_recebe_304(cliente):
+    resposta = cliente.get('/api/categorias')
+    etag = resposta.headers['ETag']
+    assert resposta.status_code == 200
+
+    condicional = cliente.get('/api/categorias', headers={'If-None-Match': etag})
+    assert condicional.status_code == 304
+    assert condicional.headers['ETag'] == etag
+    assert condicional.data == b''
+
+
+def test_escrita_muda_o_etag(cliente):
+    etag = cliente.get('/api/categorias').headers['ETag']
+
+    criada = cliente.post('/api/categorias', json={'codigo': 'C9', 'nome': 'Categoria 9'})
+    assert criada.status_code == 201
+
+    resposta = cliente.get('/api/categorias', headers={'If-None-Match': etag})
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag'] != etag
+    assert [categoria['codigo'] for categoria in resposta.get_json()] == ['C9']